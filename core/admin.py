@@ -1,6 +1,10 @@
 from django.contrib import admin
-from .models import Event, Booking, Payment, CheckinLog
-from django.utils.safestring import mark_safe
+from django.contrib.admin.views.main import ChangeList
+from .models import Event, Booking, Payment, CheckinLog, DeliveryJob, PaymentEvent
+from django.utils.html import format_html
+
+from .pagination import EstimatedCountPaginator
+from .ticket_ids import normalize_ticket_id
 
 
 
@@ -14,26 +18,122 @@ class ProfileAdmin(admin.ModelAdmin):
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
-       list_display = ['name', 'date', 'organizer', 'location', 'capacity']
-      
+    list_display = ['name', 'date', 'organizer', 'location', 'capacity']
+    # Seat counters only move through F() updates in core.reservations.
+    readonly_fields = ('tickets_sold', 'tickets_held')
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            # A full save would write back the counters as they were when the form loaded.
+            obj.save(update_fields=[
+                field.name for field in obj._meta.concrete_fields
+                if not field.primary_key and field.name not in self.readonly_fields
+            ])
+        else:
+            super().save_model(request, obj, form, change)
+
+
+class _LeanChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.only(*self.model_admin.list_only)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow to millions of rows.
+
+    Counts come from ``EstimatedCountPaginator`` and the unfiltered total is
+    never counted next to a filtered one. Rows are loaded with
+    ``list_select_related`` and narrowed to ``list_only``, which applies to the
+    changelist only (the change form still loads whole rows). Search is an
+    exact ``ticket_id_field`` match, one ticket ID per word, so it stays on the
+    unique index; IDs are normalised the way the scanners do it.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_only = ()
+    ticket_id_field = None
+    search_help_text = 'Exact ticket IDs, separated by spaces'
+
+    def get_changelist(self, request, **kwargs):
+        return _LeanChangeList if self.list_only else super().get_changelist(request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        ticket_ids = {normalize_ticket_id(term) or term for term in search_term.split()}
+        if not ticket_ids:
+            return queryset, False
+        return queryset.filter(**{f'{self.ticket_id_field}__in': ticket_ids}), False
+
+
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
-    list_display = ('user', 'event', 'status', 'ticket_id', 'payment_screenshot_preview')
+class BookingAdmin(LargeTableAdmin):
+    list_display = ('ticket_id', 'user', 'event', 'status', 'booking_time', 'payment_screenshot_preview')
+    list_select_related = ('user', 'event')
+    list_only = (
+        'ticket_id', 'status', 'booking_time', 'payment_screenshot', 'payment_screenshot_thumb',
+        'user__username', 'event__name',
+    )
+    list_filter = ('status',)
+    search_fields = ('ticket_id',)
+    ticket_id_field = 'ticket_id'
+    raw_id_fields = ('user', 'event')
 
     readonly_fields = ('payment_screenshot_preview',)
 
     def payment_screenshot_preview(self, obj):
-        if hasattr(obj, 'payment') and obj.payment.payment_screenshot:
-            return mark_safe(f'<img src="{obj.payment.payment_screenshot.url}" width="150" />')
+        # Thumbnails only: the full upload is never loaded by the changelist.
+        if obj.payment_screenshot_thumb_url:
+            return format_html('<img src="{}" width="150" loading="lazy" />', obj.payment_screenshot_thumb_url)
+        if obj.payment_screenshot:
+            return "Preview pending"
         return "No Screenshot"
     
     payment_screenshot_preview.short_description = "Payment Screenshot"
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
-    list_display = ('payment_id', 'booking', 'amount', 'status', 'payment_time')
+class PaymentAdmin(LargeTableAdmin):
+    list_display = ('payment_id', 'ticket_id', 'amount', 'status', 'payment_time')
+    list_select_related = ('booking',)
+    list_only = ('payment_id', 'amount', 'status', 'payment_time', 'booking__ticket_id')
+    list_filter = ('status',)
+    search_fields = ('booking__ticket_id',)
+    ticket_id_field = 'booking__ticket_id'
+    raw_id_fields = ('booking',)
+
+    @admin.display(description='Ticket')
+    def ticket_id(self, obj):
+        return obj.booking.ticket_id
+
 
 @admin.register(CheckinLog)
-class CheckinLogAdmin(admin.ModelAdmin):
-    list_display = ('booking', 'scanned_by', 'checkin_time')
+class CheckinLogAdmin(LargeTableAdmin):
+    list_display = ('ticket_id', 'scanned_by', 'device_id', 'checkin_time')
+    list_select_related = ('booking', 'scanned_by')
+    list_only = ('checkin_time', 'device_id', 'booking__ticket_id', 'scanned_by__username')
+    search_fields = ('booking__ticket_id',)
+    ticket_id_field = 'booking__ticket_id'
+    raw_id_fields = ('booking', 'scanned_by')
+
+    @admin.display(description='Ticket')
+    def ticket_id(self, obj):
+        return obj.booking.ticket_id
+
+@admin.register(DeliveryJob)
+class DeliveryJobAdmin(LargeTableAdmin):
+    list_display = ('ticket_id', 'kind', 'status', 'attempts', 'run_after', 'updated_at')
+    list_select_related = ('booking',)
+    list_only = ('kind', 'status', 'attempts', 'run_after', 'updated_at', 'booking__ticket_id')
+    list_filter = ('status', 'kind')
+    search_fields = ('booking__ticket_id',)
+    ticket_id_field = 'booking__ticket_id'
+    raw_id_fields = ('booking',)
+
+    @admin.display(description='Ticket')
+    def ticket_id(self, obj):
+        return obj.booking.ticket_id
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ('payment_id', 'ticket_id', 'status', 'amount', 'received_at', 'applied_at', 'error')
+    list_filter = ('status',)
@@ -0,0 +1,10 @@
+"""Endpoint benchmarks: synthetic data seeding and a threaded request runner.
+
+Run through ``manage.py bench_endpoints``, which seeds a throwaway test
+database, drives each hot view with concurrent test clients and reports
+throughput, latency percentiles and queries per request.
+"""
+from .runner import ENDPOINTS, compare, run_endpoint
+from .seed import SeedData, seed
+
+__all__ = ['ENDPOINTS', 'SeedData', 'compare', 'run_endpoint', 'seed']
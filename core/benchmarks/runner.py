@@ -0,0 +1,118 @@
+"""Drive one endpoint with concurrent test clients and summarise the timings."""
+import threading
+import time
+from collections import namedtuple
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from core.devices import issue_device_token
+from core.models import Event
+
+# ``build(data, i)`` returns ``(method, path)`` for the i-th request; ``role``
+# picks which seeded user the clients log in as (None for anonymous), or
+# 'device' for a gate scanner token on the first event.
+Endpoint = namedtuple('Endpoint', 'role build')
+
+
+def _pick(ids, i):
+    return ids[i % len(ids)]
+
+
+ENDPOINTS = {
+    'event_list': Endpoint(None, lambda d, i: ('get', '/events/')),
+    'api_event_list': Endpoint(None, lambda d, i: ('get', '/api/events/?limit=50')),
+    'book_ticket': Endpoint('attendee', lambda d, i: ('post', f'/api/book/{_pick(d.event_ids, i)}/')),
+    'fake_payment': Endpoint('attendee', lambda d, i: ('post', f'/bench/fake-payment/{_pick(d.event_ids, i)}/')),
+    'mark_attendance': Endpoint('organizer', lambda d, i: ('post', f'/api/attend/{_pick(d.ticket_ids, i)}/')),
+    # Same check-in with device-token auth: no session read, no User fetch.
+    'mark_attendance_device': Endpoint(
+        'device', lambda d, i: ('post', f'/api/attend/{_pick(d.ticket_ids[::len(d.event_ids)], i)}/'),
+    ),
+    'organizer_bookings': Endpoint('organizer', lambda d, i: ('get', f'/organizer/bookings/?page={1 + i % 5}')),
+    'download_qr_code': Endpoint(None, lambda d, i: ('get', f'/api/qr/{_pick(d.booking_ids, i)}/')),
+}
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))]
+
+
+def _client(role, data, k):
+    # Server errors come back as 500 responses and count as errors.
+    if role == 'device':
+        event = Event.objects.select_related('organizer').get(pk=data.event_ids[0])
+        token = issue_device_token(event, event.organizer, f'bench-{k}')
+        return Client(raise_request_exception=False, headers={'Authorization': f'Device {token}'})
+    client = Client(raise_request_exception=False)
+    if role == 'organizer':
+        client.force_login(User.objects.get(pk=_pick(data.organizer_ids, k)))
+    elif role == 'attendee':
+        client.force_login(User.objects.get(pk=_pick(data.attendee_ids, k)))
+    return client
+
+
+def run_endpoint(name, data, requests=200, threads=4):
+    """Send ``requests`` requests to endpoint ``name`` from ``threads`` threads.
+
+    Returns throughput, latency percentiles (ms), queries per request and
+    the number of 4xx/5xx responses.
+    """
+    endpoint = ENDPOINTS[name]
+    clients = [_client(endpoint.role, data, k) for k in range(threads)]
+    samples = [[] for _ in range(threads)]
+
+    def work(k):
+        client = clients[k]
+        try:
+            for i in range(k, requests, threads):
+                method, path = endpoint.build(data, i)
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = getattr(client, method)(path)
+                    elapsed = time.perf_counter() - started
+                samples[k].append((elapsed, len(queries), response.status_code))
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=work, args=(k,)) for k in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    wall = time.perf_counter() - started
+
+    results = [sample for per_thread in samples for sample in per_thread]
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in results)
+    query_counts = [count for _, count, _ in results]
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, _, status in results if status >= 400),
+        'throughput_rps': round(len(results) / wall, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_queries': round(sum(query_counts) / len(query_counts), 1),
+        'max_queries': max(query_counts),
+    }
+
+
+def compare(results, baseline):
+    """Percentage change of throughput and p95 latency per endpoint present in both runs."""
+    changes = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        changes[name] = {
+            metric: round((current[metric] - previous[metric]) / previous[metric] * 100, 1)
+            for metric in ('throughput_rps', 'p95_ms', 'mean_queries')
+            if previous.get(metric)
+        }
+    return changes
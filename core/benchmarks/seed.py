@@ -0,0 +1,89 @@
+"""Synthetic events, users and bookings written with ``bulk_create``."""
+import random
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from core.models import Booking, Event, Profile
+
+PASSWORD = 'bench'
+USERNAME_PREFIX = 'bench-'
+BOOKING_STATUSES = ['CONFIRMED'] * 7 + ['PENDING'] * 2 + ['ATTENDED']
+
+SeedData = namedtuple('SeedData', 'organizer_ids attendee_ids event_ids booking_ids ticket_ids')
+
+
+def _bulk_users(names, password, batch_size):
+    User.objects.bulk_create(
+        [User(username=name, email=f'{name}@example.com', password=password) for name in names],
+        batch_size=batch_size,
+    )
+    # bulk_create doesn't return primary keys on every backend, so read them back.
+    return list(User.objects.filter(username__in=names).order_by('pk').values_list('pk', flat=True))
+
+
+def seed(events=50, users=500, bookings=5000, batch_size=1000, random_seed=0):
+    """Create the data set and return the ids benchmarks pick from.
+
+    One organiser per ten events owns the events; bookings are spread
+    round-robin over events and randomly over attendees, with seat counters
+    set to match. Capacities leave room for the booking benchmarks.
+    """
+    rng = random.Random(random_seed)
+    password = make_password(PASSWORD)
+
+    organizer_ids = _bulk_users(
+        [f'{USERNAME_PREFIX}org-{i}' for i in range(max(1, events // 10))], password, batch_size,
+    )
+    attendee_ids = _bulk_users(
+        [f'{USERNAME_PREFIX}user-{i}' for i in range(users)], password, batch_size,
+    )
+    # post_save doesn't fire for bulk_create, so profiles are created here too.
+    Profile.objects.bulk_create(
+        [Profile(user_id=pk, role='organiser') for pk in organizer_ids]
+        + [Profile(user_id=pk, role='participant') for pk in attendee_ids],
+        batch_size=batch_size,
+    )
+
+    sold = Counter(i % events for i in range(bookings))
+    today = timezone.localdate()
+    Event.objects.bulk_create(
+        [
+            Event(
+                name=f'{USERNAME_PREFIX}event-{i}',
+                date=today + timedelta(days=1 + i % 365),
+                location=f'Hall {i % 20}',
+                description='Benchmark event',
+                capacity=sold[i] + 100_000,
+                price=rng.choice([0, 100, 250, 500]),
+                organizer_id=organizer_ids[i % len(organizer_ids)],
+                upi_id='bench@upi',
+                tickets_sold=sold[i],
+            )
+            for i in range(events)
+        ],
+        batch_size=batch_size,
+    )
+    event_ids = list(
+        Event.objects.filter(name__startswith=f'{USERNAME_PREFIX}event-').order_by('pk').values_list('pk', flat=True)
+    )
+
+    ticket_ids = [f'bench{i:08x}' for i in range(bookings)]
+    Booking.objects.bulk_create(
+        [
+            Booking(
+                user_id=rng.choice(attendee_ids),
+                event_id=event_ids[i % events],
+                ticket_id=ticket_id,
+                status=rng.choice(BOOKING_STATUSES),
+            )
+            for i, ticket_id in enumerate(ticket_ids)
+        ],
+        batch_size=batch_size,
+    )
+    booking_ids = list(Booking.objects.filter(ticket_id__in=ticket_ids).order_by('pk').values_list('pk', flat=True))
+
+    return SeedData(organizer_ids, attendee_ids, event_ids, booking_ids, ticket_ids)
@@ -0,0 +1,9 @@
+"""URLconf used while benchmarking: the site plus the unrouted dev-only views."""
+from django.urls import include, path
+
+from core import views
+
+urlpatterns = [
+    path('bench/fake-payment/<int:event_id>/', views.fake_payment, name='bench_fake_payment'),
+    path('', include('event_system.urls')),
+]
@@ -0,0 +1,155 @@
+"""Bulk event import and complimentary ticket issuance.
+
+Rows are read lazily from CSV or JSON and written with ``bulk_create`` in
+chunks. Ticket IDs come from ``core.ticket_ids``, which never repeats, so
+no row needs its own uniqueness check. QR codes for the new tickets are pre-rendered into
+the shared disk cache across a process pool.
+"""
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from . import response_cache
+from .checkin import REFUSED_STATUSES
+from .forms import EventForm
+from .models import Booking, DeliveryJob, Event, Profile
+from .roles import PARTICIPANT, forget_roles
+from .qr import render_qr_png
+from .reservations import sell_seats
+from .search import index_events
+from .ticket_ids import new_ticket_ids
+from .tokens import make_ticket_token
+
+
+class BulkImportError(Exception):
+    """Raised with every rejected row when an import is refused."""
+
+
+def read_rows(path):
+    """Yield dicts from a ``.json`` file (a list, or ``{"rows": [...]}``) or a CSV with a header."""
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as fh:
+            data = json.load(fh)
+        yield from data.get('rows', []) if isinstance(data, dict) else data
+        return
+    with open(path, newline='', encoding='utf-8-sig') as fh:
+        yield from csv.DictReader(fh)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_events(rows, organizer, chunk_size=1000):
+    """Validate every row with ``EventForm`` and create them all, or raise ``BulkImportError``.
+
+    Returns the number of events created.
+    """
+    events, errors = [], []
+    for line, row in enumerate(rows, start=1):
+        form = EventForm(data=row)
+        if not form.is_valid():
+            errors.append(f"row {line}: {form.errors.as_json()}")
+            continue
+        event = form.save(commit=False)
+        event.organizer = organizer
+        events.append(event)
+    if errors:
+        raise BulkImportError(errors)
+
+    with transaction.atomic():
+        Event.objects.bulk_create(events, batch_size=chunk_size)
+        # bulk_create skips post_save, so index the new events and invalidate
+        # the cached listings here.
+        index_events(event.pk for event in events)
+    response_cache.bump_event_list()
+    return len(events)
+
+
+def _attendee_users(rows):
+    """Map each row's email to a User, creating missing users and profiles in bulk."""
+    emails = {row['email'].strip().lower(): row for row in rows if (row.get('email') or '').strip()}
+    users = {}
+    # Stored addresses keep whatever case they were typed in; match them case-insensitively.
+    matches = User.objects.annotate(email_key=Lower('email'), username_key=Lower('username')).filter(
+        Q(email_key__in=emails) | Q(username_key__in=emails),
+    )
+    for user in matches:
+        users[(user.email or user.username).lower()] = user
+        users.setdefault(user.username.lower(), user)
+
+    new_users = [
+        User(username=email[:150], email=email, first_name=(row.get('name') or '')[:150])
+        for email, row in emails.items() if email not in users
+    ]
+    for user in new_users:
+        user.set_unusable_password()
+    if new_users:
+        # Reload to get primary keys on every backend; post_save (and its profile) doesn't fire.
+        User.objects.bulk_create(new_users)
+        created = list(User.objects.filter(username__in=[u.username for u in new_users]))
+        Profile.objects.bulk_create([Profile(user=user, role=PARTICIPANT) for user in created])
+        forget_roles(user.pk for user in created)
+        users.update((user.email, user) for user in created)
+    return [users[email] for email in emails]
+
+
+def issue_tickets(event, rows, chunk_size=2000, email=False, site_url=''):
+    """Issue one CONFIRMED ticket per attendee row to ``event``. Yields progress per chunk.
+
+    Rows need an ``email`` (and may have a ``name``). Attendees who already
+    hold a ticket for the event are skipped, so re-running after a failure
+    only issues what is missing. Each chunk commits on its own and takes its
+    seats in one conditional UPDATE; ``SoldOut`` stops the run. Yields
+    ``(issued, skipped, qr_payloads)`` per chunk.
+    """
+    for chunk in chunked(rows, chunk_size):
+        with transaction.atomic():
+            users = _attendee_users(chunk)
+            ticketed = set(
+                Booking.objects.filter(event=event, user__in=users)
+                .exclude(status__in=REFUSED_STATUSES)
+                .values_list('user_id', flat=True)
+            )
+            attendees = list({user.pk: user for user in users if user.pk not in ticketed}.values())
+            bookings = []
+            if attendees:
+                sell_seats(event, len(attendees))
+                bookings = [
+                    Booking(user=user, event=event, status='CONFIRMED', ticket_id=ticket_id)
+                    for user, ticket_id in zip(attendees, new_ticket_ids(len(attendees)))
+                ]
+                Booking.objects.bulk_create(bookings, batch_size=chunk_size)
+
+                if email:
+                    ticket_ids = [booking.ticket_id for booking in bookings]
+                    DeliveryJob.objects.bulk_create([
+                        DeliveryJob(booking_id=pk, kind='TICKET_EMAIL', site_url=site_url)
+                        for pk in Booking.objects.filter(ticket_id__in=ticket_ids).values_list('pk', flat=True)
+                    ])
+
+        # Yield only once the chunk has committed, never from inside the transaction.
+        yield len(bookings), len(chunk) - len(bookings), [make_ticket_token(b) for b in bookings]
+
+
+def _render_qr_chunk(payloads):
+    for payload in payloads:
+        render_qr_png(payload)
+    return len(payloads)
+
+
+def prerender_qr_codes(payloads, workers=4, chunk_size=500):
+    """Render QR PNGs into the disk cache across ``workers`` processes. Returns the count."""
+    chunks = list(chunked(payloads, chunk_size))
+    if workers <= 1 or len(chunks) <= 1:
+        return sum(map(_render_qr_chunk, chunks))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(_render_qr_chunk, chunks))
@@ -0,0 +1,139 @@
+"""Set-based gate check-in.
+
+A batch of scans costs one locking SELECT, one status UPDATE and one
+``bulk_create`` of ``CheckinLog`` rows, however many tickets it carries.
+Admitted scans are pushed to live dashboards (``core.live``) on commit.
+"""
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_datetime
+
+from .live import hub
+from .models import Booking, CheckinLog, Event
+from .ticket_ids import is_valid_ticket_id, normalize_ticket_id
+from .tokens import InvalidTicketToken, is_ticket_token, verify_ticket_token
+
+CHECKED_IN_STATUSES = ('ATTENDED', 'CHECKED_IN')
+REFUSED_STATUSES = ('CANCELLED', 'Cancelled')
+
+ADMITTED = 'admitted'
+ALREADY_IN = 'already_in'
+CANCELLED = 'cancelled'
+UNKNOWN = 'unknown'
+INVALID = 'invalid'
+WRONG_EVENT = 'wrong_event'
+
+# Who is scanning and for which events; ``event_ids`` None means any event (staff).
+Scanner = namedtuple('Scanner', 'user_id device_id event_ids')
+
+
+def resolve_scanned_ticket(payload):
+    """Map a scanned QR payload (signed token or bare ticket ID) to a ticket ID.
+
+    Returns ``None`` for a token that fails verification or a ticket ID with
+    a wrong check character, so neither reaches the database.
+    """
+    if not is_ticket_token(payload):
+        canonical = normalize_ticket_id(payload)
+        if canonical is None:
+            return payload  # legacy ID without a check character
+        return canonical if is_valid_ticket_id(canonical) else None
+    try:
+        ticket_id, _ = verify_ticket_token(payload)
+    except InvalidTicketToken:
+        return None
+    return ticket_id
+
+
+def apply_scans(scans, scanned_by_id, event_ids=None):
+    """Check in every scanned ticket and return one result per scan, in order.
+
+    ``scans`` is a list of dicts with ``ticket_id`` (a ticket ID or signed
+    ticket token) and optional ``scanned_at`` (ISO 8601) and ``device_id``. A
+    ticket scanned twice in the same batch is admitted once and reported
+    ``already_in`` afterwards. With ``event_ids`` (a gate device's event, or
+    the events a scanning organiser runs), tickets for any other event are
+    refused as ``wrong_event``.
+    """
+    resolved = [resolve_scanned_ticket(scan['ticket_id']) for scan in scans]
+    ticket_ids = {ticket_id for ticket_id in resolved if ticket_id is not None}
+
+    with transaction.atomic():
+        bookings = {
+            ticket_id: (pk, status, booking_event_id)
+            for pk, ticket_id, status, booking_event_id in Booking.objects.select_for_update()
+            .filter(ticket_id__in=ticket_ids)
+            .values_list('pk', 'ticket_id', 'status', 'event_id')
+        }
+
+        results, logs, admitted, checkins = [], [], set(), []
+        for scan, ticket_id in zip(scans, resolved):
+            if ticket_id is None:
+                result = INVALID
+            elif ticket_id not in bookings:
+                result = UNKNOWN
+            else:
+                pk, status, booking_event_id = bookings[ticket_id]
+                if event_ids is not None and booking_event_id not in event_ids:
+                    result = WRONG_EVENT
+                elif status in REFUSED_STATUSES:
+                    result = CANCELLED
+                elif status in CHECKED_IN_STATUSES or pk in admitted:
+                    result = ALREADY_IN
+                else:
+                    result = ADMITTED
+                    admitted.add(pk)
+                    log = CheckinLog(
+                        booking_id=pk,
+                        scanned_by_id=scanned_by_id,
+                        scanned_at=parse_datetime(scan.get('scanned_at') or ''),
+                        device_id=scan.get('device_id', '')[:64],
+                    )
+                    logs.append(log)
+                    checkins.append((booking_event_id, ticket_id, log))
+            results.append({'ticket_id': ticket_id or scan['ticket_id'], 'result': result})
+
+        if admitted:
+            Booking.objects.filter(pk__in=admitted).update(status='ATTENDED')
+            CheckinLog.objects.bulk_create(logs)
+            transaction.on_commit(lambda: publish_checkins(checkins))
+
+    return results
+
+
+def checkin_counters(event_ids):
+    """``{event_id: {'checked_in': n, 'remaining': capacity - n}}`` in one grouped query."""
+    rows = (
+        Event.objects.filter(pk__in=event_ids)
+        .annotate(checked_in=Count('booking', filter=Q(booking__status__in=CHECKED_IN_STATUSES)))
+        .values_list('pk', 'capacity', 'checked_in')
+    )
+    return {
+        pk: {'checked_in': checked_in, 'remaining': max(capacity - checked_in, 0)}
+        for pk, capacity, checked_in in rows
+    }
+
+
+def publish_checkins(checkins):
+    """Push ``(event_id, ticket_id, CheckinLog)`` triples to dashboards watching those events.
+
+    Counters are read once per event per call, and only for events someone
+    is watching.
+    """
+    by_event = defaultdict(list)
+    for event_id, ticket_id, log in checkins:
+        if hub.has_subscribers(event_id):
+            by_event[event_id].append({
+                'ticket_id': ticket_id,
+                'device_id': log.device_id,
+                'scanned_at': log.scanned_at,
+                'checkin_time': log.checkin_time,
+            })
+    if not by_event:
+        return
+
+    counters = checkin_counters(by_event)
+    for event_id, scans in by_event.items():
+        hub.publish(event_id, {'checkins': scans, 'counters': counters.get(event_id)})
@@ -0,0 +1,28 @@
+"""Per-event sales and attendance figures for the organiser dashboard."""
+from django.db.models import Count, Q, Sum, Value, DecimalField
+from django.db.models.functions import Coalesce
+
+from .checkin import CHECKED_IN_STATUSES
+from .models import Event
+
+
+def organizer_event_summaries(organizer):
+    """One grouped query: every event of ``organizer`` with its booking figures.
+
+    Sold and held seats come from the counters kept by ``core.reservations``;
+    pending, checked-in and revenue are aggregated over bookings and payments.
+    """
+    return (
+        Event.objects.filter(organizer=organizer)
+        .annotate(
+            pending=Count('booking', filter=Q(booking__status='PENDING'), distinct=True),
+            checked_in=Count('booking', filter=Q(booking__status__in=CHECKED_IN_STATUSES), distinct=True),
+            revenue=Coalesce(
+                Sum('booking__payment__amount', filter=Q(booking__payment__status='SUCCESS')),
+                Value(0),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+        .only('name', 'date', 'capacity', 'tickets_sold', 'tickets_held')
+        .order_by('-date', '-id')
+    )
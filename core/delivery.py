@@ -0,0 +1,195 @@
+"""Ticket delivery outbox.
+
+Booking views only insert a ``DeliveryJob`` row inside the booking
+transaction. ``manage.py run_ticket_worker`` claims due jobs, renders the PDF
+and sends the mail, retrying failures with exponential backoff.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .mail import send_message
+from .models import Booking, DeliveryJob
+from .screenshots import render_thumbnail
+from .tickets import render_ticket_pdf, ticket_data
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue_ticket_delivery(booking, kind, site_url=''):
+    """Queue delivery of ``booking``'s ticket.
+
+    Call this inside the transaction that creates the booking so the job is
+    committed (or rolled back) together with it.
+    """
+    return DeliveryJob.objects.create(booking=booking, kind=kind, site_url=site_url)
+
+
+def _due_jobs(now):
+    # RUNNING jobs whose lease has expired belong to a worker that died.
+    return DeliveryJob.objects.filter(
+        Q(status='PENDING') | Q(status='RUNNING'),
+        run_after__lte=now,
+    )
+
+
+def claim_jobs(limit):
+    """Atomically claim up to ``limit`` due jobs and return ``(token, job_ids)``.
+
+    Claiming is a single conditional UPDATE, so several workers can poll the
+    same table without handing out a job twice. Pass ``token`` on to
+    ``deliver_job``: once a lease runs out and another worker claims the
+    job, the old token no longer matches.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    candidates = list(
+        _due_jobs(now).order_by('run_after').values_list('id', flat=True)[:limit]
+    )
+    if not candidates:
+        return token, []
+
+    lease = now + timedelta(seconds=_setting('TICKET_DELIVERY_LEASE_SECONDS', 300))
+    _due_jobs(now).filter(id__in=candidates).update(
+        status='RUNNING',
+        claimed_by=token,
+        run_after=lease,
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    )
+    return token, list(DeliveryJob.objects.filter(id__in=candidates, claimed_by=token).values_list('id', flat=True))
+
+
+def retry_delay(attempts):
+    base = _setting('TICKET_DELIVERY_BACKOFF_SECONDS', 30)
+    cap = _setting('TICKET_DELIVERY_BACKOFF_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(cap, base * 2 ** max(attempts - 1, 0)))
+
+
+def _send_ticket_email(job):
+    booking = job.booking
+    user = booking.user
+    if not user.email:
+        return
+    qr_url = job.site_url.rstrip('/') + reverse('download_qr_code', args=[booking.pk])
+
+    send_message(EmailMessage(
+        subject=f"🎫 Your Ticket for {booking.event.name}",
+        body=f"""Hi {user.username},
+
+Your ticket booking was successful!
+
+Event: {booking.event.name}
+Ticket ID: {booking.ticket_id}
+Status: {booking.status}
+
+QR Code: {qr_url}
+
+Thank you for using QrEntry!""",
+        from_email=settings.EMAIL_HOST_USER,
+        to=[user.email],
+    ))
+
+
+def _send_ticket_pdf(job):
+    booking = job.booking
+    user = booking.user
+    if not user.email:
+        return
+
+    email = EmailMessage(
+        subject=f"🎫 Your Ticket for {booking.event.name}",
+        body=f"""Hi {user.username},
+
+Your ticket booking was successful!
+
+Please find your ticket attached as a PDF.
+
+Event: {booking.event.name}
+Ticket ID: {booking.ticket_id}
+Status: {booking.status}
+
+Show the QR code at the event entry.
+
+Thank you for using QrEntry!""",
+        from_email=settings.EMAIL_HOST_USER,
+        to=[user.email],
+    )
+    email.attach(f"{booking.ticket_id}_ticket.pdf", render_ticket_pdf(ticket_data(booking)), "application/pdf")
+    send_message(email)
+
+
+def _render_screenshot_thumb(job):
+    screenshot = job.booking.payment_screenshot.name
+    if not screenshot:
+        return
+    thumb = render_thumbnail(screenshot)
+    # Skip the write if a newer screenshot replaced this one meanwhile.
+    Booking.objects.filter(pk=job.booking_id, payment_screenshot=screenshot).update(payment_screenshot_thumb=thumb)
+
+
+SENDERS = {
+    'TICKET_EMAIL': _send_ticket_email,
+    'TICKET_PDF': _send_ticket_pdf,
+    'SCREENSHOT_THUMB': _render_screenshot_thumb,
+}
+
+
+def deliver_job(job_id, claimed_by):
+    """Render and send one job claimed under ``claimed_by``. Returns True when it was delivered."""
+    close_old_connections()
+    try:
+        job = (
+            DeliveryJob.objects.select_related('booking__event', 'booking__user')
+            .filter(pk=job_id, claimed_by=claimed_by).first()
+        )
+        if job is None:
+            logger.warning("Ticket delivery %s was reclaimed before it started; skipping", job_id)
+            return False
+        try:
+            SENDERS[job.kind](job)
+        except Exception as exc:
+            _record_failure(job, exc)
+            return False
+
+        # The claim check leaves a job whose lease ran out to the worker that reclaimed it.
+        if not DeliveryJob.objects.filter(pk=job.pk, claimed_by=claimed_by).update(
+            status='SENT', claimed_by='', last_error='', updated_at=timezone.now(),
+        ):
+            _lost_claim(job)
+            return False
+        return True
+    finally:
+        close_old_connections()
+
+
+def _lost_claim(job):
+    logger.warning("Ticket delivery %s outlived its lease and was reclaimed; leaving it to the new owner", job.pk)
+
+
+def _record_failure(job, exc):
+    now = timezone.now()
+    max_attempts = _setting('TICKET_DELIVERY_MAX_ATTEMPTS', 5)
+    if job.attempts >= max_attempts:
+        status, run_after = 'FAILED', now
+        logger.error("Ticket delivery %s failed permanently: %s", job.pk, exc)
+    else:
+        status, run_after = 'PENDING', now + retry_delay(job.attempts)
+        logger.warning("Ticket delivery %s failed (attempt %s), retrying at %s: %s",
+                       job.pk, job.attempts, run_after, exc)
+
+    if not DeliveryJob.objects.filter(pk=job.pk, claimed_by=job.claimed_by).update(
+        status=status, run_after=run_after, claimed_by='', last_error=repr(exc), updated_at=now,
+    ):
+        _lost_claim(job)
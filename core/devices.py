@@ -0,0 +1,149 @@
+"""Device tokens for gate scanners.
+
+Scanners send ``Authorization: Device <token>`` instead of carrying a
+browser session. A token is ``<event_id>.<user_id>.<device_id>.<expiry>.<sig>``
+where the signature is a truncated HMAC-SHA256 under a key derived from
+``SECRET_KEY``. Checking one costs an HMAC and a set lookup against the
+revocation list: no session row, no ``User`` fetch.
+``DeviceTokenMiddleware`` exempts these requests from CSRF checks, which
+only matter for cookie-authenticated browsers.
+
+Tokens are issued by an organiser for one of their events (``manage.py
+issue_device_token``). They are bound to that event and expire with its
+ticket tokens (``core.tokens.token_expiry``). ``revoke_device_token`` puts
+a token on the deny list until then, e.g. for a lost device. The list lives
+in ``RevokedDeviceToken`` so every worker sees it; each process rereads the
+unexpired signatures at most every ``DEVICE_REVOCATION_REFRESH_SECONDS``,
+and a revocation takes effect in the revoking process at once.
+"""
+import base64
+import functools
+import hmac
+import re
+import time
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from django.utils.deprecation import MiddlewareMixin
+
+from .models import RevokedDeviceToken
+from .tokens import token_expiry
+
+SIGNATURE_BYTES = 16
+AUTH_SCHEME = 'Device'
+DEVICE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+Device = namedtuple('Device', 'event_id user_id device_id expires signature')
+
+
+class InvalidDeviceToken(Exception):
+    """Raised when a device token is malformed, forged, expired or revoked."""
+
+
+@functools.lru_cache(maxsize=4)
+def _key(secret_key):
+    return salted_hmac('core.devices.device-key', '', secret=secret_key, algorithm='sha256').digest()
+
+
+def _signature(message):
+    digest = hmac.new(_key(settings.SECRET_KEY), message.encode('utf-8'), 'sha256').digest()
+    return base64.urlsafe_b64encode(digest[:SIGNATURE_BYTES]).rstrip(b'=').decode('ascii')
+
+
+# (loaded at, revoked signatures) for this process.
+_revoked = (float('-inf'), frozenset())
+
+
+def _refresh_due():
+    return time.monotonic() - _revoked[0] >= getattr(settings, 'DEVICE_REVOCATION_REFRESH_SECONDS', 5)
+
+
+def _unexpired_revocations():
+    return RevokedDeviceToken.objects.filter(expires_at__gt=timezone.now()).values_list('signature', flat=True)
+
+
+def _revoked_signatures():
+    global _revoked
+    if _refresh_due():
+        _revoked = (time.monotonic(), frozenset(_unexpired_revocations()))
+    return _revoked[1]
+
+
+async def _arevoked_signatures():
+    global _revoked
+    if _refresh_due():
+        _revoked = (time.monotonic(), frozenset([signature async for signature in _unexpired_revocations()]))
+    return _revoked[1]
+
+
+def issue_device_token(event, user, device_id):
+    if not DEVICE_ID_RE.match(device_id):
+        raise ValueError('device_id must be 1-64 letters, digits, "-" or "_"')
+    expires = int(token_expiry(event).timestamp())
+    message = f'{event.pk}.{user.pk}.{device_id}.{expires:x}'
+    return f'{message}.{_signature(message)}'
+
+
+def _parse(token):
+    try:
+        message, signature = token.rsplit('.', 1)
+        event_id, user_id, device_id, expires = message.split('.')
+        device = Device(int(event_id), int(user_id), device_id, int(expires, 16), signature)
+    except ValueError:
+        raise InvalidDeviceToken('Malformed device token')
+    if not hmac.compare_digest(signature, _signature(message)):
+        raise InvalidDeviceToken('Bad device token signature')
+    if device.expires < timezone.now().timestamp():
+        raise InvalidDeviceToken('Device token expired')
+    return device
+
+
+def verify_device_token(token):
+    """Return the ``Device`` a token was issued to, or raise ``InvalidDeviceToken``."""
+    device = _parse(token)
+    if device.signature in _revoked_signatures():
+        raise InvalidDeviceToken('Device token revoked')
+    return device
+
+
+async def averify_device_token(token):
+    device = _parse(token)
+    if device.signature in await _arevoked_signatures():
+        raise InvalidDeviceToken('Device token revoked')
+    return device
+
+
+def revoke_device_token(token):
+    global _revoked
+    device = _parse(token)
+    RevokedDeviceToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    RevokedDeviceToken.objects.get_or_create(signature=device.signature, defaults={
+        'event_id': device.event_id,
+        'device_id': device.device_id,
+        'expires_at': datetime.fromtimestamp(device.expires, tz=dt_timezone.utc),
+    })
+    _revoked = (float('-inf'), frozenset())  # reload on the next check
+    return device
+
+
+def device_token_from_request(request):
+    """The token of an ``Authorization: Device <token>`` header, or None."""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme != AUTH_SCHEME:
+        return None
+    return token.strip() or None
+
+
+class DeviceTokenMiddleware(MiddlewareMixin):
+    """Skip CSRF checks for requests that authenticate with a device token.
+
+    CSRF defends cookie-based sessions; a token sent in a header can't be
+    attached by another site. Must run before ``CsrfViewMiddleware``.
+    """
+
+    def process_request(self, request):
+        if device_token_from_request(request) is not None:
+            request._dont_enforce_csrf_checks = True
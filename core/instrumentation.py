@@ -0,0 +1,188 @@
+"""Per-request timing: wall time, database queries and tagged code sections.
+
+``RequestMetricsMiddleware`` opens a metrics record for each request and
+closes it with a ``Server-Timing`` header, one JSON log line on the
+``core.instrumentation`` logger (at INFO, which settings only let through
+with ``REQUEST_LOG_LEVEL=INFO``) and an update to the per-view histograms
+served by ``metrics_view`` in Prometheus text format. Code marks expensive
+sections with ``timed('qr')``; outside a request it costs nothing.
+
+Queries are counted by an execute wrapper installed on every connection as
+it opens, so ORM calls that async views run in worker threads are counted
+too (the metrics record travels with the request's context). Histograms are
+per process.
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.sections = defaultdict(float)
+
+
+@contextmanager
+def timed(section):
+    """Add the time spent in the block to ``section`` of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.sections[section] += time.perf_counter() - started
+
+
+def _count_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_seconds += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+class Histograms:
+    """Cumulative Prometheus-style histograms and counters keyed by view name."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._queries = defaultdict(int)
+        self._db_seconds = defaultdict(float)
+        self._sections = defaultdict(float)
+
+    def observe(self, view, seconds, metrics):
+        with self._lock:
+            # [cumulative bucket counts, sum, count]
+            entry = self._durations.setdefault(view, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    entry[0][i] += 1
+            entry[1] += seconds
+            entry[2] += 1
+            self._queries[view] += metrics.queries
+            self._db_seconds[view] += metrics.db_seconds
+            for section, spent in metrics.sections.items():
+                self._sections[view, section] += spent
+
+    def render(self):
+        lines = [
+            '# HELP qrentry_request_duration_seconds Request wall time by view.',
+            '# TYPE qrentry_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            for view, (counts, total, count) in sorted(self._durations.items()):
+                for bound, cumulative in zip(self.buckets, counts):
+                    lines.append(f'qrentry_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+                lines.append(f'qrentry_request_duration_seconds_bucket{{view="{view}",le="+Inf"}} {count}')
+                lines.append(f'qrentry_request_duration_seconds_sum{{view="{view}"}} {total:.6f}')
+                lines.append(f'qrentry_request_duration_seconds_count{{view="{view}"}} {count}')
+
+            lines += ['# HELP qrentry_db_queries_total Database queries by view.',
+                      '# TYPE qrentry_db_queries_total counter']
+            lines += [f'qrentry_db_queries_total{{view="{v}"}} {n}' for v, n in sorted(self._queries.items())]
+            lines += ['# HELP qrentry_db_seconds_total Time spent in database queries by view.',
+                      '# TYPE qrentry_db_seconds_total counter']
+            lines += [f'qrentry_db_seconds_total{{view="{v}"}} {s:.6f}' for v, s in sorted(self._db_seconds.items())]
+            lines += ['# HELP qrentry_section_seconds_total Time spent in tagged sections by view.',
+                      '# TYPE qrentry_section_seconds_total counter']
+            lines += [
+                f'qrentry_section_seconds_total{{view="{v}",section="{section}"}} {s:.6f}'
+                for (v, section), s in sorted(self._sections.items())
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+histograms = Histograms()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return (match and match.view_name) or 'unmatched'
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        # Streaming responses are measured up to the first byte.
+        total = time.perf_counter() - metrics.started
+        view = _view_name(request)
+        histograms.observe(view, total, metrics)
+
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            timings = [f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.queries} queries"']
+            timings += [f'{name};dur={spent * 1000:.1f}' for name, spent in metrics.sections.items()]
+            timings.append(f'total;dur={total * 1000:.1f}')
+            response['Server-Timing'] = ', '.join(timings)
+
+        logger.info(json.dumps({
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'ms': round(total * 1000, 1),
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_seconds * 1000, 1),
+            **{f'{name}_ms': round(spent * 1000, 1) for name, spent in metrics.sections.items()},
+        }))
+        return response
@@ -0,0 +1,102 @@
+"""In-process broadcast hub for live check-in dashboards.
+
+Check-in code publishes once per committed batch and every dashboard
+subscribed to that event receives the message from its own queue, so a
+hundred open dashboards add no database work and nothing polls. The hub
+only sees scans handled by this process; run the scanners and dashboards
+for an event against the same ASGI worker.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+def _offer(queue, message):
+    # A dashboard that stops reading loses its oldest messages, not the newest.
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+class CheckinHub:
+    """Fan-out of messages per event to asyncio queues on any event loop.
+
+    ``publish`` is safe to call from worker threads, which is where the
+    check-in transaction runs.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_id):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self._lock:
+            self._subscribers[event_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, event_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(event_id)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[event_id]
+
+    def has_subscribers(self, event_id):
+        with self._lock:
+            return bool(self._subscribers.get(event_id))
+
+    def publish(self, event_id, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:
+                # The subscriber's loop has shut down; it unsubscribes on its way out.
+                pass
+
+
+hub = CheckinHub(getattr(settings, 'CHECKIN_FEED_QUEUE_SIZE', 100))
+
+
+def sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'
+
+
+def event_snapshot(initial):
+    """One-shot SSE body for servers that can't hold a stream open (WSGI).
+
+    The browser's ``EventSource`` reconnects after ``CHECKIN_FEED_RETRY_MS``,
+    so the dashboard degrades to polling the counters.
+    """
+    retry = getattr(settings, 'CHECKIN_FEED_RETRY_MS', 5000)
+    return f'retry: {retry}\n\n' + sse('counters', initial)
+
+
+async def event_stream(event_id, initial):
+    """Server-Sent Events for ``event_id``: ``initial`` counters, then each published message.
+
+    A comment line goes out every ``CHECKIN_FEED_KEEPALIVE_SECONDS`` of quiet
+    so proxies keep the connection open.
+    """
+    keepalive = getattr(settings, 'CHECKIN_FEED_KEEPALIVE_SECONDS', 15)
+    subscriber = hub.subscribe(event_id)
+    _, queue = subscriber
+    try:
+        yield sse('counters', initial)
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), keepalive)
+            except TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield sse('checkin', message)
+    finally:
+        hub.unsubscribe(event_id, subscriber)
@@ -0,0 +1,187 @@
+"""Pooled, rate-limited outgoing mail.
+
+Django's ``send_mail`` opens, authenticates and closes an SMTP connection
+for every message. Here authenticated connections are kept in a small
+pool and reused, messages go out in batches through
+``connection.send_messages``, and a token bucket per ``EMAIL_HOST`` keeps
+us under the provider's sending rate.
+"""
+import logging
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+from .checkin import REFUSED_STATUSES
+from .instrumentation import timed
+from .models import Booking
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` messages per second with bursts of ``burst``."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, count=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                take = min(count, self.burst)
+                if self._tokens >= take:
+                    self._tokens -= take
+                    count -= take
+                    if not count:
+                        return
+                    continue
+                wait = (take - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ConnectionPool:
+    """Reusable open mail backend connections.
+
+    A connection idle for longer than ``max_idle`` seconds is closed rather
+    than reused, since providers drop idle SMTP sessions.
+    """
+
+    def __init__(self, size, max_idle, **connection_kwargs):
+        self.size = size
+        self.max_idle = max_idle
+        self.connection_kwargs = connection_kwargs
+        self._idle = []
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    @property
+    def provider(self):
+        return self.connection_kwargs.get('host') or getattr(settings, 'EMAIL_HOST', '')
+
+    def _checkout(self):
+        with self._lock:
+            while self._idle:
+                conn, released_at = self._idle.pop()
+                if time.monotonic() - released_at <= self.max_idle:
+                    return conn
+                conn.close()
+            self.opened += 1
+        conn = get_connection(**self.connection_kwargs)
+        conn.open()
+        return conn
+
+    def _checkin(self, conn):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        conn = self._checkout()
+        try:
+            yield conn
+        except Exception:
+            conn.close()
+            raise
+        self._checkin(conn)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+
+_pool = None
+_limiters = {}
+_setup_lock = threading.Lock()
+
+
+def mail_pool():
+    global _pool
+    with _setup_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                size=getattr(settings, 'MAIL_POOL_SIZE', 4),
+                max_idle=getattr(settings, 'MAIL_CONNECTION_MAX_IDLE', 60),
+            )
+        return _pool
+
+
+def rate_limiter(provider=None):
+    """Token bucket for ``provider`` (defaults to ``EMAIL_HOST``), or None if unlimited."""
+    provider = provider or getattr(settings, 'EMAIL_HOST', '')
+    limits = getattr(settings, 'MAIL_RATE_LIMITS', {})
+    rate = limits.get(provider, limits.get('default'))
+    if not rate:
+        return None
+    with _setup_lock:
+        if provider not in _limiters:
+            _limiters[provider] = RateLimiter(rate)
+        return _limiters[provider]
+
+
+def send_messages(messages, batch_size=None, pool=None, limiter=None):
+    """Send ``messages`` over pooled connections in batches. Returns the number sent.
+
+    If the server drops the connection partway through a batch, the messages
+    it had not yet accepted are retried once on a fresh connection. Messages
+    are handed to the connection one at a time so that point is known and
+    nobody is mailed twice (except perhaps the one in flight at the drop).
+    """
+    pool = pool or mail_pool()
+    limiter = limiter or rate_limiter(pool.provider)
+    batch_size = batch_size or getattr(settings, 'MAIL_BATCH_SIZE', 50)
+    messages = iter(messages)
+
+    sent = 0
+    while batch := list(islice(messages, batch_size)):
+        if limiter:
+            limiter.acquire(len(batch))
+        done = 0
+        for attempt in (1, 2):
+            try:
+                with timed('smtp'), pool.connection() as conn:
+                    for message in batch[done:]:
+                        sent += conn.send_messages([message]) or 0
+                        done += 1
+                break
+            except smtplib.SMTPServerDisconnected:
+                if attempt == 2:
+                    raise
+                logger.warning("SMTP connection dropped, retrying %s of a batch of %s", len(batch) - done, len(batch))
+    return sent
+
+
+def send_message(message):
+    return send_messages([message], batch_size=1)
+
+
+def email_event_attendees(event, subject, body, from_email=None):
+    """Email every attendee of ``event`` with a non-cancelled booking. Returns the number sent."""
+    recipients = (
+        Booking.objects.filter(event=event)
+        .exclude(status__in=REFUSED_STATUSES)
+        .exclude(user__email='')
+        .values_list('user__email', flat=True)
+        .distinct()
+        .iterator(chunk_size=1000)
+    )
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    return send_messages(
+        EmailMessage(subject=subject, body=body, from_email=from_email, to=[email])
+        for email in recipients
+    )
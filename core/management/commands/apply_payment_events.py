@@ -0,0 +1,27 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.payments import apply_payment_events
+
+
+class Command(BaseCommand):
+    help = "Fold pending payment webhook events into Payment and Booking rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling the inbox instead of draining it once.")
+        parser.add_argument('--interval', type=float,
+                            default=getattr(settings, 'PAYMENT_EVENTS_POLL_SECONDS', 1.0))
+
+    def handle(self, *args, **options):
+        while True:
+            applied = apply_payment_events(options['batch_size'])
+            if applied:
+                self.stdout.write(f"Applied {applied} payment events")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
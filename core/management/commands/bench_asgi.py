@@ -0,0 +1,135 @@
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from itertools import islice, cycle
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+
+from core.models import Booking, Event
+
+
+def _host():
+    return next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+
+
+def wsgi_get(app, path, host):
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': host, 'SERVER_PORT': '80', 'HTTP_HOST': host, 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr, 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    statuses = []
+    body = app(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        b''.join(body)
+    finally:
+        getattr(body, 'close', lambda: None)()
+    return int(statuses[0][:3])
+
+
+async def asgi_get(app, path, host):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+        'query_string': query.encode(), 'headers': [(b'host', host.encode())],
+        'client': ('127.0.0.1', 0), 'server': (host, 80),
+    }
+    body_sent = False
+    status = None
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client never disconnects; Django cancels this wait when it is done.
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+class Command(BaseCommand):
+    help = ("Drive the hot JSON/QR endpoints through Django's ASGI and WSGI handlers "
+            "in-process and compare throughput and latency.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=200,
+                            help="In-flight requests on the ASGI event loop.")
+        parser.add_argument('--threads', type=int, default=8,
+                            help="WSGI worker threads (like gunicorn --threads).")
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Path to request; repeatable. Defaults to the event and QR APIs.")
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or self._default_paths()
+        workload = list(islice(cycle(paths), options['requests']))
+        host = _host()
+
+        wsgi_app = get_wsgi_application()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(lambda p: wsgi_get(wsgi_app, p, host), paths))  # warm caches
+            self._report(f"WSGI ({options['threads']} threads)",
+                         self._run_wsgi(pool, wsgi_app, workload, host))
+
+        asgi_app = get_asgi_application()
+        self._report(f"ASGI ({options['concurrency']} in flight)",
+                     asyncio.run(self._run_asgi(asgi_app, workload, host, options['concurrency'])))
+
+    def _default_paths(self):
+        event_id = Event.objects.values_list('id', flat=True).first()
+        booking_id = Booking.objects.values_list('id', flat=True).first()
+        if event_id is None or booking_id is None:
+            raise CommandError("Need at least one event and booking; pass --path or seed data first.")
+        return ['/api/events/', f'/api/events/{event_id}/', f'/api/qr/{booking_id}/']
+
+    def _run_wsgi(self, pool, app, workload, host):
+        def timed(path):
+            started = time.perf_counter()
+            status = wsgi_get(app, path, host)
+            return status, time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = list(pool.map(timed, workload))
+        return results, time.perf_counter() - started
+
+    async def _run_asgi(self, app, workload, host, concurrency):
+        gate = asyncio.Semaphore(concurrency)
+
+        async def timed(path):
+            async with gate:
+                started = time.perf_counter()
+                status = await asgi_get(app, path, host)
+                return status, time.perf_counter() - started
+
+        for path in set(workload):
+            await asgi_get(app, path, host)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(timed(path) for path in workload))
+        return results, time.perf_counter() - started
+
+    def _report(self, label, outcome):
+        results, elapsed = outcome
+        latencies = sorted(latency * 1000 for _, latency in results)
+        errors = sum(1 for status, _ in results if status not in (200, 304))
+        p50, p95 = (statistics.quantiles(latencies, n=100)[i] for i in (49, 94))
+        self.stdout.write(
+            f"{label:<24} {len(results) / elapsed:8.1f} req/s  "
+            f"p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  max {latencies[-1]:7.1f} ms  errors {errors}"
+        )
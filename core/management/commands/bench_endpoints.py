@@ -0,0 +1,87 @@
+import json
+import os
+import platform
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment, teardown_databases,
+    teardown_test_environment,
+)
+
+from core.benchmarks import ENDPOINTS, compare, run_endpoint, seed
+
+
+class Command(BaseCommand):
+    help = ("Seed a throwaway test database and benchmark the hot views with concurrent "
+            "test clients. Reports throughput, p50/p95/p99 latency and queries per request.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=50)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--bookings', type=int, default=5000)
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint.")
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--endpoint', action='append', dest='endpoints', choices=sorted(ENDPOINTS),
+                            help="Endpoint to run; repeatable. Defaults to all.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--baseline', help="JSON file from an earlier run to compare against.")
+
+    def handle(self, *args, **options):
+        if min(options['events'], options['users'], options['bookings'], options['requests'], options['threads']) < 1:
+            raise CommandError("--events, --users, --bookings, --requests and --threads must be positive.")
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)['results']
+
+        if connection.vendor == 'sqlite':
+            # Shared-cache in-memory SQLite fails concurrent writers instead of waiting.
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                tempfile.gettempdir(), f'qrentry-bench-{os.getpid()}.sqlite3',
+            )
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(ROOT_URLCONF='core.benchmarks.urls'):
+                started = time.perf_counter()
+                data = seed(options['events'], options['users'], options['bookings'])
+                self.stdout.write(f"Seeded {options['events']} events, {options['users']} users, "
+                                  f"{options['bookings']} bookings in {time.perf_counter() - started:.1f}s")
+
+                results = {}
+                for name in options['endpoints'] or ENDPOINTS:
+                    results[name] = run_endpoint(name, data, options['requests'], options['threads'])
+                    self._report(name, results[name])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            run = {
+                'meta': {
+                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                    'python': platform.python_version(),
+                    'database': settings.DATABASES['default']['ENGINE'],
+                    **{key: options[key] for key in ('events', 'users', 'bookings', 'requests', 'threads')},
+                },
+                'results': results,
+            }
+            with open(options['output'], 'w') as fh:
+                json.dump(run, fh, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if baseline:
+            self.stdout.write("Change vs baseline (%):")
+            for name, change in compare(results, baseline).items():
+                self.stdout.write(f"  {name:<20} " + "  ".join(f"{k} {v:+.1f}" for k, v in change.items()))
+
+    def _report(self, name, stats):
+        self.stdout.write(
+            f"{name:<20} {stats['throughput_rps']:8.1f} req/s  p50 {stats['p50_ms']:7.1f}  "
+            f"p95 {stats['p95_ms']:7.1f}  p99 {stats['p99_ms']:7.1f} ms  "
+            f"queries {stats['mean_queries']:5.1f} (max {stats['max_queries']})  errors {stats['errors']}"
+        )
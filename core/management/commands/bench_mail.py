@@ -0,0 +1,50 @@
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+
+from core.mail import ConnectionPool, send_messages
+from core.testing_smtp import LocalSMTPServer
+
+
+class Command(BaseCommand):
+    help = ("Compare one-connection-per-mail sending with the pooled, batched "
+            "sender against a local stand-in SMTP server.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500)
+        parser.add_argument('--batch-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        count = options['count']
+
+        def messages():
+            return [
+                EmailMessage(subject=f'Ticket {i}', body='Benchmark', from_email='bench@localhost',
+                             to=[f'user{i}@example.com'])
+                for i in range(count)
+            ]
+
+        with LocalSMTPServer() as server:
+            kwargs = server.connection_kwargs()
+
+            batch = messages()
+            started = time.perf_counter()
+            for message in batch:
+                message.connection = get_connection(**kwargs)
+                message.send()
+            self._report('one connection per mail', count, time.perf_counter() - started, server)
+
+            server.connections = server.messages = 0
+            pool = ConnectionPool(size=1, max_idle=60, **kwargs)
+            started = time.perf_counter()
+            send_messages(messages(), batch_size=options['batch_size'], pool=pool)
+            elapsed = time.perf_counter() - started
+            pool.close_all()
+            self._report('pooled + batched', count, elapsed, server)
+
+    def _report(self, label, count, elapsed, server):
+        self.stdout.write(
+            f"{label:<24} {count / elapsed:8.1f} msgs/s "
+            f"({server.messages} delivered over {server.connections} connections)"
+        )
@@ -0,0 +1,76 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from core.models import Booking, Event
+from core.reservations import SoldOut, hold_seat, sell_seat
+
+
+class Command(BaseCommand):
+    help = ("Fire many parallel booking attempts at one throwaway event and "
+            "verify that capacity is never exceeded.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=5000)
+        parser.add_argument('--capacity', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=64)
+        parser.add_argument('--hold', action='store_true',
+                            help="Take time-limited holds instead of sold seats.")
+
+    def handle(self, *args, **options):
+        user, created_user = User.objects.get_or_create(username='bench-reservations')
+        event = Event.objects.create(
+            name='Reservation benchmark', date=timezone.now().date(), location='-',
+            description='-', capacity=options['capacity'], price=0, organizer=user,
+        )
+
+        def attempt(_):
+            close_old_connections()
+            try:
+                with transaction.atomic():
+                    hold_expires_at = hold_seat(event) if options['hold'] else None
+                    if not options['hold']:
+                        sell_seat(event)
+                    Booking.objects.create(
+                        user=user, event=event, status='PENDING',
+                        ticket_id=uuid.uuid4().hex, hold_expires_at=hold_expires_at,
+                    )
+                return 'booked'
+            except SoldOut:
+                return 'sold_out'
+            except Exception:
+                return 'error'
+            finally:
+                close_old_connections()
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                results = list(pool.map(attempt, range(options['attempts'])))
+            elapsed = time.perf_counter() - started
+
+            event.refresh_from_db()
+            bookings = Booking.objects.filter(event=event).count()
+            counted = event.tickets_sold + event.tickets_held
+            oversold = max(bookings - event.capacity, 0)
+
+            self.stdout.write(
+                f"{options['attempts']} attempts in {elapsed:.2f}s "
+                f"({options['attempts'] / elapsed:.0f}/s): "
+                f"{results.count('booked')} booked, {results.count('sold_out')} sold out, "
+                f"{results.count('error')} errors"
+            )
+            self.stdout.write(
+                f"capacity={event.capacity} bookings={bookings} counter={counted} oversold={oversold}"
+            )
+            if oversold or counted != bookings:
+                raise CommandError("Seat counter and bookings disagree")
+        finally:
+            event.delete()
+            if created_user:
+                user.delete()
@@ -0,0 +1,109 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.utils import timezone
+
+from core.benchmarks.runner import percentile
+from core.models import Event
+from core.search import index_events, search_events
+
+GENRES = ['jazz', 'rock', 'classical', 'comedy', 'theatre', 'poetry', 'film', 'startup', 'python',
+          'marathon', 'yoga', 'chess', 'food', 'wine', 'photography', 'robotics', 'hackathon', 'ballet']
+KINDS = ['festival', 'night', 'meetup', 'workshop', 'concert', 'conference', 'showcase', 'tournament']
+CITIES = ['Mumbai', 'Delhi', 'Bengaluru', 'Chennai', 'Kolkata', 'Pune', 'Hyderabad', 'Jaipur',
+          'Kochi', 'Goa', 'Indore', 'Lucknow', 'Chandigarh', 'Mysuru', 'Surat', 'Nagpur']
+FILLER = ['live', 'music', 'tickets', 'family', 'friendly', 'evening', 'open', 'air', 'venue', 'limited',
+          'seats', 'guest', 'speakers', 'local', 'artists', 'weekend', 'special', 'edition', 'annual']
+
+QUERIES = {
+    'one rare term': {'q': 'robotics'},
+    'one common term': {'q': 'music'},
+    'two terms': {'q': 'jazz festival'},
+    'prefix': {'q': 'phot'},
+    'term + city': {'q': 'workshop', 'location': 'Pune'},
+    'term + dates + price': {'q': 'concert', 'date_from': 30, 'date_to': 120, 'price_max': 500},
+}
+
+
+class Command(BaseCommand):
+    help = ("Seed a throwaway test database with synthetic events and time search_events "
+            "(ranked page plus facet counts) for a set of typical queries, uncached and "
+            "through the cached search API.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100_000)
+        parser.add_argument('--runs', type=int, default=50, help="Timed runs per query.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if min(options['events'], options['runs'], options['batch_size']) < 1:
+            raise CommandError("--events, --runs and --batch-size must be positive.")
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            started = time.perf_counter()
+            self._seed(options['events'], options['batch_size'])
+            self.stdout.write(f"Seeded and indexed {options['events']} events on {connection.vendor} "
+                              f"in {time.perf_counter() - started:.1f}s")
+            for name, params in QUERIES.items():
+                self._run(name, params, options['runs'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def _seed(self, count, batch_size):
+        rng = random.Random(0)
+        organizer = User.objects.create_user('bench-search')
+        today = timezone.localdate()
+        for start in range(0, count, batch_size):
+            events = []
+            for i in range(start, min(start + batch_size, count)):
+                genre, kind, city = rng.choice(GENRES), rng.choice(KINDS), rng.choice(CITIES)
+                events.append(Event(
+                    name=f'{genre.title()} {kind} {i}',
+                    date=today + timedelta(days=rng.randrange(-60, 365)),
+                    location=city,
+                    description=' '.join([genre, kind, *rng.sample(FILLER, 8)]),
+                    capacity=500,
+                    price=rng.choice([0, 199, 499, 750, 1500]),
+                    organizer=organizer,
+                ))
+            Event.objects.bulk_create(events)
+            index_events(event.pk for event in events)
+
+    def _run(self, name, params, runs):
+        today = timezone.localdate()
+        kwargs = {
+            key: today + timedelta(days=value) if key.startswith('date_') else value
+            for key, value in params.items() if key != 'q'
+        }
+        timings, result = [], None
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = search_events(params['q'], **kwargs)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+
+        # The same query through /api/events/search/, answered from the response cache.
+        client, cached = Client(), []
+        api_params = {key: str(value) for key, value in {**params, **kwargs}.items()}
+        client.get('/api/events/search/', api_params)
+        for _ in range(runs):
+            started = time.perf_counter()
+            client.get('/api/events/search/', api_params)
+            cached.append((time.perf_counter() - started) * 1000)
+        cached.sort()
+
+        self.stdout.write(
+            f"{name:<22} matches {result['total']:>6}  "
+            f"p50 {percentile(timings, 50):7.2f} ms  p95 {percentile(timings, 95):7.2f} ms  "
+            f"cached API p50 {percentile(cached, 50):5.2f} ms"
+        )
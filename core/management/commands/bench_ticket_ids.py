@@ -0,0 +1,102 @@
+import secrets
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+from core.models import Booking, Event
+from core.ticket_ids import ALPHABET, LENGTH, new_ticket_ids
+
+SCHEMES = {
+    'uuid4[:8]': lambda count: [str(uuid.uuid4())[:8] for _ in range(count)],
+    # Same length as ticket_ids but random, to separate key size from insert order.
+    'random15': lambda count: [''.join(secrets.choice(ALPHABET) for _ in range(LENGTH)) for _ in range(count)],
+    'ticket_ids': new_ticket_ids,
+}
+
+
+def ticket_index_bytes():
+    """On-disk size of the index(es) on ``Booking.ticket_id``, or None if unsupported here."""
+    table = Booking._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                """
+                SELECT COALESCE(SUM(pg_relation_size(i.indexrelid)), 0)
+                FROM pg_index i
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+                WHERE i.indrelid = %s::regclass AND a.attname = 'ticket_id'
+                """,
+                [table],
+            )
+            return cursor.fetchone()[0]
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'PRAGMA index_list("{table}")')
+            names = []
+            for row in cursor.fetchall():
+                cursor.execute(f'PRAGMA index_info("{row[1]}")')
+                if [info[2] for info in cursor.fetchall()] == ['ticket_id']:
+                    names.append(row[1])
+            try:
+                cursor.execute(
+                    f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({', '.join(['%s'] * len(names))})", names,
+                )
+            except Exception:
+                return None  # SQLite built without the dbstat table
+            return cursor.fetchone()[0]
+    return None
+
+
+def reset_bookings():
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'TRUNCATE {Booking._meta.db_table} CASCADE')
+            return
+        Booking.objects.all().delete()
+        if connection.vendor == 'sqlite':
+            cursor.execute('VACUUM')
+
+
+class Command(BaseCommand):
+    help = ("Compare insert throughput, collisions and ticket_id index size of the old "
+            "uuid4()[:8] ticket IDs with core.ticket_ids, in a throwaway test database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200_000)
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            user = User.objects.create_user('bench-ticket-ids')
+            event = Event.objects.create(
+                name='Ticket ID benchmark', date='2030-01-01', location='-', description='-',
+                capacity=options['count'], price=0, organizer=user,
+            )
+            for name, generate in SCHEMES.items():
+                reset_bookings()
+                self._run(name, generate, user, event, options['count'], options['batch_size'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def _run(self, name, generate, user, event, count, batch_size):
+        elapsed = 0.0
+        for start in range(0, count, batch_size):
+            ids = generate(min(batch_size, count - start))
+            started = time.perf_counter()
+            # Collisions are skipped rather than raised so they can be counted.
+            Booking.objects.bulk_create(
+                [Booking(user=user, event=event, ticket_id=ticket_id) for ticket_id in ids],
+                ignore_conflicts=True,
+            )
+            elapsed += time.perf_counter() - started
+
+        stored = Booking.objects.count()
+        index_bytes = ticket_index_bytes()
+        index = f"{index_bytes / 1024:10.0f} KiB" if index_bytes is not None else 'n/a'.rjust(14)
+        self.stdout.write(
+            f"{name:<12} {stored / elapsed:9.0f} rows/s  index {index}  collisions {count - stored}"
+        )
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.tickets import TicketData, render_ticket_pdf, render_ticket_pdfs, render_tickets_pdf
+
+
+class Command(BaseCommand):
+    help = "Report PDF ticket rendering throughput (tickets/second)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        tickets = [
+            TicketData(
+                ticket_id=f'bench{i:05d}', username=f'user{i}', event_name='Benchmark Night',
+                status='CONFIRMED', qr_payload=f'bench{i:05d}.0.0.benchmark',
+            )
+            for i in range(count)
+        ]
+
+        runs = [
+            ('one PDF per ticket', lambda: [render_ticket_pdf(t) for t in tickets]),
+            ('one multi-page PDF', lambda: render_tickets_pdf(tickets)),
+            (f"process pool x{options['workers']}",
+             lambda: render_ticket_pdfs(tickets, workers=options['workers'])),
+        ]
+        for label, run in runs:
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{label:<22} {count / elapsed:8.1f} tickets/s ({elapsed:.2f}s)")
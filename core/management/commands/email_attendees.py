@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.mail import email_event_attendees
+from core.models import Event
+
+
+class Command(BaseCommand):
+    help = "Email every attendee of an event over pooled SMTP connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int)
+        parser.add_argument('--subject', required=True)
+        parser.add_argument('--body', required=True)
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(pk=options['event_id'])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event {options['event_id']} does not exist")
+
+        sent = email_event_attendees(event, options['subject'], options['body'])
+        self.stdout.write(f"Sent {sent} emails for {event.name}")
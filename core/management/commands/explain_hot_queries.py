@@ -0,0 +1,59 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from core.checkin import CHECKED_IN_STATUSES
+from core.dashboard import organizer_event_summaries
+from core.models import Booking, CheckinLog, Event
+
+
+class Command(BaseCommand):
+    help = "Print the database's EXPLAIN plan for each hot view's queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help="Run EXPLAIN ANALYZE where the backend supports it (executes the queries).")
+
+    def hot_queries(self):
+        # Real keys when the database has data; the plans are the same either way.
+        booking = Booking.objects.order_by('-id').first()
+        ticket_id = booking.ticket_id if booking else 'sample'
+        event_id = booking.event_id if booking else 0
+        user_id = booking.user_id if booking else 0
+        organizer = User(pk=Event.objects.filter(pk=event_id).values_list('organizer_id', flat=True).first() or 0)
+
+        return [
+            ('check-in lookup by ticket_id (mark_attendance, scan_attendance, payment_webhook)',
+             Booking.objects.filter(ticket_id=ticket_id)),
+            ('batch check-in (checkin_batch)',
+             Booking.objects.filter(ticket_id__in=[ticket_id, 'other']).values_list('pk', 'ticket_id', 'status')),
+            ('my bookings (booking_list)',
+             Booking.objects.filter(user_id=user_id).select_related('event').order_by('-booking_time')),
+            ('organiser bookings page (organizer_bookings)',
+             Booking.objects.filter(event__organizer=organizer, event_id=event_id)
+             .select_related('event', 'user').order_by('-booking_time', '-id')[:50]),
+            ('checked-in count for an event',
+             Booking.objects.filter(event_id=event_id, status__in=CHECKED_IN_STATUSES)),
+            ('organiser dashboard aggregates (organizer_dashboard)',
+             organizer_event_summaries(organizer)),
+            ('expired hold sweep (release_expired_holds)',
+             Booking.objects.filter(status='PENDING', hold_expires_at__lt=timezone.now())),
+            ('first check-in per booking (attendee export)',
+             CheckinLog.objects.filter(booking_id=booking.pk if booking else 0).order_by('checkin_time')),
+            ('events API page (api_event_list)',
+             Event.objects.filter(Q(date__gt=timezone.now().date()) | Q(date=timezone.now().date(), id__gt=0))
+             .order_by('date', 'id')[:51]),
+        ]
+
+    def handle(self, *args, **options):
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options['analyze'] = True
+
+        self.stdout.write(f"Database backend: {connection.vendor}")
+        for label, queryset in self.hot_queries():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label}"))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
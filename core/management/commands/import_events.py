@@ -0,0 +1,31 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk import BulkImportError, import_events, read_rows
+
+
+class Command(BaseCommand):
+    help = ("Create events from a CSV (with a header row) or JSON file. Columns are the "
+            "EventForm fields: name, date, location, description, capacity, price, upi_id.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--organizer', required=True, help="Username that will own the events.")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            organizer = User.objects.get(username=options['organizer'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['organizer']!r}")
+
+        started = time.perf_counter()
+        try:
+            created = import_events(read_rows(options['path']), organizer, options['chunk_size'])
+        except BulkImportError as e:
+            for error in e.args[0][:20]:
+                self.stderr.write(error)
+            raise CommandError(f"{len(e.args[0])} invalid rows; nothing was imported.")
+        self.stdout.write(f"Imported {created} events in {time.perf_counter() - started:.1f}s")
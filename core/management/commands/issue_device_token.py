@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.devices import InvalidDeviceToken, issue_device_token, revoke_device_token
+from core.models import Event
+from core.tokens import token_expiry
+
+
+class Command(BaseCommand):
+    help = ("Print a gate scanner token for an event, signed on behalf of its organiser, "
+            "or revoke one with --revoke.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int, nargs='?')
+        parser.add_argument('device_id', nargs='?', help="Name shown in check-in logs, e.g. gate-3.")
+        parser.add_argument('--revoke', metavar='TOKEN', help="Revoke this token instead of issuing one.")
+
+    def handle(self, *args, **options):
+        if options['revoke']:
+            try:
+                device = revoke_device_token(options['revoke'])
+            except InvalidDeviceToken as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"Revoked {device.device_id} for event {device.event_id}")
+            return
+
+        if options['event_id'] is None or not options['device_id']:
+            raise CommandError("Give an event_id and device_id, or --revoke TOKEN.")
+        try:
+            event = Event.objects.select_related('organizer').get(pk=options['event_id'])
+            token = issue_device_token(event, event.organizer, options['device_id'])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event {options['event_id']} does not exist.")
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(token)
+        self.stderr.write(f"Valid until {token_expiry(event):%Y-%m-%d %H:%M} UTC")
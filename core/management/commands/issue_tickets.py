@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk import issue_tickets, prerender_qr_codes, read_rows
+from core.models import Event
+from core.reservations import SoldOut
+
+
+class Command(BaseCommand):
+    help = ("Issue complimentary CONFIRMED tickets for an event to every attendee in a CSV "
+            "or JSON file (columns: email, optional name). Safe to re-run.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, required=True)
+        parser.add_argument('--from', dest='path', required=True)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--workers', type=int, default=4, help="Processes rendering QR codes.")
+        parser.add_argument('--no-qr', action='store_true', help="Skip pre-rendering QR codes.")
+        parser.add_argument('--email', action='store_true', help="Queue a ticket email per new ticket.")
+        parser.add_argument('--site-url', default='', help="Base URL used in ticket emails.")
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(pk=options['event'])
+        except Event.DoesNotExist:
+            raise CommandError(f"No event {options['event']}")
+        render_qr = not options['no_qr'] and getattr(settings, 'QR_DISK_CACHE', True)
+
+        started = time.perf_counter()
+        issued = skipped = rendered = 0
+        try:
+            for new, already, payloads in issue_tickets(
+                event, read_rows(options['path']), options['chunk_size'],
+                email=options['email'], site_url=options['site_url'],
+            ):
+                issued += new
+                skipped += already
+                if render_qr and payloads:
+                    rendered += prerender_qr_codes(payloads, options['workers'])
+                self.stdout.write(f"  {issued} issued, {skipped} skipped")
+        except SoldOut:
+            raise CommandError(f"Event sold out after issuing {issued} tickets.")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Issued {issued} tickets ({skipped} skipped, {rendered} QR codes rendered) "
+            f"in {elapsed:.1f}s, {issued / elapsed:.0f} tickets/s"
+        )
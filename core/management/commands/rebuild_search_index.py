@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Drop and rebuild the full-text event search index from core_event."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Indexed {rebuild_index()} events")
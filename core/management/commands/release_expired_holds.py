@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.reservations import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Cancel PENDING bookings whose seat hold has expired and free their seats."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep sweeping instead of running once.")
+        parser.add_argument('--interval', type=float,
+                            default=getattr(settings, 'BOOKING_HOLD_SWEEP_SECONDS', 60))
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired_holds()
+            self.stdout.write(f"Released {released} expired holds")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,44 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Booking, Event
+from core.tickets import render_ticket_pdfs, render_tickets_pdf, ticket_data
+
+
+class Command(BaseCommand):
+    help = "Render the PDF tickets of an event, one file per ticket or a single printable PDF."
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int)
+        parser.add_argument('--out', default='.')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--single', action='store_true',
+                            help="Write all tickets into one multi-page PDF.")
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(pk=options['event_id'])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event {options['event_id']} does not exist")
+
+        bookings = (
+            Booking.objects.filter(event=event)
+            .exclude(status__in=['CANCELLED', 'Cancelled'])
+            .select_related('user', 'event')
+            .order_by('id')
+        )
+        tickets = [ticket_data(booking) for booking in bookings.iterator(chunk_size=500)]
+        os.makedirs(options['out'], exist_ok=True)
+
+        if options['single']:
+            path = os.path.join(options['out'], f'event-{event.pk}-tickets.pdf')
+            with open(path, 'wb') as fh:
+                fh.write(render_tickets_pdf(tickets))
+            self.stdout.write(f"Wrote {len(tickets)} tickets to {path}")
+            return
+
+        for ticket_id, pdf in render_ticket_pdfs(tickets, workers=options['workers']).items():
+            with open(os.path.join(options['out'], f'{ticket_id}_ticket.pdf'), 'wb') as fh:
+                fh.write(pdf)
+        self.stdout.write(f"Wrote {len(tickets)} ticket PDFs to {options['out']}")
@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.delivery import claim_jobs, deliver_job
+
+
+def _init_process():
+    # Forked workers must not reuse the parent's database connection.
+    from django.db import connections
+    for conn in connections.all():
+        conn.close()
+
+
+class Command(BaseCommand):
+    help = "Render and send queued ticket emails from the DeliveryJob outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=getattr(settings, 'TICKET_WORKER_CONCURRENCY', 4))
+        parser.add_argument('--pool', choices=['thread', 'process'],
+                            default=getattr(settings, 'TICKET_WORKER_POOL', 'thread'))
+        parser.add_argument('--poll-interval', type=float,
+                            default=getattr(settings, 'TICKET_WORKER_POLL_SECONDS', 2.0))
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Jobs claimed per poll (defaults to twice --workers).")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the currently due jobs and exit.")
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        batch_size = options['batch_size'] or workers * 2
+
+        if options['pool'] == 'process':
+            _init_process()
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ticket-worker')
+
+        self.stdout.write(f"Ticket worker started ({workers} {options['pool']} workers)")
+        try:
+            with executor:
+                while True:
+                    token, job_ids = claim_jobs(batch_size)
+                    if job_ids:
+                        results = list(executor.map(partial(deliver_job, claimed_by=token), job_ids))
+                        self.stdout.write(f"Delivered {sum(results)}/{len(results)} tickets")
+                        continue
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Ticket worker stopped")
@@ -0,0 +1,64 @@
+"""Per-event gate manifest for offline scanners.
+
+The manifest carries the event's token key and a Bloom filter of every
+ticket that may still enter. A scanner accepts a QR when its token verifies
+and its ticket ID is in the filter, then syncs admissions back through
+``/api/checkin/batch/`` once it is online.
+
+Filter positions use double hashing over SHA-256 so they are easy to
+reproduce in the browser: ``h1``/``h2`` are the first two big-endian 32-bit
+words of ``sha256(ticket_id)`` and bit ``i`` is ``(h1 + i * h2) % m``.
+"""
+import base64
+import hashlib
+import math
+
+from django.utils import timezone
+
+from .checkin import REFUSED_STATUSES
+from .models import Booking
+from .tokens import event_key, token_expiry
+
+MANIFEST_VERSION = 1
+
+
+def _positions(ticket_id, m, k):
+    digest = hashlib.sha256(ticket_id.encode('utf-8')).digest()
+    h1 = int.from_bytes(digest[:4], 'big')
+    h2 = int.from_bytes(digest[4:8], 'big')
+    return [(h1 + i * h2) % m for i in range(k)]
+
+
+def build_bloom(ticket_ids, false_positive_rate=0.001):
+    n = max(len(ticket_ids), 1)
+    m = max(64, math.ceil(-n * math.log(false_positive_rate) / math.log(2) ** 2))
+    m += -m % 8
+    k = max(1, round(-math.log2(false_positive_rate)))
+
+    bits = bytearray(m // 8)
+    for ticket_id in ticket_ids:
+        for pos in _positions(ticket_id, m, k):
+            bits[pos >> 3] |= 1 << (pos & 7)
+    return {'m': m, 'k': k, 'bits': base64.b64encode(bytes(bits)).decode('ascii')}
+
+
+def bloom_contains(bloom, ticket_id):
+    bits = base64.b64decode(bloom['bits'])
+    return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in _positions(ticket_id, bloom['m'], bloom['k']))
+
+
+def build_manifest(event):
+    ticket_ids = list(
+        Booking.objects.filter(event=event)
+        .exclude(status__in=REFUSED_STATUSES)
+        .values_list('ticket_id', flat=True)
+    )
+    return {
+        'version': MANIFEST_VERSION,
+        'event_id': event.pk,
+        'generated_at': timezone.now().isoformat(),
+        'expires_at': token_expiry(event).isoformat(),
+        'key': base64.urlsafe_b64encode(event_key(event.pk)).rstrip(b'=').decode('ascii'),
+        'count': len(ticket_ids),
+        'bloom': build_bloom(ticket_ids),
+    }
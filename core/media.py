@@ -0,0 +1,215 @@
+"""Serving stored files and in-memory assets with HTTP caching semantics.
+
+``serve_file`` answers conditional requests (If-None-Match /
+If-Modified-Since) with 304, honours single ``Range`` requests, and then
+either hands the transfer to the front proxy or streams the file itself.
+``MEDIA_OFFLOAD_HEADER`` selects the proxy: ``X-Accel-Redirect`` (nginx,
+rewritten onto ``MEDIA_OFFLOAD_PREFIX``) or ``X-Sendfile`` (Apache,
+lighttpd). Without one the file goes out as a ``FileResponse``, which
+gunicorn sends through ``wsgi.file_wrapper``, i.e. ``os.sendfile``, byte
+ranges included.
+
+``serve_bytes`` gives payloads that are already in memory (QR codes) the
+same treatment.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+# For URLs that change whenever the content does.
+IMMUTABLE = 'max-age=31536000, immutable'
+PRIVATE_IMMUTABLE = f'private, {IMMUTABLE}'
+
+# "<sha256>.<ext>" or a "<sha256>-<size>.<ext>" derivative; see core.screenshots.
+_CONTENT_ADDRESSED = re.compile(r'^[0-9a-f]{64}(-\d+)?\.\w+$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def is_content_addressed(name):
+    return bool(_CONTENT_ADDRESSED.match(os.path.basename(name)))
+
+
+def parse_range(header, size):
+    """Return the inclusive ``(start, end)`` of a single byte range, or None.
+
+    None means "send the whole body": no header, a malformed one, or a
+    multi-range request (answering those with the full representation is
+    allowed and keeps the sendfile path simple).
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec:
+        return None
+    first, sep, last = spec.partition('-')
+    if not sep or not (first.isdigit() or (not first and last.isdigit())):
+        return None
+    if last and not last.isdigit():
+        return None
+
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiable
+        start, end = max(size - suffix, 0), size - 1
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _range_applies(request, etag, last_modified):
+    if request.method != 'GET':
+        return False
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Weak validators never match If-Range.
+        return if_range == etag and not etag.startswith('W/')
+    return last_modified is not None and parse_http_date_safe(if_range) == int(last_modified)
+
+
+def _set_validators(response, etag, last_modified, cache_control):
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def _conditional(request, etag, last_modified, cache_control):
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified) if last_modified is not None else None,
+    )
+    if response is not None:
+        _set_validators(response, etag, last_modified, cache_control)
+    return response
+
+
+def _unsatisfiable(size):
+    response = HttpResponse(status=416)
+    response.headers['Content-Range'] = f'bytes */{size}'
+    return response
+
+
+class _FileRange:
+    """Read-limited view of an open file positioned at the start of a range.
+
+    Keeps ``fileno`` so ``wsgi.file_wrapper`` can still sendfile it; gunicorn
+    bounds the transfer by the response's Content-Length.
+    """
+
+    def __init__(self, fh, length):
+        self._fh = fh
+        self._remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._fh.fileno()
+
+    def close(self):
+        self._fh.close()
+
+
+def _offload(name, path):
+    header = getattr(settings, 'MEDIA_OFFLOAD_HEADER', None)
+    if not header:
+        return None
+    response = HttpResponse()
+    if header == 'X-Accel-Redirect':
+        prefix = getattr(settings, 'MEDIA_OFFLOAD_PREFIX', '/protected-media/')
+        response.headers[header] = prefix.rstrip('/') + '/' + quote(name)
+    else:
+        response.headers[header] = path
+    return response
+
+
+def serve_file(request, name, *, cache_control='private, no-cache', content_type=None):
+    """Serve ``name`` (relative to ``MEDIA_ROOT``); the caller has already checked access."""
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+        stat = os.stat(path)
+    except (SuspiciousFileOperation, FileNotFoundError, NotADirectoryError):
+        raise Http404('File not found')
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = stat.st_mtime
+    content_type = content_type or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    response = _conditional(request, etag, last_modified, cache_control)
+    if response is not None:
+        return response
+
+    response = _offload(name, path)
+    if response is not None:
+        # The proxy handles Range and its own validators from here.
+        response.headers['Content-Type'] = content_type
+        if cache_control:
+            response.headers['Cache-Control'] = cache_control
+        return response
+
+    try:
+        byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+    except RangeNotSatisfiable:
+        return _unsatisfiable(stat.st_size)
+    if byte_range is not None and not _range_applies(request, etag, last_modified):
+        byte_range = None
+
+    fh = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(fh, content_type=content_type)
+    else:
+        start, end = byte_range
+        fh.seek(start)
+        response = FileResponse(_FileRange(fh, end - start + 1), status=206, content_type=content_type)
+        response.headers['Content-Length'] = end - start + 1
+        response.headers['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    response.headers['Accept-Ranges'] = 'bytes'
+    return _set_validators(response, etag, last_modified, cache_control)
+
+
+def serve_bytes(request, data, *, etag, content_type, cache_control, last_modified=None):
+    """``serve_file`` for an in-memory payload with a known ``etag``."""
+    response = _conditional(request, etag, last_modified, cache_control)
+    if response is not None:
+        return response
+
+    try:
+        byte_range = parse_range(request.headers.get('Range'), len(data))
+    except RangeNotSatisfiable:
+        return _unsatisfiable(len(data))
+    if byte_range is not None and not _range_applies(request, etag, last_modified):
+        byte_range = None
+
+    if byte_range is None:
+        response = HttpResponse(data, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = HttpResponse(data[start:end + 1], status=206, content_type=content_type)
+        response.headers['Content-Range'] = f'bytes {start}-{end}/{len(data)}'
+    response.headers['Accept-Ranges'] = 'bytes'
+    return _set_validators(response, etag, last_modified, cache_control)
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:15
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_tickets_sold(apps, schema_editor):
+    Event = apps.get_model('core', 'Event')
+    sold = Event.objects.annotate(
+        live=Count('booking', filter=~Q(booking__status__in=['CANCELLED', 'Cancelled'])),
+    ).values_list('pk', 'live')
+    for pk, live in sold:
+        Event.objects.filter(pk=pk).update(tickets_sold=live)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_deliveryjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='tickets_held',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='tickets_sold',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_tickets_sold, migrations.RunPython.noop),
+    ]
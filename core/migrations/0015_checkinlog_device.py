@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_event_seat_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkinlog',
+            name='device_id',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='checkinlog',
+            name='scanned_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_event_updated_at_and_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['event', 'status'], name='booking_event_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['event', 'booking_time'], name='booking_event_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'booking_time'], name='booking_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('hold_expires_at__isnull', False), ('status', 'PENDING')), fields=['hold_expires_at'], name='booking_live_hold_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkinlog',
+            index=models.Index(fields=['booking', 'checkin_time'], name='checkinlog_booking_time_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_paymentevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='payment_screenshot_thumb',
+            field=models.ImageField(blank=True, null=True, upload_to='payment_screenshots/thumbs/'),
+        ),
+        migrations.AlterField(
+            model_name='deliveryjob',
+            name='kind',
+            field=models.CharField(choices=[('TICKET_EMAIL', 'Ticket email'), ('TICKET_PDF', 'Ticket email with PDF'), ('SCREENSHOT_THUMB', 'Payment screenshot thumbnail')], max_length=20),
+        ),
+    ]
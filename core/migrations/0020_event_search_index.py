@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:10
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from core.search import create_index, index_events
+
+    conn = schema_editor.connection
+    create_index(conn)
+    Event = apps.get_model('core', 'Event')
+    index_events(Event.objects.using(conn.alias).values_list('id', flat=True), conn)
+
+
+def drop_search_index(apps, schema_editor):
+    from core.search import drop_index
+
+    drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_booking_screenshot_thumb'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
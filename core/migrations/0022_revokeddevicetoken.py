@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_paymentevent_payment_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedDeviceToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('signature', models.CharField(max_length=32, unique=True)),
+                ('device_id', models.CharField(max_length=64)),
+                ('expires_at', models.DateTimeField()),
+                ('revoked_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.event')),
+            ],
+        ),
+    ]
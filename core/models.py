@@ -1,5 +1,9 @@
+import os
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
 
 class Profile(models.Model):
     ROLE_CHOICES = [
@@ -20,6 +24,21 @@ class Event(models.Model):
     price=models.PositiveIntegerField()
     organizer = models.ForeignKey(User, on_delete=models.CASCADE)
     upi_id = models.CharField(max_length=100, blank=True, null=True)
+    # Denormalized seat counters maintained by core.reservations.
+    tickets_sold = models.PositiveIntegerField(default=0)
+    tickets_held = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination and date-range filters on the events API.
+            models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+            models.Index(fields=['location', 'date', 'id'], name='event_location_date_idx'),
+        ]
+
+    @property
+    def seats_left(self):
+        return max(self.capacity - self.tickets_sold - self.tickets_held, 0)
 
     def __str__(self):
         return self.name
@@ -37,6 +56,41 @@ class Booking(models.Model):
     ticket_id = models.CharField(max_length=100, unique=True)
     qr_code_path = models.CharField(max_length=255, null=True, blank=True)
     payment_screenshot = models.ImageField(upload_to='payment_screenshots/', null=True, blank=True)
+    # Rendered from payment_screenshot by the ticket worker; see core.screenshots.
+    payment_screenshot_thumb = models.ImageField(upload_to='payment_screenshots/thumbs/', null=True, blank=True)
+    # Set while a PENDING booking holds a seat awaiting payment.
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Organiser tables and dashboard counts filter by event and status.
+            models.Index(fields=['event', 'status'], name='booking_event_status_idx'),
+            models.Index(fields=['event', 'booking_time'], name='booking_event_time_idx'),
+            # "My bookings" lists a user's bookings newest first.
+            models.Index(fields=['user', 'booking_time'], name='booking_user_time_idx'),
+            # Only live holds are scanned by release_expired_holds.
+            models.Index(
+                fields=['hold_expires_at'],
+                condition=models.Q(status='PENDING', hold_expires_at__isnull=False),
+                name='booking_live_hold_idx',
+            ),
+        ]
+
+    @property
+    def payment_screenshot_thumb_url(self):
+        """Cache-forever URL of the thumbnail, or None until the worker has rendered it."""
+        if not self.payment_screenshot_thumb:
+            return None
+        return reverse('payment_screenshot_thumb', args=[self.pk, os.path.basename(self.payment_screenshot_thumb.name)])
+
+    @property
+    def qr_url(self):
+        """QR download URL pinned to the current image, so browsers may cache it forever."""
+        from .qr import qr_key, qr_version
+        from .tokens import make_ticket_token
+
+        version = qr_version(qr_key(make_ticket_token(self)))
+        return f"{reverse('download_qr_code', args=[self.pk])}?v={version}"
     
    
 
@@ -59,6 +113,14 @@ class CheckinLog(models.Model):
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE)
     scanned_by = models.ForeignKey(User, on_delete=models.CASCADE)
     checkin_time = models.DateTimeField(auto_now_add=True)
+    # Reported by the gate device; may lag checkin_time when scans are batched.
+    scanned_at = models.DateTimeField(null=True, blank=True)
+    device_id = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['booking', 'checkin_time'], name='checkinlog_booking_time_idx'),
+        ]
 
 class Participant(models.Model):
     name = models.CharField(max_length=100)
@@ -68,4 +130,83 @@ class Participant(models.Model):
     payment_verified = models.BooleanField(default=False)  # you will manually verify
 
     def __str__(self):
-        return f"{self.name} - {self.event.title}"
\ No newline at end of file
+        return f"{self.name} - {self.event.title}"
+
+class DeliveryJob(models.Model):
+    """Outbox row for a ticket that still has to be rendered and mailed.
+
+    Rows are written in the same transaction as the Booking and drained by
+    ``manage.py run_ticket_worker``.
+    """
+    KIND_CHOICES = [
+        ('TICKET_EMAIL', 'Ticket email'),
+        ('TICKET_PDF', 'Ticket email with PDF'),
+        ('SCREENSHOT_THUMB', 'Payment screenshot thumbnail'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='delivery_jobs')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest time the job may be picked up; doubles as the lease expiry while RUNNING.
+    run_after = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    site_url = models.CharField(max_length=255, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='deliveryjob_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.booking.ticket_id} ({self.status})"
+
+class PaymentEvent(models.Model):
+    """Inbox row for one payment gateway callback.
+
+    The webhook only inserts these; a retried callback repeats a
+    ``(payment_id, status)`` pair and is dropped by the unique constraint,
+    while a later status for the same payment is kept.
+    ``manage.py apply_payment_events`` folds them into Payment and Booking
+    in batches.
+    """
+    payment_id = models.CharField(max_length=100)
+    ticket_id = models.CharField(max_length=100)
+    status = models.CharField(max_length=20)
+    amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    gateway = models.CharField(max_length=50, blank=True)
+    payload = models.JSONField(default=dict)
+    received_at = models.DateTimeField(auto_now_add=True)
+    applied_at = models.DateTimeField(null=True, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(applied_at__isnull=True), name='paymentevent_pending_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['payment_id', 'status'], name='paymentevent_payment_status_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.payment_id} {self.status} for {self.ticket_id}"
+
+
+class RevokedDeviceToken(models.Model):
+    """Deny list of gate device tokens (see ``core.devices``); rows outlive the token only until ``expires_at``."""
+    signature = models.CharField(max_length=32, unique=True)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE)
+    device_id = models.CharField(max_length=64)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.device_id} for event {self.event_id}"
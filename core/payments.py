@@ -0,0 +1,129 @@
+"""Payment webhook inbox.
+
+``ingest_payment_events`` is all the webhook does: validate the callbacks
+and append them to ``PaymentEvent`` with one ``INSERT ... ON CONFLICT DO
+NOTHING`` on ``(payment_id, status)``, so gateway retries are free, status
+transitions are kept, and a callback storm costs one insert per request.
+``apply_payment_events`` later folds pending rows into Payment and Booking
+with set-based writes.
+"""
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .checkin import CHECKED_IN_STATUSES
+from .models import Booking, Payment, PaymentEvent
+from .reservations import confirm_holds
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_STATUSES = {choice for choice, _ in Payment.STATUS_CHOICES}
+STATUS_RANK = {'INITIATED': 0, 'FAILED': 1, 'SUCCESS': 2}
+
+
+class InvalidPaymentEvent(ValueError):
+    pass
+
+
+def parse_payment_event(data):
+    if not isinstance(data, dict):
+        raise InvalidPaymentEvent('Each event must be a JSON object')
+    payment_id, ticket_id = data.get('payment_id'), data.get('ticket_id')
+    if not isinstance(payment_id, str) or not payment_id:
+        raise InvalidPaymentEvent('payment_id is required')
+    if not isinstance(ticket_id, str) or not ticket_id:
+        raise InvalidPaymentEvent('ticket_id is required')
+    status = data.get('status')
+    if status not in PAYMENT_STATUSES:
+        raise InvalidPaymentEvent(f'status must be one of {sorted(PAYMENT_STATUSES)}')
+    try:
+        amount = Decimal(str(data['amount'])) if data.get('amount') is not None else None
+    except InvalidOperation:
+        raise InvalidPaymentEvent('amount must be a number')
+
+    return PaymentEvent(
+        payment_id=payment_id[:100],
+        ticket_id=ticket_id[:100],
+        status=status,
+        amount=amount,
+        gateway=str(data.get('gateway', ''))[:50],
+        payload=data,
+    )
+
+
+def ingest_payment_events(items):
+    """Validate and store callbacks. Returns how many were handed to the database."""
+    events = [parse_payment_event(item) for item in items]
+    PaymentEvent.objects.bulk_create(events, ignore_conflicts=True)
+    return len(events)
+
+
+def apply_payment_events(limit=500):
+    """Fold up to ``limit`` pending inbox rows into Payment/Booking. Returns the number applied."""
+    with transaction.atomic():
+        events = list(
+            PaymentEvent.objects.select_for_update(skip_locked=True)
+            .filter(applied_at__isnull=True)
+            .order_by('id')[:limit]
+        )
+        if not events:
+            return 0
+
+        bookings = {
+            booking.ticket_id: booking
+            for booking in Booking.objects.select_related('event')
+            .filter(ticket_id__in={event.ticket_id for event in events})
+        }
+
+        # A payment moves INITIATED -> FAILED/SUCCESS; callbacks arriving out
+        # of order never move it back.
+        payments = {
+            (payment.booking_id, payment.payment_id): payment
+            for payment in Payment.objects.filter(
+                booking__in=bookings.values(), payment_id__in={event.payment_id for event in events},
+            )
+        }
+        created, advanced, paid, unknown = [], {}, {}, set()
+        for event in events:
+            booking = bookings.get(event.ticket_id)
+            if booking is None:
+                unknown.add(event.pk)
+                continue
+            key = (booking.pk, event.payment_id)
+            payment = payments.get(key)
+            if payment is None:
+                payment = payments[key] = Payment(
+                    booking=booking,
+                    payment_gateway=event.gateway or 'webhook',
+                    payment_id=event.payment_id,
+                    amount=event.amount if event.amount is not None else booking.event.price,
+                    status=event.status,
+                )
+                created.append(payment)
+            elif STATUS_RANK[event.status] > STATUS_RANK.get(payment.status, -1):
+                payment.status = event.status
+                if event.amount is not None:
+                    payment.amount = event.amount
+                if payment.pk is not None:
+                    advanced[payment.pk] = payment
+            else:
+                continue
+            if event.status == 'SUCCESS':
+                paid[booking.pk] = booking
+
+        Payment.objects.bulk_create(created)
+        Payment.objects.bulk_update(advanced.values(), ['status', 'amount'])
+        confirmed = confirm_holds(paid.values())
+        # A late SUCCESS must not turn a checked-in ticket back into an admissible one.
+        Booking.objects.filter(pk__in=[booking.pk for booking in confirmed]).exclude(
+            status__in=CHECKED_IN_STATUSES,
+        ).update(status='CONFIRMED')
+
+        now = timezone.now()
+        PaymentEvent.objects.filter(pk__in=[e.pk for e in events if e.pk not in unknown]).update(applied_at=now)
+        if unknown:
+            logger.warning("%s payment events reference unknown tickets", len(unknown))
+            PaymentEvent.objects.filter(pk__in=unknown).update(applied_at=now, error='Unknown ticket')
+    return len(events)
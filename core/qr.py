@@ -0,0 +1,147 @@
+"""Content-addressed QR code rendering.
+
+PNGs are keyed on a hash of the payload and render options. Encoded bytes
+live in a bounded in-process LRU; ``MEDIA_ROOT/qr_cache/`` is a second-level
+cache shared by all worker processes. Nothing is rendered until a QR code is
+first requested.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import qrcode
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .instrumentation import timed
+
+RENDER_DEFAULTS = {'box_size': 10, 'border': 4}
+
+
+def qr_key(data, **options):
+    opts = {**RENDER_DEFAULTS, **options}
+    material = data + '|' + '|'.join(f'{k}={opts[k]}' for k in sorted(opts))
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def qr_version(key):
+    """Short cache-busting token for URLs that serve the QR rendered under ``key``."""
+    return key[:16]
+
+
+class QRCache:
+    """Thread-safe LRU of PNG bytes bounded by total size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return png
+
+    def record(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def put(self, key, png):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = png
+            self._size += len(png)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+_cache = QRCache(getattr(settings, 'QR_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+
+def _disk_path(key):
+    return os.path.join(settings.MEDIA_ROOT, 'qr_cache', key[:2], f'{key}.png')
+
+
+def _render(data, options):
+    opts = {**RENDER_DEFAULTS, **options}
+    with timed('qr'):
+        img = qrcode.make(data, box_size=opts['box_size'], border=opts['border'])
+        buffer = BytesIO()
+        img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _read_disk(key):
+    try:
+        with open(_disk_path(key), 'rb') as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_disk(key, png):
+    path = _disk_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as fh:
+        fh.write(png)
+    os.replace(tmp_path, path)
+
+
+def render_qr_png(data, **options):
+    """Return ``(key, png_bytes)`` for ``data``, rendering only on a full miss."""
+    key = qr_key(data, **options)
+    png = _cache.get(key)
+    if png is not None:
+        return key, png
+
+    use_disk = getattr(settings, 'QR_DISK_CACHE', True)
+    png = _read_disk(key) if use_disk else None
+    if png is not None:
+        _cache.record('disk_hits')
+    else:
+        _cache.record('misses')
+        png = _render(data, options)
+        if use_disk:
+            _write_disk(key, png)
+    _cache.put(key, png)
+    return key, png
+
+
+async def arender_qr_png(data, **options):
+    """``render_qr_png`` for async views.
+
+    Memory hits return inline; disk reads and renders run in a worker thread
+    so they never block the event loop.
+    """
+    key = qr_key(data, **options)
+    png = _cache.get(key)
+    if png is not None:
+        return key, png
+    return await sync_to_async(render_qr_png, thread_sensitive=False)(data, **options)
+
+
+def qr_cache_stats():
+    return _cache.stats()
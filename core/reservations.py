@@ -0,0 +1,159 @@
+"""Seat reservation against ``Event.capacity``.
+
+Every non-cancelled booking occupies one seat, counted either in
+``Event.tickets_held`` (a PENDING booking whose ``hold_expires_at`` is set) or
+in ``Event.tickets_sold``. Seats are taken with a single conditional UPDATE on
+the event row, so concurrent bookings never oversell and never lock or count
+Booking rows. ``manage.py release_expired_holds`` hands expired holds back.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Booking, Event
+
+logger = logging.getLogger(__name__)
+
+
+class SoldOut(Exception):
+    """Raised when an event has no seat left to sell or hold."""
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(seconds=getattr(settings, 'BOOKING_HOLD_SECONDS', 900))
+
+
+def _take_seat(event_id, counter, count=1):
+    taken = Event.objects.filter(
+        pk=event_id,
+        capacity__gte=F('tickets_sold') + F('tickets_held') + count,
+    ).update(**{counter: F(counter) + count})
+    if not taken:
+        raise SoldOut(f"Event {event_id} is sold out")
+
+
+def sell_seat(event):
+    """Take one sold seat for ``event`` or raise ``SoldOut``.
+
+    Call inside the transaction that creates the booking so a failed insert
+    gives the seat back.
+    """
+    _take_seat(event.pk, 'tickets_sold')
+
+
+def sell_seats(event, count):
+    """Take ``count`` sold seats at once, all or none, or raise ``SoldOut``."""
+    _take_seat(event.pk, 'tickets_sold', count)
+
+
+def hold_seat(event):
+    """Take one held seat for ``event`` and return when the hold expires.
+
+    The returned value goes into ``Booking.hold_expires_at``.
+    """
+    _take_seat(event.pk, 'tickets_held')
+    return hold_expiry()
+
+
+def _resell_released(booking):
+    """Take a sold seat back for a booking the sweeper cancelled, at most once.
+
+    The status flips back to PENDING in the same conditional UPDATE that
+    finds it CANCELLED, so a concurrent confirm of the same booking matches
+    nothing and takes no second seat. ``SoldOut`` rolls the flip back.
+    """
+    with transaction.atomic():
+        if Booking.objects.filter(pk=booking.pk, status='CANCELLED').update(status='PENDING'):
+            _take_seat(booking.event_id, 'tickets_sold')
+            booking.status = 'PENDING'
+
+
+def confirm_hold(booking):
+    """Turn ``booking``'s hold into a sale.
+
+    A hold the sweeper already released is re-sold if a seat is still free,
+    otherwise ``SoldOut`` is raised. Bookings that were never held are left
+    alone.
+    """
+    with transaction.atomic():
+        converted = Booking.objects.filter(
+            pk=booking.pk, hold_expires_at__isnull=False,
+        ).update(hold_expires_at=None)
+        if converted:
+            Event.objects.filter(pk=booking.event_id).update(
+                tickets_held=F('tickets_held') - 1,
+                tickets_sold=F('tickets_sold') + 1,
+            )
+        else:
+            _resell_released(booking)
+    booking.hold_expires_at = None
+
+
+def confirm_holds(bookings):
+    """Set-based ``confirm_hold`` for many bookings.
+
+    Returns the bookings that now own a sold seat; released holds that could
+    not be re-sold because the event filled up are left out.
+    """
+    by_event = {}
+    for booking in bookings:
+        by_event.setdefault(booking.event_id, []).append(booking)
+
+    confirmed = []
+    for event_id, event_bookings in by_event.items():
+        ids = [booking.pk for booking in event_bookings]
+        with transaction.atomic():
+            held = set(
+                Booking.objects.select_for_update()
+                .filter(pk__in=ids, hold_expires_at__isnull=False)
+                .values_list('pk', flat=True)
+            )
+            if held:
+                Booking.objects.filter(pk__in=held).update(hold_expires_at=None)
+                Event.objects.filter(pk=event_id).update(
+                    tickets_held=F('tickets_held') - len(held),
+                    tickets_sold=F('tickets_sold') + len(held),
+                )
+            released = set(
+                Booking.objects.filter(pk__in=ids, status='CANCELLED').values_list('pk', flat=True)
+            ) - held
+            for booking in event_bookings:
+                if booking.pk in released:
+                    try:
+                        _resell_released(booking)
+                    except SoldOut:
+                        logger.warning("Paid booking %s lost its hold and event %s is sold out",
+                                       booking.ticket_id, event_id)
+                        continue
+                booking.hold_expires_at = None
+                confirmed.append(booking)
+    return confirmed
+
+
+def release_expired_holds(now=None):
+    """Cancel PENDING bookings whose hold ran out. Returns the number released."""
+    now = now or timezone.now()
+    expired = (
+        Booking.objects.filter(status='PENDING', hold_expires_at__lt=now)
+        .values_list('event_id', 'id')
+    )
+    by_event = {}
+    for event_id, booking_id in expired:
+        by_event.setdefault(event_id, []).append(booking_id)
+
+    released = 0
+    for event_id, booking_ids in by_event.items():
+        with transaction.atomic():
+            # Re-check the hold in the UPDATE so a concurrent confirm_hold wins.
+            count = Booking.objects.filter(
+                pk__in=booking_ids, status='PENDING', hold_expires_at__lt=now,
+            ).update(status='CANCELLED', hold_expires_at=None)
+            if count:
+                Event.objects.filter(pk=event_id).update(tickets_held=F('tickets_held') - count)
+                logger.info("Released %s expired holds for event %s", count, event_id)
+        released += count
+    return released
@@ -0,0 +1,112 @@
+"""Version-keyed cache for rendered event fragments and API payloads.
+
+Every key embeds a version counter: one for the event list and one per
+event. ``core.signals`` bumps the counters when an Event is saved or
+deleted, so stale entries are never read again and simply age out.
+The ``a``-prefixed helpers are the same operations for async views.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+LIST_VERSION_KEY = 'events:v'
+
+
+def response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def cache_timeout():
+    return getattr(settings, 'RESPONSE_CACHE_SECONDS', 600)
+
+
+def _event_version_key(event_id):
+    return f'event:{event_id}:v'
+
+
+def _version(key):
+    cache = response_cache()
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def _aversion(key):
+    cache = response_cache()
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def events_version():
+    return _version(LIST_VERSION_KEY)
+
+
+def event_version(event_id):
+    return _version(_event_version_key(event_id))
+
+
+def _bump(*keys):
+    cache = response_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_event(event_id):
+    """Invalidate the event list and everything cached for ``event_id``."""
+    _bump(LIST_VERSION_KEY, _event_version_key(event_id))
+
+
+def bump_event_list():
+    """Invalidate the event list only, e.g. after events were bulk-created."""
+    _bump(LIST_VERSION_KEY)
+
+
+def list_key(*parts):
+    return ':'.join(['events', str(events_version()), *map(str, parts)])
+
+
+def event_key(event_id, *parts):
+    return ':'.join(['event', str(event_id), str(event_version(event_id)), *map(str, parts)])
+
+
+async def alist_key(*parts):
+    return ':'.join(['events', str(await _aversion(LIST_VERSION_KEY)), *map(str, parts)])
+
+
+async def aevent_key(event_id, *parts):
+    version = await _aversion(_event_version_key(event_id))
+    return ':'.join(['event', str(event_id), str(version), *map(str, parts)])
+
+
+def query_digest(querydict):
+    return hashlib.sha256(querydict.urlencode().encode('utf-8')).hexdigest()[:16]
+
+
+def get_or_build(key, builder, timeout=None):
+    cache = response_cache()
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout or cache_timeout())
+    return value
+
+
+async def aget_or_build(key, builder, timeout=None):
+    """``get_or_build`` for async views; ``builder`` is a coroutine function."""
+    cache = response_cache()
+    value = await cache.aget(key)
+    if value is None:
+        value = await builder()
+        await cache.aset(key, value, timeout or cache_timeout())
+    return value
@@ -0,0 +1,80 @@
+"""Role lookup for organiser-only views.
+
+``user_role`` reads ``Profile.role`` through the cache (``ROLE_CACHE_ALIAS``
+for ``ROLE_CACHE_SECONDS``) instead of fetching the profile row on every
+request. ``core.signals`` drops a user's entry whenever their Profile is
+saved or deleted, and ``forget_roles`` does the same after a
+``bulk_create`` that skips signals. That only reaches other workers through
+a shared cache; with the per-process ``LocMemCache`` entries live for
+``ROLE_LOCAL_CACHE_SECONDS`` instead, which bounds how long a demoted
+organiser keeps access elsewhere.
+
+``RoleMiddleware`` exposes the role lazily as ``request.role``, resolved at
+most once per request and only if something reads it; views guard
+themselves with ``@organiser_required``.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.shortcuts import redirect
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from .models import Profile
+
+ORGANISER = 'organiser'
+PARTICIPANT = 'participant'
+
+
+def _cache():
+    return caches[getattr(settings, 'ROLE_CACHE_ALIAS', 'default')]
+
+
+def _timeout(cache):
+    if isinstance(cache, LocMemCache):
+        return getattr(settings, 'ROLE_LOCAL_CACHE_SECONDS', 5)
+    return getattr(settings, 'ROLE_CACHE_SECONDS', 3600)
+
+
+def _key(user_id):
+    return f'profile-role:{user_id}'
+
+
+def user_role(user):
+    """``user``'s Profile role; '' if they have no profile, None if anonymous."""
+    if not user.is_authenticated:
+        return None
+    cache = _cache()
+    role = cache.get(_key(user.pk))
+    if role is None:
+        role = Profile.objects.filter(user_id=user.pk).values_list('role', flat=True).first() or ''
+        cache.set(_key(user.pk), role, _timeout(cache))
+    return role
+
+
+def forget_roles(user_ids):
+    keys = [_key(user_id) for user_id in user_ids]
+    _cache().delete_many(keys)
+    # Again once the write is visible, in case a reader cached the old row meanwhile.
+    transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+class RoleMiddleware(MiddlewareMixin):
+    """Set a lazy ``request.role``. Must run after ``AuthenticationMiddleware``."""
+
+    def process_request(self, request):
+        request.role = SimpleLazyObject(lambda: user_role(request.user))
+
+
+def organiser_required(view):
+    """Like ``login_required``, then send anyone who isn't an organiser to the event list."""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if request.role != ORGANISER:
+            return redirect('event_list')
+        return view(request, *args, **kwargs)
+    return login_required(wrapped)
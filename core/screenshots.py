@@ -0,0 +1,108 @@
+"""Payment screenshot uploads and thumbnails.
+
+``ScreenshotUploadHandler`` sits in front of Django's upload handlers: it
+hashes the bytes as they stream in and stops reading once the upload passes
+``PAYMENT_SCREENSHOT_MAX_BYTES``, while Django spools everything above
+``FILE_UPLOAD_MAX_MEMORY_SIZE`` to a temp file. ``store_screenshot`` checks
+the image header and stores the original under its content hash. The
+thumbnail is rendered later by the ticket worker (``SCREENSHOT_THUMB`` jobs)
+and, being named after the same hash, can be cached by browsers forever.
+"""
+import hashlib
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+ALLOWED_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+UPLOAD_DIR = 'payment_screenshots'
+
+
+class ScreenshotRejected(Exception):
+    """Raised with a user-facing reason when an upload is not an acceptable image."""
+
+
+def max_upload_bytes():
+    return getattr(settings, 'PAYMENT_SCREENSHOT_MAX_BYTES', 5 * 1024 * 1024)
+
+
+class ScreenshotUploadHandler(FileUploadHandler):
+    """Hash uploads chunk by chunk and give up on ones larger than the limit.
+
+    Must be installed before ``request.POST``/``request.FILES`` are read.
+    After parsing, ``too_large`` tells whether the upload was cut off and
+    ``digests`` maps field names to SHA-256 hex digests.
+    """
+
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes or max_upload_bytes()
+        self.too_large = False
+        self.digests = {}
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._received = 0
+        self._sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._received += len(raw_data)
+        if self._received > self.max_bytes:
+            self.too_large = True
+            # Drain the rest of the body without storing it so the client gets a response.
+            raise StopUpload(connection_reset=False)
+        self._sha256.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.digests[self.field_name] = self._sha256.hexdigest()
+
+
+def store_screenshot(uploaded_file, digest):
+    """Validate ``uploaded_file`` and save it as ``payment_screenshots/<hash>.<ext>``.
+
+    Only the image header is decoded here. Identical uploads share one file.
+    Returns the storage name.
+    """
+    max_pixels = getattr(settings, 'PAYMENT_SCREENSHOT_MAX_PIXELS', 40_000_000)
+    try:
+        with Image.open(uploaded_file) as image:
+            image_format, (width, height) = image.format, image.size
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        raise ScreenshotRejected("Upload a JPEG, PNG or WebP image.")
+    if image_format not in ALLOWED_FORMATS:
+        raise ScreenshotRejected("Upload a JPEG, PNG or WebP image.")
+    if width * height > max_pixels:
+        raise ScreenshotRejected("That image is too large; please upload a smaller screenshot.")
+
+    name = f'{UPLOAD_DIR}/{digest[:2]}/{digest}.{ALLOWED_FORMATS[image_format]}'
+    if not default_storage.exists(name):
+        uploaded_file.seek(0)
+        name = default_storage.save(name, uploaded_file)
+    return name
+
+
+def render_thumbnail(name):
+    """Render (once) the thumbnail of stored screenshot ``name`` and return its storage name."""
+    size = getattr(settings, 'PAYMENT_SCREENSHOT_THUMB_SIZE', 320)
+    image_format, ext = ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+    stem = os.path.splitext(os.path.basename(name))[0]
+    thumb_name = f'{UPLOAD_DIR}/thumbs/{stem[:2]}/{stem}-{size}.{ext}'
+    if default_storage.exists(thumb_name):
+        return thumb_name
+
+    with default_storage.open(name, 'rb') as fh, Image.open(fh) as image:
+        # Let JPEG decode at a reduced scale instead of full size.
+        image.draft('RGB', (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode not in ('RGB', 'RGBA') or image_format == 'JPEG':
+            image = image.convert('RGB')
+        buffer = BytesIO()
+        image.save(buffer, image_format, quality=80)
+    return default_storage.save(thumb_name, ContentFile(buffer.getvalue()))
@@ -0,0 +1,251 @@
+"""Full-text event search with facets.
+
+Event name, location and description are indexed in a side table: an FTS5
+virtual table on SQLite, a weighted ``tsvector`` with a GIN index on
+PostgreSQL. ``core.signals`` keeps it in step with saves and deletes, and
+``index_events`` is called directly after ``bulk_create``.
+
+``search_events`` joins the full-text match to ``core_event`` and applies
+the date/price/location filters in that same query, so every matching
+event is considered. The page is ranked with bm25 / ts_rank (name above
+location above description) over the filtered matches and only the page
+is capped; ``total`` and the date, price and location facets come from one
+``GROUP BY`` over the same set. The join always drives from the full-text
+index (``CROSS JOIN`` pins the order on SQLite); letting the planner start
+from a filter index instead means one full-text lookup per row. Other
+backends fall back to unranked ``icontains`` matching.
+"""
+import re
+from collections import Counter
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Event
+
+SQLITE_TABLE = 'core_event_fts'
+POSTGRES_TABLE = 'core_event_search'
+
+# Model fields copied into the index; saves touching none of them skip reindexing.
+INDEXED_FIELDS = frozenset({'name', 'location', 'description'})
+
+MAX_TERMS = 8
+LOCATION_FACETS = 10
+PRICE_FACETS = (('free', 0, 0), ('under_500', 1, 499), ('500_to_999', 500, 999), ('1000_plus', 1000, None))
+# Days from today, inclusive; anything past the last bucket is "later".
+DATE_FACETS = (('next_7_days', 0, 7), ('next_30_days', 8, 30))
+
+_INDEX_CHUNK = 500
+
+
+def search_terms(query):
+    """Lower-cased word tokens of ``query``; everything else is dropped."""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+def create_index(conn):
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5("
+                "name, location, description, tokenize = 'porter unicode61 remove_diacritics 2')"
+            )
+        elif conn.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} "
+                "(event_id bigint PRIMARY KEY, document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_idx "
+                f"ON {POSTGRES_TABLE} USING GIN (document)"
+            )
+
+
+def drop_index(conn):
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+        elif conn.vendor == 'postgresql':
+            cursor.execute(f"DROP TABLE IF EXISTS {POSTGRES_TABLE}")
+
+
+def index_events(event_ids, conn=connection):
+    """(Re)index ``event_ids`` from ``core_event``; ids that no longer exist are dropped."""
+    event_ids = list(event_ids)
+    if conn.vendor not in ('sqlite', 'postgresql'):
+        return
+    with conn.cursor() as cursor:
+        for start in range(0, len(event_ids), _INDEX_CHUNK):
+            chunk = event_ids[start:start + _INDEX_CHUNK]
+            if conn.vendor == 'sqlite':
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({placeholders})", chunk)
+                cursor.execute(
+                    f"INSERT INTO {SQLITE_TABLE} (rowid, name, location, description) "
+                    f"SELECT id, name, location, description FROM core_event WHERE id IN ({placeholders})",
+                    chunk,
+                )
+            else:
+                cursor.execute(f"DELETE FROM {POSTGRES_TABLE} WHERE event_id = ANY(%s)", [chunk])
+                cursor.execute(
+                    f"INSERT INTO {POSTGRES_TABLE} (event_id, document) "
+                    "SELECT id, setweight(to_tsvector('english', name), 'A')"
+                    " || setweight(to_tsvector('english', location), 'B')"
+                    " || setweight(to_tsvector('english', description), 'C') "
+                    "FROM core_event WHERE id = ANY(%s)",
+                    [chunk],
+                )
+
+
+def rebuild_index(conn=connection, chunk_size=5000):
+    """Drop and refill the whole index. Returns the number of events indexed."""
+    drop_index(conn)
+    create_index(conn)
+    ids = list(Event.objects.using(conn.alias).order_by('id').values_list('id', flat=True))
+    for start in range(0, len(ids), chunk_size):
+        index_events(ids[start:start + chunk_size], conn)
+    return len(ids)
+
+
+def _query_param(terms):
+    if connection.vendor == 'sqlite':
+        return ' '.join(f'"{term}"*' for term in terms)
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+# search_events keyword -> (core_event column, operator)
+_FILTERS = {
+    'date_from': ('date', '>='),
+    'date_to': ('date', '<='),
+    'price_min': ('price', '>='),
+    'price_max': ('price', '<='),
+    'location': ('location', '='),
+}
+
+
+def _adapt(column, value):
+    return connection.ops.adapt_datefield_value(value) if column == 'date' else value
+
+
+def _matches(terms, filters):
+    """``(sql, params)``: the ``FROM ... WHERE ...`` of the filtered matches, events aliased ``e``."""
+    where, params = [], []
+    for name, value in filters.items():
+        column, op = _FILTERS[name]
+        where.append(f'e.{column} {op} %s')
+        params.append(_adapt(column, value))
+    where = ''.join(f' AND {clause}' for clause in where)
+
+    if connection.vendor == 'sqlite':
+        return (
+            f"FROM {SQLITE_TABLE} CROSS JOIN core_event e ON e.id = {SQLITE_TABLE}.rowid "
+            f"WHERE {SQLITE_TABLE} MATCH %s{where}",
+            [_query_param(terms), *params],
+        )
+    if connection.vendor == 'postgresql':
+        return (
+            f"FROM {POSTGRES_TABLE} s JOIN core_event e ON e.id = s.event_id "
+            f"WHERE s.document @@ to_tsquery('english', %s){where}",
+            [_query_param(terms), *params],
+        )
+    events = Event.objects.all()
+    for term in terms:
+        events = events.filter(
+            Q(name__icontains=term) | Q(location__icontains=term) | Q(description__icontains=term)
+        )
+    sql, match_params = events.values('id').query.sql_with_params()
+    return f"FROM core_event e WHERE e.id IN ({sql}){where}", [*match_params, *params]
+
+
+def _ranked_ids(terms, matches, params, limit, offset):
+    """One page of the matched event ids, best first."""
+    if connection.vendor == 'sqlite':
+        sql = f"SELECT e.id {matches} ORDER BY bm25({SQLITE_TABLE}, 10.0, 4.0, 1.0), e.id LIMIT %s OFFSET %s"
+    elif connection.vendor == 'postgresql':
+        sql = (
+            f"SELECT e.id {matches} "
+            "ORDER BY ts_rank(s.document, to_tsquery('english', %s)) DESC, e.id LIMIT %s OFFSET %s"
+        )
+        params = [*params, _query_param(terms)]
+    else:
+        sql = f"SELECT e.id {matches} ORDER BY e.date, e.id LIMIT %s OFFSET %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _bucket_sql(column, buckets, params):
+    whens = []
+    for name, low, high in buckets:
+        whens.append(f"WHEN {column} >= %s{' AND ' + column + ' <= %s' if high is not None else ''} THEN '{name}'")
+        params += [low] if high is None else [low, high]
+    return ' '.join(whens)
+
+
+def facet_counts(matches, params, today=None):
+    """``(total, facets)`` for the matches ``matches``/``params`` (see ``_matches``).
+
+    One pass groups the matches by (location, price bucket, date bucket);
+    the three facets are the margins of that cube.
+    """
+    today = today or timezone.localdate()
+    case_params = []
+    price_bucket = f"CASE {_bucket_sql('e.price', PRICE_FACETS, case_params)} END"
+    date_buckets = [
+        (name, _adapt('date', today + timedelta(days=first)), _adapt('date', today + timedelta(days=last)))
+        for name, first, last in DATE_FACETS
+    ]
+    case_params.append(_adapt('date', today))
+    date_bucket = (
+        f"CASE WHEN e.date < %s THEN 'past' {_bucket_sql('e.date', date_buckets, case_params)} ELSE 'later' END"
+    )
+    sql = (
+        "SELECT location, price_bucket, date_bucket, COUNT(*) FROM ("
+        f"SELECT e.location AS location, {price_bucket} AS price_bucket, {date_bucket} AS date_bucket {matches}"
+        ") cube GROUP BY location, price_bucket, date_bucket"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*case_params, *params])
+        cube = cursor.fetchall()
+
+    dates = dict.fromkeys(['past', *(name for name, _, _ in DATE_FACETS), 'later'], 0)
+    prices = dict.fromkeys((name for name, _, _ in PRICE_FACETS), 0)
+    locations = Counter()
+    for location, price, day, count in cube:
+        dates[day] += count
+        prices[price] += count
+        locations[location] += count
+    top = sorted(locations.items(), key=lambda item: (-item[1], item[0]))[:LOCATION_FACETS]
+    return sum(locations.values()), {
+        'date': dates,
+        'price': prices,
+        'location': [{'value': value, 'count': count} for value, count in top],
+    }
+
+
+def search_events(query, *, fields=('id', 'name', 'location', 'date', 'price'), date_from=None,
+                  date_to=None, price_min=None, price_max=None, location=None, limit=20, offset=0):
+    """Ranked page of events matching ``query`` plus facet counts for the whole match.
+
+    Returns ``{'total', 'results', 'facets'}``. Raises ``ValueError`` when
+    the query has no searchable words.
+    """
+    terms = search_terms(query)
+    if not terms:
+        raise ValueError('q must contain at least one word')
+
+    filters = {
+        name: value for name, value in [
+            ('date_from', date_from), ('date_to', date_to), ('price_min', price_min),
+            ('price_max', price_max), ('location', location),
+        ] if value is not None and value != ''
+    }
+    matches, params = _matches(terms, filters)
+    total, facets = facet_counts(matches, params)
+    ids = _ranked_ids(terms, matches, params, limit, offset) if total else []
+
+    rows = {row['id']: row for row in Event.objects.filter(pk__in=ids).values('id', *fields)}
+    results = [{field: rows[pk][field] for field in fields} for pk in ids if pk in rows]
+    return {'total': total, 'results': results, 'facets': facets}
@@ -1,10 +1,35 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile
+from .models import Profile, Event
+from . import response_cache
+from .roles import forget_roles
+from .search import INDEXED_FIELDS, index_events
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
     if created:
-        Profile.objects.create(user=instance)
+        # signup_view sets ``_signup_role`` so the profile is written once, with its role.
+        Profile.objects.get_or_create(user=instance, defaults={'role': getattr(instance, '_signup_role', '')})
 
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_role(sender, instance, **kwargs):
+    forget_roles([instance.user_id])
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_cache(sender, instance, **kwargs):
+    event_id = instance.pk
+    transaction.on_commit(lambda: response_cache.bump_event(event_id))
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    # Seat-counter saves don't change any searchable text.
+    if update_fields is None or INDEXED_FIELDS.intersection(update_fields):
+        index_events([instance.pk])
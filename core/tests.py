@@ -1,3 +1,1256 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import hashlib
+import importlib
+import json
+import re
+import shutil
+import smtplib
+import tempfile
+import zlib
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as global_apps
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.mail import EmailMessage
+from django.db import connection, transaction
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+
+from . import response_cache
+from .benchmarks import run_endpoint, seed
+from .bulk import BulkImportError, import_events, issue_tickets
+from .checkin import apply_scans, resolve_scanned_ticket
+from .delivery import SENDERS, claim_jobs, deliver_job, enqueue_ticket_delivery, retry_delay
+from .devices import revoke_device_token, verify_device_token
+from .mail import ConnectionPool, email_event_attendees, send_messages
+from .manifest import bloom_contains, build_bloom, build_manifest
+from .models import (
+    Booking, CheckinLog, DeliveryJob, Event, Payment, PaymentEvent, Profile, RevokedDeviceToken,
+)
+from .payments import apply_payment_events
+from .qr import render_qr_png
+from .reservations import (
+    SoldOut, confirm_hold, confirm_holds, hold_seat, release_expired_holds, sell_seat, sell_seats,
+)
+from .roles import user_role
+from .search import search_events
+from .testing_smtp import LocalSMTPServer
+from .ticket_ids import _process_node, create_booking, is_valid_ticket_id, new_ticket_id, new_ticket_ids
+from .tickets import TicketData, render_ticket_pdfs, render_tickets_pdf
+from .tokens import InvalidTicketToken, make_ticket_token, verify_ticket_token
+
+
+class TempMediaMixin:
+    """Run the class with ``MEDIA_ROOT`` (uploads, thumbnails, the QR disk cache) in a temporary directory."""
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        cls.addClassCleanup(media.disable)
+        super().setUpClass()
+
+
+class OrganizerDashboardTests(TestCase):
+    # The user lookup plus the page's own queries; the cached_db session
+    # engine and core.roles serve the session and role from cache.
+    DASHBOARD_QUERY_BUDGET = 2
+    BOOKINGS_QUERY_BUDGET = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('org', 'org@example.com', 'pw')
+        Profile.objects.update_or_create(user=cls.organizer, defaults={'role': 'organiser'})
+
+        for e in range(3):
+            event = Event.objects.create(
+                name=f'Event {e}', date=date(2030, 1, e + 1), location='Hall',
+                description='-', capacity=100, price=10, organizer=cls.organizer,
+                tickets_sold=20,
+            )
+            for b in range(20):
+                user = User.objects.create_user(f'u{e}-{b}')
+                booking = Booking.objects.create(
+                    user=user, event=event, ticket_id=f't{e}-{b}',
+                    status='ATTENDED' if b % 4 == 0 else 'PENDING',
+                )
+                Payment.objects.create(
+                    booking=booking, payment_gateway='upi', payment_id=f'p{e}-{b}',
+                    amount=10, status='SUCCESS' if b % 2 == 0 else 'FAILED',
+                )
+
+    def setUp(self):
+        self.client.force_login(self.organizer)
+        user_role(self.organizer)
+
+    def test_dashboard_aggregates_in_constant_queries(self):
+        with self.assertNumQueries(self.DASHBOARD_QUERY_BUDGET):
+            response = self.client.get('/organizer/dashboard/')
+
+        self.assertEqual(response.status_code, 200)
+        events = list(response.context['events'])
+        self.assertEqual(len(events), 3)
+        for event in events:
+            self.assertEqual(event.tickets_sold, 20)
+            self.assertEqual(event.checked_in, 5)
+            self.assertEqual(event.pending, 15)
+            self.assertEqual(event.revenue, 100)
+
+    def test_bookings_drill_down_is_paginated_in_constant_queries(self):
+        event = Event.objects.get(name='Event 1')
+        with self.assertNumQueries(self.BOOKINGS_QUERY_BUDGET):
+            response = self.client.get(f'/organizer/bookings/?event={event.id}&page=1')
+
+        self.assertEqual(response.status_code, 200)
+        page = response.context['page']
+        self.assertEqual(page.paginator.count, 20)
+        self.assertContains(response, 'Event 1')
+
+
+class HotQueryTests(TempMediaMixin, TestCase):
+    # The user lookup plus the bookings (with their events) in one query.
+    BOOKING_LIST_QUERY_BUDGET = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fan = User.objects.create_user('fan', 'fan@example.com', 'pw')
+        cls.add_bookings(0, 3)
+
+    @classmethod
+    def add_bookings(cls, start, stop):
+        for i in range(start, stop):
+            event = Event.objects.create(
+                name=f'Show {i}', date=date(2030, 1, 1), location='Hall', description='-',
+                capacity=10, price=10, organizer=cls.fan,
+            )
+            Booking.objects.create(user=cls.fan, event=event, ticket_id=new_ticket_id(), status='CONFIRMED')
+
+    def setUp(self):
+        self.client.force_login(self.fan)
+
+    def test_booking_list_runs_in_constant_queries(self):
+        self.client.get('/bookings/')  # warm the cached session
+        for bookings in (3, 20):
+            self.add_bookings(Booking.objects.count(), bookings)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/bookings/')
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['bookings']), bookings)
+            self.assertLessEqual(len(queries), self.BOOKING_LIST_QUERY_BUDGET)
+            booking_query = queries[-1]['sql']
+            self.assertIn('"core_event"', booking_query)
+            self.assertIn('ORDER BY "core_booking"."booking_time" DESC', booking_query)
+        self.assertContains(response, 'Show 19')
+
+    def test_explain_hot_queries_prints_a_plan_for_each_query(self):
+        out = StringIO()
+        call_command('explain_hot_queries', stdout=out)
+
+        output = out.getvalue()
+        self.assertIn(f'Database backend: {connection.vendor}', output)
+        self.assertEqual(output.count('\n== '), 9)
+        self.assertIn('booking_user_time_idx', output)
+
+
+class AttendeeExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('org', 'org@example.com', 'pw')
+        cls.event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=10, price=10, organizer=cls.organizer,
+        )
+        user = User.objects.create_user('fan', 'fan@example.com')
+        booking = Booking.objects.create(user=user, event=cls.event, ticket_id='abc123', status='ATTENDED')
+        Payment.objects.create(booking=booking, payment_gateway='upi', payment_id='pay-1', amount=10, status='SUCCESS')
+
+    def test_streams_one_row_per_booking(self):
+        self.client.force_login(self.organizer)
+        response = self.client.get(f'/organizer/events/{self.event.id}/attendees.csv')
+
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('abc123', lines[1])
+        self.assertIn('fan@example.com', lines[1])
+        self.assertIn('pay-1', lines[1])
+
+    def test_formula_like_cells_are_escaped(self):
+        User.objects.filter(username='fan').update(username='=HYPERLINK("http://x")', email='@evil.example')
+        self.client.force_login(self.organizer)
+        response = self.client.get(f'/organizer/events/{self.event.id}/attendees.csv')
+        row = next(csv.reader(b''.join(response.streaming_content).decode('utf-8-sig').splitlines()[1:]))
+        self.assertEqual(row[3:5], ['\'=HYPERLINK("http://x")', "'@evil.example"])
+        self.assertEqual(row[0], 'abc123')
+
+    def test_other_users_are_refused(self):
+        self.client.force_login(User.objects.get(username='fan'))
+        response = self.client.get(f'/organizer/events/{self.event.id}/attendees.csv')
+        self.assertEqual(response.status_code, 403)
+
+
+class PooledMailTests(TestCase):
+    def test_batches_share_one_smtp_connection(self):
+        with LocalSMTPServer() as server:
+            pool = ConnectionPool(size=1, max_idle=60, **server.connection_kwargs())
+            messages = [
+                EmailMessage(subject='Hi', body='-', from_email='a@example.com', to=[f'u{i}@example.com'])
+                for i in range(120)
+            ]
+            sent = send_messages(messages, batch_size=50, pool=pool)
+            pool.close_all()
+
+        self.assertEqual(sent, 120)
+        self.assertEqual(server.messages, 120)
+        self.assertEqual(server.connections, 1)
+
+    def test_dropped_connection_resends_only_unaccepted_messages(self):
+        delivered = []
+
+        class DroppingConnection:
+            def __init__(self, drop_after):
+                self.drop_after = drop_after
+
+            def send_messages(self, messages):
+                if self.drop_after == 0:
+                    raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+                self.drop_after -= 1
+                delivered.extend(m.to[0] for m in messages)
+                return len(messages)
+
+            def close(self):
+                pass
+
+        pool = ConnectionPool(size=1, max_idle=60)
+        connections = iter([DroppingConnection(3), DroppingConnection(100)])
+        pool._checkout = lambda: next(connections)
+        messages = [
+            EmailMessage(subject='Hi', body='-', from_email='a@example.com', to=[f'u{i}@example.com'])
+            for i in range(5)
+        ]
+        self.assertEqual(send_messages(messages, batch_size=5, pool=pool), 5)
+        self.assertEqual(delivered, [f'u{i}@example.com' for i in range(5)])
+
+    def test_email_event_attendees_skips_cancelled_bookings(self):
+        organizer = User.objects.create_user('org', 'org@example.com')
+        event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=10, price=10, organizer=organizer,
+        )
+        for i, status in enumerate(['PENDING', 'ATTENDED', 'CANCELLED']):
+            user = User.objects.create_user(f'fan{i}', f'fan{i}@example.com')
+            Booking.objects.create(user=user, event=event, ticket_id=f't{i}', status=status)
+
+        self.assertEqual(email_event_attendees(event, 'Doors open at 7', '-'), 2)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['fan0@example.com', 'fan1@example.com'])
+
+
+@override_settings(TICKET_DELIVERY_BACKOFF_SECONDS=30, TICKET_DELIVERY_BACKOFF_MAX_SECONDS=100,
+                   TICKET_DELIVERY_MAX_ATTEMPTS=2)
+class DeliveryOutboxTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('fan', 'fan@example.com')
+        event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=10, price=10, organizer=user,
+        )
+        booking = Booking.objects.create(user=user, event=event, ticket_id=new_ticket_id(), status='SUCCESS')
+        self.job = enqueue_ticket_delivery(booking, 'TICKET_EMAIL', 'https://qrentry.example')
+
+    def test_a_job_is_claimed_once_and_sent(self):
+        token, job_ids = claim_jobs(10)
+        self.assertEqual(job_ids, [self.job.pk])
+        self.assertEqual(claim_jobs(10)[1], [])
+        self.assertTrue(deliver_job(self.job.pk, token))
+
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.attempts), ('SENT', 1))
+        self.assertEqual(mail.outbox[0].to, ['fan@example.com'])
+        self.assertIn('https://qrentry.example/', mail.outbox[0].body)
+
+    def test_failures_back_off_then_give_up(self):
+        self.assertEqual([retry_delay(n).total_seconds() for n in range(1, 5)], [30, 60, 100, 100])
+
+        def fail(job):
+            raise smtplib.SMTPServerDisconnected('down')
+
+        with mock.patch.dict(SENDERS, {'TICKET_EMAIL': fail}):
+            token, _ = claim_jobs(10)
+            with self.assertLogs('core.delivery', 'WARNING'):
+                self.assertFalse(deliver_job(self.job.pk, token))
+            self.job.refresh_from_db()
+            self.assertEqual(self.job.status, 'PENDING')
+            self.assertGreater(self.job.run_after, timezone.now() + timedelta(seconds=25))
+            self.assertEqual(claim_jobs(10)[1], [])
+
+            DeliveryJob.objects.filter(pk=self.job.pk).update(run_after=timezone.now())
+            token, job_ids = claim_jobs(10)
+            self.assertEqual(job_ids, [self.job.pk])
+            with self.assertLogs('core.delivery', 'ERROR'):
+                deliver_job(self.job.pk, token)
+
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.attempts), ('FAILED', 2))
+        self.assertIn('down', self.job.last_error)
+        self.assertEqual(claim_jobs(10)[1], [])
+
+    def test_jobs_of_a_dead_worker_are_reclaimed_after_the_lease(self):
+        claim_jobs(10)
+        DeliveryJob.objects.filter(pk=self.job.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(claim_jobs(10)[1], [self.job.pk])
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.attempts), ('RUNNING', 2))
+
+    def test_a_worker_whose_lease_expired_leaves_the_job_to_its_new_owner(self):
+        slow_token, _ = claim_jobs(10)
+        new_tokens = []
+
+        def reclaimed_mid_send(job):
+            DeliveryJob.objects.filter(pk=job.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+            new_tokens.append(claim_jobs(10)[0])
+
+        with mock.patch.dict(SENDERS, {'TICKET_EMAIL': reclaimed_mid_send}):
+            with self.assertLogs('core.delivery', 'WARNING'):
+                self.assertFalse(deliver_job(self.job.pk, slow_token))
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.claimed_by), ('RUNNING', new_tokens[0]))
+
+        with self.assertLogs('core.delivery', 'WARNING'):
+            self.assertFalse(deliver_job(self.job.pk, slow_token))
+        self.assertEqual(mail.outbox, [])
+        self.assertTrue(deliver_job(self.job.pk, new_tokens[0]))
+        self.assertEqual(len(mail.outbox), 1)
+
+class PaymentWebhookTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('fan')
+        self.event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=10, price=10, organizer=user, tickets_held=1,
+        )
+        self.booking = Booking.objects.create(
+            user=user, event=self.event, ticket_id='abc123', status='PENDING',
+            hold_expires_at=timezone.now() + timedelta(minutes=10),
+        )
+
+    def post(self, data):
+        return self.client.post('/api/payment-webhook/', json.dumps(data), content_type='application/json')
+
+    def test_retried_callbacks_are_applied_once(self):
+        callback = {'payment_id': 'pay-1', 'ticket_id': 'abc123', 'status': 'SUCCESS', 'amount': '10'}
+        self.assertEqual(self.post(callback).status_code, 202)
+        self.assertEqual(self.post({'events': [callback, callback]}).status_code, 202)
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+
+        self.assertEqual(apply_payment_events(), 1)
+        self.assertEqual(apply_payment_events(), 0)
+
+        self.booking.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual(self.booking.status, 'CONFIRMED')
+        self.assertIsNone(self.booking.hold_expires_at)
+        self.assertEqual((self.event.tickets_sold, self.event.tickets_held), (1, 0))
+        self.assertEqual(Payment.objects.filter(booking=self.booking).count(), 1)
+
+    def test_status_transitions_are_kept_and_never_regress(self):
+        callback = {'payment_id': 'pay-1', 'ticket_id': 'abc123', 'amount': '10'}
+        self.post({**callback, 'status': 'INITIATED'})
+        self.assertEqual(apply_payment_events(), 1)
+        self.post({'events': [{**callback, 'status': 'SUCCESS'}, {**callback, 'status': 'INITIATED'}]})
+        self.assertEqual(sorted(PaymentEvent.objects.values_list('status', flat=True)), ['INITIATED', 'SUCCESS'])
+
+        self.assertEqual(apply_payment_events(), 1)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'CONFIRMED')
+        self.assertEqual(list(Payment.objects.values_list('status', flat=True)), ['SUCCESS'])
+
+        PaymentEvent.objects.filter(status='INITIATED').delete()
+        self.post({**callback, 'status': 'INITIATED'})
+        apply_payment_events()
+        self.assertEqual(list(Payment.objects.values_list('status', flat=True)), ['SUCCESS'])
+
+    def test_late_success_leaves_a_checked_in_booking_alone(self):
+        callback = {'payment_id': 'pay-1', 'ticket_id': 'abc123', 'status': 'SUCCESS', 'amount': '10'}
+        self.post(callback)
+        apply_payment_events()
+        self.assertEqual(apply_scans([{'ticket_id': 'abc123'}], self.booking.user_id)[0]['result'], 'admitted')
+
+        self.post({**callback, 'payment_id': 'pay-2'})
+        self.assertEqual(apply_payment_events(), 1)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'ATTENDED')
+        self.assertEqual(apply_scans([{'ticket_id': 'abc123'}], self.booking.user_id)[0]['result'], 'already_in')
+
+    def test_malformed_callbacks_are_rejected(self):
+        self.assertEqual(self.post({'ticket_id': 'abc123', 'status': 'SUCCESS'}).status_code, 400)
+        self.assertEqual(self.post({'payment_id': 'p', 'ticket_id': 'abc123', 'status': 'PAID'}).status_code, 400)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+
+class AsyncEndpointTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.gatekeeper = User.objects.create_user('gate')
+        cls.event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=10, price=10, organizer=cls.gatekeeper,
+        )
+        cls.booking = Booking.objects.create(
+            user=User.objects.create_user('fan'), event=cls.event, ticket_id='abc123', status='CONFIRMED',
+        )
+
+    async def test_event_detail_and_qr(self):
+        response = await self.async_client.get(f'/api/events/{self.event.id}/?fields=id,name')
+        self.assertEqual(response.json(), {'id': self.event.id, 'name': 'Gig'})
+
+        response = await self.async_client.get(f'/api/qr/{self.booking.id}/')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        response = await self.async_client.get(f'/api/qr/{self.booking.id}/', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_mark_attendance_logs_the_scanner(self):
+        await self.async_client.aforce_login(self.gatekeeper)
+        response = await self.async_client.post('/api/attend/abc123/')
+        self.assertTrue(response.json()['success'])
+
+        await self.booking.arefresh_from_db()
+        self.assertEqual(self.booking.status, 'ATTENDED')
+        self.assertTrue(await CheckinLog.objects.filter(booking=self.booking, scanned_by=self.gatekeeper).aexists())
+
+        response = await self.async_client.post('/api/attend/abc123/')
+        self.assertEqual((response.json()['success'], response.json()['result']), (False, 'already_in'))
+        self.assertEqual(await CheckinLog.objects.acount(), 1)
+
+    async def test_mark_attendance_refuses_cancelled_tickets(self):
+        await Booking.objects.filter(pk=self.booking.pk).aupdate(status='CANCELLED')
+        await self.async_client.aforce_login(self.gatekeeper)
+        response = await self.async_client.post('/api/attend/abc123/')
+        self.assertEqual((response.json()['success'], response.json()['result']), (False, 'cancelled'))
+
+        await self.booking.arefresh_from_db()
+        self.assertEqual(self.booking.status, 'CANCELLED')
+        self.assertFalse(await CheckinLog.objects.aexists())
+
+
+class EventApiTests(TestCase):
+    def setUp(self):
+        # Versions only move on commit, which TestCase never reaches; start from an empty cache.
+        cache.clear()
+        organizer = User.objects.create_user('org')
+        self.events = [
+            Event.objects.create(
+                name=f'Gig {i}', date=date(2030, 1, 1 + i // 2), location='Hall', description='-',
+                capacity=10, price=10, organizer=organizer,
+            )
+            for i in range(5)
+        ]
+
+    def test_cursor_pages_walk_date_then_id_without_gaps(self):
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2, 'fields': 'id', **({'cursor': cursor} if cursor else {})}
+            data = self.client.get('/api/events/', params).json()
+            seen += [row['id'] for row in data['results']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [event.id for event in self.events])
+
+        response = self.client.get('/api/events/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+    def test_unchanged_pages_answer_304(self):
+        response = self.client.get('/api/events/', {'limit': 2})
+        self.assertFalse(response.has_header('Last-Modified'))
+        again = self.client.get('/api/events/', {'limit': 2}, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+
+        other = self.client.get('/api/events/', {'limit': 3}, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(other.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.events[1].delete()
+        changed = self.client.get('/api/events/', {'limit': 2}, headers={
+            'If-None-Match': response['ETag'], 'If-Modified-Since': http_date(),
+        })
+        self.assertEqual(changed.status_code, 200)
+
+
+    def test_saving_an_event_invalidates_only_its_own_entries_and_the_list(self):
+        first, second = self.events[:2]
+        self.assertContains(self.client.get(f'/events/{first.id}/'), 'Gig 0')
+        self.assertEqual(self.client.get(f'/api/events/{second.id}/', {'fields': 'name'}).json(), {'name': 'Gig 1'})
+        list_key, second_key = response_cache.list_key(), response_cache.event_key(second.id)
+
+        # Writes that skip signals are not seen until the version moves.
+        Event.objects.filter(pk=first.pk).update(name='Stale')
+        self.assertContains(self.client.get(f'/events/{first.id}/'), 'Gig 0')
+
+        first.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+        self.assertContains(self.client.get(f'/events/{first.id}/'), 'Renamed')
+        self.assertNotEqual(response_cache.list_key(), list_key)
+        self.assertEqual(response_cache.event_key(second.id), second_key)
+        self.assertEqual(self.client.get(f'/api/events/{second.id}/', {'fields': 'name'}).json(), {'name': 'Gig 1'})
+
+        list_key = response_cache.list_key()
+        import_events([{
+            'name': 'Poetry Slam', 'date': '2030-05-01', 'location': 'Delhi',
+            'description': 'Open mic', 'capacity': '50', 'price': '0',
+        }], first.organizer)
+        self.assertNotEqual(response_cache.list_key(), list_key)
+        self.assertEqual(response_cache.event_key(second.id), second_key)
+
+class CheckinFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('org')
+        cls.event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=10, price=10, organizer=cls.organizer,
+        )
+        Booking.objects.create(user=cls.organizer, event=cls.event, ticket_id='t1', status='CONFIRMED')
+
+    async def test_admitted_scans_are_pushed_with_counters(self):
+        await self.async_client.aforce_login(self.organizer)
+        response = await self.async_client.get(f'/api/events/{self.event.id}/checkins/live/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertIn(b'"checked_in": 0', await anext(stream))
+
+        def scan():
+            with self.captureOnCommitCallbacks(execute=True):
+                apply_scans([{'ticket_id': 't1', 'device_id': 'gate-1'}], scanned_by_id=self.organizer.pk)
+
+        await sync_to_async(scan)()
+        message = await asyncio.wait_for(anext(stream), 5)
+        await stream.aclose()
+
+        self.assertTrue(message.startswith(b'event: checkin'))
+        self.assertIn(b'"ticket_id": "t1"', message)
+        self.assertIn(b'"checked_in": 1, "remaining": 9', message)
+
+    async def test_other_users_are_refused(self):
+        await self.async_client.aforce_login(await User.objects.acreate(username='fan'))
+        response = await self.async_client.get(f'/api/events/{self.event.id}/checkins/live/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_wsgi_requests_get_a_one_shot_snapshot(self):
+        self.client.force_login(self.organizer)
+        response = self.client.get(f'/api/events/{self.event.id}/checkins/live/')
+        self.assertFalse(response.streaming)
+        self.assertTrue(response.content.startswith(b'retry: '))
+        self.assertIn(b'"checked_in": 0', response.content)
+
+
+class BenchmarkSeedTests(TempMediaMixin, TransactionTestCase):
+    # run_endpoint requests from worker threads, which only see committed rows.
+    def test_seed_matches_seat_counters(self):
+        data = seed(events=3, users=5, bookings=20)
+
+        self.assertEqual(len(data.event_ids), 3)
+        self.assertEqual(len(data.booking_ids), 20)
+        self.assertEqual(Profile.objects.filter(user_id__in=data.attendee_ids).count(), 5)
+        for event in Event.objects.filter(pk__in=data.event_ids):
+            self.assertEqual(event.tickets_sold, event.booking_set.count())
+
+    def test_run_endpoint_reports_latency_and_queries(self):
+        data = seed(events=2, users=2, bookings=4)
+        stats = run_endpoint('download_qr_code', data, requests=4, threads=1)
+        self.assertEqual((stats['requests'], stats['errors'], stats['max_queries']), (4, 0, 1))
+        self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+
+class RequestMetricsTests(TempMediaMixin, TestCase):
+    def test_server_timing_and_metrics_endpoint(self):
+        organizer = User.objects.create_user('org', is_staff=True)
+        event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=10, price=10, organizer=organizer,
+        )
+        booking = Booking.objects.create(user=organizer, event=event, ticket_id='qr-timing')
+
+        response = self.client.get(f'/api/qr/{booking.id}/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+        self.assertIn('qr;dur=', response['Server-Timing'])
+
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.client.force_login(organizer)
+        body = self.client.get('/metrics/').content.decode()
+        self.assertIn('qrentry_request_duration_seconds_count{view="download_qr_code"}', body)
+        self.assertIn('qrentry_section_seconds_total{view="download_qr_code",section="qr"}', body)
+
+
+class BulkIssueTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user('org')
+        self.event = Event.objects.create(
+            name='Fest', date=date(2030, 1, 1), location='Grounds', description='-',
+            capacity=3, price=0, organizer=self.organizer,
+        )
+
+    def test_import_events_is_all_or_nothing(self):
+        rows = [
+            {'name': 'A', 'date': '2031-01-01', 'location': 'X', 'description': '-', 'capacity': '5', 'price': '0'},
+            {'name': 'B', 'date': 'not a date', 'location': 'X', 'description': '-', 'capacity': '5', 'price': '0'},
+        ]
+        with self.assertRaises(BulkImportError):
+            import_events(rows, self.organizer)
+        self.assertEqual(import_events(rows[:1], self.organizer), 1)
+
+    def test_issue_tickets_skips_existing_attendees_and_takes_seats(self):
+        rows = [{'email': 'a@example.com'}, {'email': 'B@example.com'}, {'email': 'a@example.com'}]
+        issued = [new for new, _, _ in issue_tickets(self.event, rows, chunk_size=2)]
+        self.assertEqual(sum(issued), 2)
+        self.assertEqual(sum(new for new, _, _ in issue_tickets(self.event, rows)), 0)
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.tickets_sold, 2)
+        ticket_ids = list(Booking.objects.filter(event=self.event).values_list('ticket_id', flat=True))
+        self.assertEqual(len(set(ticket_ids)), 2)
+        self.assertEqual(User.objects.get(email='b@example.com').profile.role, 'participant')
+
+        with self.assertRaises(SoldOut):
+            list(issue_tickets(self.event, [{'email': f'c{i}@example.com'} for i in range(2)]))
+
+    def test_attendees_are_matched_by_email_whatever_its_case(self):
+        carol = User.objects.create_user('carol', 'Carol@Example.com')
+        rows = [{'email': ' carol@example.com'}, {'email': 'Dave@Example.com'}]
+        self.assertEqual(sum(new for new, _, _ in issue_tickets(self.event, rows)), 2)
+        self.assertTrue(Booking.objects.filter(event=self.event, user=carol).exists())
+
+        rows = [{'email': 'CAROL@example.com'}, {'email': 'dave@example.COM '}]
+        self.assertEqual(sum(new for new, _, _ in issue_tickets(self.event, rows)), 0)
+        self.assertEqual(User.objects.filter(email__iexact='dave@example.com').count(), 1)
+
+    def test_each_chunk_is_committed_before_it_is_yielded(self):
+        list(issue_tickets(self.event, [{'email': 'a@example.com'}]))
+        depth = len(connection.atomic_blocks)
+        # Once with nothing left to issue, once with a new attendee.
+        for rows in ([{'email': 'a@example.com'}], [{'email': 'b@example.com'}]):
+            progress = issue_tickets(self.event, rows)
+            next(progress)
+            self.assertEqual(len(connection.atomic_blocks), depth)
+            progress.close()
+
+
+class SeatReservationTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user('org')
+        self.event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=2, price=100, organizer=self.organizer,
+        )
+
+    def held_booking(self):
+        return Booking.objects.create(
+            user=self.organizer, event=self.event, ticket_id=new_ticket_id(), status='PENDING',
+            hold_expires_at=hold_seat(self.event),
+        )
+
+    def assertSeats(self, sold, held):
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.tickets_sold, self.event.tickets_held), (sold, held))
+
+    def test_sold_and_held_seats_never_exceed_capacity(self):
+        sell_seat(self.event)
+        self.held_booking()
+        with self.assertRaises(SoldOut):
+            sell_seat(self.event)
+        with self.assertRaises(SoldOut):
+            hold_seat(self.event)
+        self.assertSeats(1, 1)
+
+        with self.assertRaises(SoldOut):
+            sell_seats(Event.objects.create(
+                name='Tiny', date=date(2030, 1, 1), location='Hall', description='-',
+                capacity=2, price=0, organizer=self.organizer,
+            ), 3)
+
+    def test_expired_holds_are_cancelled_and_their_seats_freed(self):
+        expired, live = self.held_booking(), self.held_booking()
+        Booking.objects.filter(pk=expired.pk).update(hold_expires_at=timezone.now() - timedelta(seconds=1))
+
+        with self.assertLogs('core.reservations', 'INFO'):
+            self.assertEqual(release_expired_holds(), 1)
+        self.assertEqual(release_expired_holds(), 0)
+        self.assertEqual(Booking.objects.get(pk=expired.pk).status, 'CANCELLED')
+        self.assertIsNotNone(Booking.objects.get(pk=live.pk).hold_expires_at)
+        self.assertSeats(0, 1)
+        sell_seat(self.event)
+
+    def test_confirm_turns_a_hold_into_a_sale_once(self):
+        booking = self.held_booking()
+        confirm_hold(booking)
+        confirm_hold(booking)
+        self.assertIsNone(Booking.objects.get(pk=booking.pk).hold_expires_at)
+        self.assertSeats(1, 0)
+
+    def test_confirm_after_expiry_resells_a_free_seat_or_raises(self):
+        late = self.held_booking()
+        Booking.objects.filter(pk=late.pk).update(hold_expires_at=timezone.now() - timedelta(seconds=1))
+        release_expired_holds()
+        confirm_hold(late)
+        self.assertSeats(1, 0)
+
+        later = self.held_booking()
+        Booking.objects.filter(pk=later.pk).update(hold_expires_at=timezone.now() - timedelta(seconds=1))
+        release_expired_holds()
+        sell_seat(self.event)
+        with self.assertRaises(SoldOut):
+            confirm_hold(later)
+        self.assertSeats(2, 0)
+
+    def test_a_released_hold_is_resold_once_however_often_it_is_confirmed(self):
+        booking = self.held_booking()
+        Booking.objects.filter(pk=booking.pk).update(hold_expires_at=timezone.now() - timedelta(seconds=1))
+        release_expired_holds()
+
+        # Two payment posts for the same booking, both before either saves its new status.
+        confirm_hold(Booking.objects.get(pk=booking.pk))
+        confirm_hold(Booking.objects.get(pk=booking.pk))
+        self.assertEqual(confirm_holds([Booking.objects.get(pk=booking.pk)]), [booking])
+        self.assertSeats(1, 0)
+        self.assertEqual(Booking.objects.get(pk=booking.pk).status, 'PENDING')
+
+    def test_confirm_holds_leaves_out_released_holds_that_no_longer_fit(self):
+        kept, lost = self.held_booking(), self.held_booking()
+        Booking.objects.filter(pk=lost.pk).update(hold_expires_at=timezone.now() - timedelta(seconds=1))
+        release_expired_holds()
+        sell_seat(self.event)
+
+        with self.assertLogs('core.reservations', 'WARNING'):
+            self.assertEqual(confirm_holds([kept, lost]), [kept])
+        self.assertSeats(2, 0)
+
+    def test_migration_backfills_tickets_sold_from_live_bookings(self):
+        for status in ['SUCCESS', 'PENDING', 'CANCELLED', 'Cancelled']:
+            Booking.objects.create(user=self.organizer, event=self.event, ticket_id=new_ticket_id(), status=status)
+        migration = importlib.import_module('core.migrations.0014_event_seat_counters')
+        migration.backfill_tickets_sold(global_apps, None)
+        self.assertSeats(2, 0)
+
+
+class TicketTokenTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user('org')
+        self.event = Event.objects.create(
+            name='Gig', date=timezone.localdate(), location='Hall', description='-',
+            capacity=10, price=10, organizer=self.organizer,
+        )
+        self.booking = Booking.objects.create(
+            user=self.organizer, event=self.event, ticket_id=new_ticket_id(), status='SUCCESS',
+        )
+
+    def test_tokens_verify_offline_and_reject_tampering(self):
+        token = make_ticket_token(self.booking)
+        with self.assertNumQueries(0):
+            self.assertEqual(verify_ticket_token(token), (self.booking.ticket_id, self.event.id))
+        self.assertEqual(resolve_scanned_ticket(token), self.booking.ticket_id)
+
+        ticket_id, event_id, expires, signature = token.split('.')
+        forged = [
+            f'{new_ticket_id()}.{event_id}.{expires}.{signature}',
+            f'{ticket_id}.{event_id + "0"}.{expires}.{signature}',
+            f'{ticket_id}.{event_id}.{int(expires, 16) + 86400:x}.{signature}',
+            f'{ticket_id}.{event_id}.{expires}.{signature[::-1]}',
+            f'{ticket_id}.{event_id}.{signature}',
+        ]
+        for bad in forged:
+            with self.assertRaises(InvalidTicketToken):
+                verify_ticket_token(bad)
+        self.assertIsNone(resolve_scanned_ticket(forged[0]))
+
+    @override_settings(TICKET_TOKEN_GRACE_HOURS=0)
+    def test_tokens_expire_after_the_event_day(self):
+        Event.objects.filter(pk=self.event.pk).update(date=date(2020, 1, 1))
+        self.booking.event.refresh_from_db()
+        with self.assertRaises(InvalidTicketToken):
+            verify_ticket_token(make_ticket_token(self.booking))
+
+    def test_manifest_bloom_holds_admissible_tickets_only(self):
+        cancelled = Booking.objects.create(
+            user=self.organizer, event=self.event, ticket_id=new_ticket_id(), status='CANCELLED',
+        )
+        manifest = build_manifest(self.event)
+        self.assertEqual((manifest['event_id'], manifest['count']), (self.event.id, 1))
+        self.assertTrue(bloom_contains(manifest['bloom'], self.booking.ticket_id))
+        self.assertFalse(bloom_contains(manifest['bloom'], cancelled.ticket_id))
+
+    def test_bloom_false_positive_rate_stays_near_its_target(self):
+        members = new_ticket_ids(2000)
+        bloom = build_bloom(members, false_positive_rate=0.01)
+        self.assertTrue(all(bloom_contains(bloom, ticket_id) for ticket_id in members))
+        false_positives = sum(bloom_contains(bloom, ticket_id) for ticket_id in new_ticket_ids(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TicketPdfTests(TempMediaMixin, TestCase):
+    def tickets(self, count):
+        return [TicketData(ticket_id, 'fan', 'Gig', 'CONFIRMED', f'payload-{ticket_id}') for ticket_id in new_ticket_ids(count)]
+
+    def parse(self, pdf):
+        """``(page_count, decoded streams, stream dictionaries)`` of a ReportLab PDF."""
+        self.assertTrue(pdf.startswith(b'%PDF-') and pdf.rstrip().endswith(b'%%EOF'))
+        streams = re.findall(rb'<<((?:(?!stream).)*?)>>\s*stream\r?\n(.*?)endstream', pdf, re.S)
+        decoded = [zlib.decompress(base64.a85decode(data.strip().removesuffix(b'~>'))) for _, data in streams]
+        return len(re.findall(rb'/Type /Page\b', pdf)), decoded, [header for header, _ in streams]
+
+    def test_each_page_carries_its_ticket_and_qr_over_one_shared_layout(self):
+        tickets = self.tickets(3)
+        pages, streams, headers = self.parse(render_tickets_pdf(tickets))
+        self.assertEqual(pages, 3)
+        self.assertEqual(sum(b'/Subtype /Form' in header for header in headers), 1)
+
+        images = [header for header in headers if b'/Subtype /Image' in header]
+        self.assertEqual(len(images), 3)
+        with Image.open(BytesIO(render_qr_png(tickets[0].qr_payload)[1])) as qr:
+            self.assertIn(f'/Width {qr.width}'.encode(), images[0])
+
+        text = b''.join(streams)
+        for ticket in tickets:
+            self.assertIn(f'({ticket.ticket_id}) Tj'.encode(), text)
+        self.assertEqual(text.count(b'(Ticket ID: ) Tj'), 1)
+
+    def test_batches_render_one_pdf_per_ticket_across_processes(self):
+        tickets = self.tickets(4)
+        pdfs = render_ticket_pdfs(tickets, workers=2, chunk_size=1)
+        self.assertEqual(set(pdfs), {ticket.ticket_id for ticket in tickets})
+        for ticket in tickets:
+            pages, streams, _ = self.parse(pdfs[ticket.ticket_id])
+            self.assertEqual(pages, 1)
+            self.assertIn(f'({ticket.ticket_id}) Tj'.encode(), b''.join(streams))
+
+
+class TicketIdTests(TestCase):
+    def test_ids_are_increasing_and_unique(self):
+        ids = new_ticket_ids(5000)
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertTrue(all(len(ticket_id) == 15 for ticket_id in ids))
+
+    def test_typos_are_rejected_before_the_database(self):
+        ticket_id = new_ticket_id()
+        self.assertTrue(is_valid_ticket_id(ticket_id.lower()))
+        for i in range(len(ticket_id)):
+            typo = ticket_id[:i] + ('1' if ticket_id[i] != '1' else '2') + ticket_id[i + 1:]
+            self.assertFalse(is_valid_ticket_id(typo))
+            with self.assertNumQueries(0):
+                self.assertIsNone(resolve_scanned_ticket(typo))
+
+        self.assertEqual(resolve_scanned_ticket('ab12cd34'), 'ab12cd34')  # legacy IDs pass through
+
+    def test_create_booking_retries_a_duplicate_id_in_a_savepoint(self):
+        organizer = User.objects.create_user('org')
+        event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=10, price=10, organizer=organizer,
+        )
+        taken, fresh = new_ticket_ids(2)
+        Booking.objects.create(user=organizer, event=event, ticket_id=taken)
+        with mock.patch('core.ticket_ids.new_ticket_id', side_effect=[taken, fresh]):
+            with transaction.atomic():
+                booking = create_booking(user=organizer, event=event, status='PENDING')
+        self.assertEqual(booking.ticket_id, fresh)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_forked_workers_sharing_the_setting_get_distinct_nodes(self):
+        with override_settings(TICKET_ID_NODE='4096'), mock.patch('os.getpid', side_effect=[101, 102]):
+            self.assertEqual([_process_node(), _process_node()], [4197, 4198])
+
+
+@override_settings(PAYMENT_SCREENSHOT_MAX_BYTES=64 * 1024)
+class PaymentScreenshotTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user('org')
+        self.fan = User.objects.create_user('fan')
+        self.event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=10, price=10, organizer=self.organizer, tickets_held=1,
+        )
+        self.booking = Booking.objects.create(
+            user=self.fan, event=self.event, ticket_id=new_ticket_id(),
+            hold_expires_at=timezone.now() + timedelta(minutes=10),
+        )
+        self.client.force_login(self.fan)
+
+    def upload(self, content, name='pay.png'):
+        return self.client.post(
+            f'/payment/success/{self.booking.id}/',
+            {'payment_screenshot': SimpleUploadedFile(name, content)},
+        )
+
+    def test_screenshot_is_stored_by_hash_and_thumbnailed_off_request(self):
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 2400), 'white').save(buffer, 'PNG')
+        png = buffer.getvalue()
+        self.assertRedirects(self.upload(png), '/bookings/', fetch_redirect_response=False)
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.payment_screenshot.name,
+                         f'payment_screenshots/{hashlib.sha256(png).hexdigest()[:2]}/{hashlib.sha256(png).hexdigest()}.png')
+        self.assertIsNone(self.booking.payment_screenshot_thumb_url)
+
+        job = DeliveryJob.objects.get(booking=self.booking, kind='SCREENSHOT_THUMB')
+        token, _ = claim_jobs(10)
+        self.assertTrue(deliver_job(job.pk, token))
+        self.booking.refresh_from_db()
+        url = self.booking.payment_screenshot_thumb_url
+        with Image.open(self.booking.payment_screenshot_thumb) as thumb:
+            self.assertLessEqual(max(thumb.size), 320)
+
+        self.client.force_login(self.organizer)
+        response = self.client.get(url)
+        self.assertEqual(response['Cache-Control'], 'private, max-age=31536000, immutable')
+        self.client.force_login(User.objects.create_user('stranger'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_oversized_and_non_image_uploads_are_rejected(self):
+        for content in (b'\x89PNG' + b'0' * 100 * 1024, b'not an image'):
+            response = self.upload(content)
+            self.assertRedirects(response, f'/pay/{self.event.id}/', fetch_redirect_response=False)
+        self.booking.refresh_from_db()
+        self.assertFalse(self.booking.payment_screenshot)
+
+
+class MediaServingTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        self.fan = User.objects.create_user('fan')
+        event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=10, price=10, organizer=User.objects.create_user('org'),
+        )
+        self.content = bytes(range(256)) * 4
+        digest = hashlib.sha256(self.content).hexdigest()
+        self.name = default_storage.save(f'payment_screenshots/{digest[:2]}/{digest}.png', ContentFile(self.content))
+        self.booking = Booking.objects.create(
+            user=self.fan, event=event, ticket_id=new_ticket_id(), payment_screenshot=self.name,
+        )
+        self.url = f'/media/{self.name}'
+        self.client.force_login(self.fan)
+
+    def test_full_conditional_and_range_responses(self):
+        response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'private, max-age=31536000, immutable')
+
+        for headers in ({'If-None-Match': response['ETag']}, {'If-Modified-Since': response['Last-Modified']}):
+            self.assertEqual(self.client.get(self.url, headers=headers).status_code, 304)
+
+        partial = self.client.get(self.url, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(b''.join(partial.streaming_content), self.content[10:20])
+
+        tail = self.client.get(self.url, headers={'Range': 'bytes=-5'})
+        self.assertEqual(b''.join(tail.streaming_content), self.content[-5:])
+        stale = self.client.get(self.url, headers={'Range': 'bytes=0-1', 'If-Range': '"stale"'})
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.client.get(self.url, headers={'Range': 'bytes=5000-'}).status_code, 416)
+
+    def test_media_is_access_checked_and_can_be_offloaded(self):
+        self.client.force_login(User.objects.create_user('stranger'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        self.client.force_login(self.fan)
+        with self.settings(MEDIA_OFFLOAD_HEADER='X-Accel-Redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_versioned_qr_url_is_immutable(self):
+        response = self.client.get(self.booking.qr_url)
+        self.assertEqual(response['Cache-Control'], 'private, max-age=31536000, immutable')
+        response = self.client.get(f'/api/qr/{self.booking.id}/', headers={'Range': 'bytes=0-7'})
+        self.assertEqual(response.content, b'\x89PNG\r\n\x1a\n')
+        self.assertEqual(response['Cache-Control'], 'private, max-age=86400')
+
+
+class EventSearchTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user('org')
+        today = timezone.localdate()
+
+        def event(name, location, description, days, price):
+            return Event.objects.create(
+                name=name, location=location, description=description, date=today + timedelta(days=days),
+                capacity=10, price=price, organizer=self.organizer,
+            )
+
+        self.jazz = event('Jazz Night', 'Pune', 'Live quartet', 3, 0)
+        self.festival = event('Food Festival', 'Goa', 'Street food and late jazz sets', 20, 499)
+        self.chess = event('Chess Open', 'Pune', 'Rapid tournament', 90, 1500)
+
+    def test_ranked_prefix_search_with_facets(self):
+        result = search_events('jaz')
+        self.assertEqual([row['id'] for row in result['results']], [self.jazz.id, self.festival.id])
+        self.assertEqual(result['total'], 2)
+        self.assertEqual(result['facets']['date'], {'past': 0, 'next_7_days': 1, 'next_30_days': 1, 'later': 0})
+        self.assertEqual(result['facets']['price'], {'free': 1, 'under_500': 1, '500_to_999': 0, '1000_plus': 0})
+        self.assertEqual(result['facets']['location'], [{'value': 'Goa', 'count': 1}, {'value': 'Pune', 'count': 1}])
+
+        filtered = search_events('jazz', location='Goa', price_min=1)
+        self.assertEqual([row['id'] for row in filtered['results']], [self.festival.id])
+
+    def test_filters_counts_and_ranking_cover_every_match(self):
+        today = timezone.localdate()
+        for i in range(30):
+            Event.objects.create(
+                name=f'Open mic {i}', location='Pune', description='Some jazz standards',
+                date=today + timedelta(days=100), capacity=10, price=0, organizer=self.organizer,
+            )
+
+        filtered = search_events('jazz', location='Goa')
+        self.assertEqual(filtered['total'], 1)
+        self.assertEqual([row['id'] for row in filtered['results']], [self.festival.id])
+        self.assertEqual(search_events('jazz', date_to=today + timedelta(days=30))['total'], 2)
+
+        # The oldest event still ranks first on its name, ahead of the newer description matches.
+        result = search_events('jazz', limit=5)
+        self.assertEqual(result['total'], 32)
+        self.assertEqual(result['results'][0]['id'], self.jazz.id)
+        self.assertEqual(len(result['results']), 5)
+        self.assertEqual(result['facets']['location'], [{'value': 'Pune', 'count': 31}, {'value': 'Goa', 'count': 1}])
+        self.assertEqual(result['facets']['price']['free'], 31)
+
+    def test_index_follows_saves_deletes_and_bulk_imports(self):
+        self.chess.description = 'Blitz and jazz'
+        self.chess.save()
+        self.assertEqual(search_events('blitz')['total'], 1)
+        self.jazz.delete()
+        self.assertEqual(search_events('quartet')['total'], 0)
+
+        import_events([{
+            'name': 'Poetry Slam', 'date': '2030-05-01', 'location': 'Delhi',
+            'description': 'Open mic', 'capacity': '50', 'price': '0',
+        }], self.organizer)
+        self.assertEqual(search_events('slam')['results'][0]['name'], 'Poetry Slam')
+
+    def test_search_api(self):
+        response = self.client.get('/api/events/search/', {'q': 'pune', 'fields': 'id,name'})
+        data = response.json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(set(data['results'][0]), {'id', 'name'})
+        self.assertEqual(self.client.get('/api/events/search/', {'q': '  '}).status_code, 400)
+        self.assertContains(self.client.get('/events/', {'q': 'chess'}), 'Chess Open')
+
+
+@override_settings(DEVICE_REVOCATION_REFRESH_SECONDS=0)
+class DeviceTokenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('org')
+        cls.event, cls.other = (
+            Event.objects.create(
+                name=name, date=date(2030, 1, 1), location='Hall', description='-',
+                capacity=10, price=10, organizer=cls.organizer,
+            )
+            for name in ('Gig', 'Other gig')
+        )
+        Booking.objects.create(user=cls.organizer, event=cls.event, ticket_id='here1', status='CONFIRMED')
+        Booking.objects.create(user=cls.organizer, event=cls.other, ticket_id='there1', status='CONFIRMED')
+
+    def setUp(self):
+        self.client.force_login(self.organizer)
+        response = self.client.post(f'/api/events/{self.event.id}/device-tokens/', {'device_id': 'gate-1'})
+        self.token = response.json()['token']
+        self.device = Client(enforce_csrf_checks=True, headers={'Authorization': f'Device {self.token}'})
+
+    def scan(self, client, *ticket_ids):
+        return client.post(
+            '/api/checkin/batch/', json.dumps({'scans': [{'ticket_id': t} for t in ticket_ids]}),
+            content_type='application/json',
+        )
+
+    def test_device_checks_in_without_session_or_user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.scan(self.device, 'here1', 'there1')
+        self.assertEqual([r['result'] for r in response.json()['results']], ['admitted', 'wrong_event'])
+        self.assertFalse([q['sql'] for q in queries if 'django_session' in q['sql'] or 'auth_user' in q['sql']])
+
+        log = CheckinLog.objects.get()
+        self.assertEqual((log.scanned_by_id, log.device_id), (self.organizer.id, 'gate-1'))
+        self.assertEqual(self.device.get(f'/api/events/{self.event.id}/gate-manifest/').status_code, 200)
+        self.assertEqual(self.device.get(f'/api/events/{self.other.id}/gate-manifest/').status_code, 403)
+
+    def test_forged_revoked_and_missing_credentials_are_refused(self):
+        forged = Client(headers={'Authorization': f'Device {self.token[:-2]}xx'})
+        self.assertEqual(self.scan(forged, 'here1').status_code, 401)
+
+        revoke_device_token(self.token)
+        self.assertEqual(self.scan(self.device, 'here1').status_code, 401)
+        self.assertEqual(Client().post('/api/attend/here1/').status_code, 401)
+
+    def test_revocations_are_shared_through_the_database(self):
+        # As if another process (manage.py issue_device_token --revoke) had written it.
+        device = verify_device_token(self.token)
+        RevokedDeviceToken.objects.create(
+            signature=device.signature, event=self.event, device_id='gate-1',
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+        self.assertEqual(self.scan(self.device, 'here1').status_code, 401)
+
+    def test_revoke_endpoint_is_for_staff_and_the_events_organiser(self):
+        self.client.force_login(User.objects.create_user('fan'))
+        response = self.client.post('/api/device-tokens/revoke/', {'token': self.token})
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_login(self.organizer)
+        response = self.client.post('/api/device-tokens/revoke/', {'token': self.token})
+        self.assertEqual(response.json()['device_id'], 'gate-1')
+        self.assertEqual(self.scan(self.device, 'here1').status_code, 401)
+
+    def test_session_scanners_are_limited_to_events_they_organise(self):
+        rival = User.objects.create_user('rival')
+        Event.objects.create(
+            name='Rival gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=10, price=10, organizer=rival,
+        )
+        self.client.force_login(rival)
+        response = self.scan(self.client, 'here1')
+        self.assertEqual(response.json()['results'], [{'ticket_id': 'here1', 'result': 'wrong_event'}])
+
+        self.client.force_login(User.objects.create_user('fan'))
+        self.assertEqual(self.scan(self.client, 'here1').status_code, 401)
+        self.assertFalse(CheckinLog.objects.exists())
+
+    def test_scan_page_checks_in_through_apply_scans(self):
+        self.client.force_login(User.objects.create_user('fan'))
+        self.assertEqual(self.client.post('/scan/', {'ticket_id': 'here1'}).status_code, 302)
+
+        self.client.force_login(self.organizer)
+        for expected in ('success', 'fail'):
+            response = self.client.post('/scan/', {'ticket_id': 'here1'})
+            self.assertEqual(response.context['status'], expected)
+        log = CheckinLog.objects.get()
+        self.assertEqual(log.booking.status, 'ATTENDED')
+
+
+class RoleTests(TestCase):
+    def test_signup_writes_the_profile_once_with_its_role(self):
+        response = self.client.post('/signup/', {
+            'username': 'newbie', 'email': 'newbie@example.com', 'role': 'organiser',
+            'password': 'pw-12345', 'confirm_password': 'pw-12345',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Profile.objects.get(user__username='newbie').role, 'organiser')
+
+    def test_per_process_cache_only_holds_roles_briefly(self):
+        user = User.objects.create_user('p')
+        Profile.objects.filter(user=user).update(role='organiser')
+        with override_settings(ROLE_LOCAL_CACHE_SECONDS=0):
+            self.assertEqual(user_role(user), 'organiser')
+            # A demotion saved by another worker, whose signal never reaches this cache.
+            Profile.objects.filter(user=user).update(role='participant')
+            self.assertEqual(user_role(user), 'participant')
+
+    def test_role_is_cached_until_the_profile_changes(self):
+        user = User.objects.create_user('p', password='pw')
+        Profile.objects.filter(user=user).update(role='participant')
+        self.assertEqual(user_role(user), 'participant')
+        with self.assertNumQueries(0):
+            self.assertEqual(user_role(user), 'participant')
+
+        self.client.force_login(user)
+        self.assertRedirects(self.client.get('/organizer/dashboard/'), '/events/', fetch_redirect_response=False)
+
+        profile = user.profile
+        profile.role = 'organiser'
+        profile.save()
+        self.assertEqual(self.client.get('/organizer/dashboard/').status_code, 200)
+        self.client.logout()
+        self.assertEqual(self.client.get('/organizer/dashboard/').status_code, 302)
+
+
+class AdminChangelistTests(TestCase):
+    # Session user, paginator count and the page itself.
+    CHANGELIST_QUERY_BUDGET = 3
+    CHANGELISTS = ['/admin/core/booking/', '/admin/core/payment/', '/admin/core/checkinlog/', '/admin/core/deliveryjob/']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('boss', 'boss@example.com', 'pw')
+        cls.event = Event.objects.create(
+            name='Gig', date=date(2030, 1, 1), location='Hall', description='-',
+            capacity=1000, price=10, organizer=cls.admin,
+        )
+        cls.add_rows(0, 10)
+
+    @classmethod
+    def add_rows(cls, start, stop):
+        for i in range(start, stop):
+            user = User.objects.create_user(f'fan{i}')
+            booking = Booking.objects.create(
+                user=user, event=cls.event, ticket_id=new_ticket_id(), status='SUCCESS',
+                payment_screenshot_thumb=f'payment_screenshots/thumbs/{i:064x}-240.jpg',
+            )
+            Payment.objects.create(booking=booking, payment_gateway='upi', payment_id=f'p{i}', amount=10, status='SUCCESS')
+            CheckinLog.objects.create(booking=booking, scanned_by=cls.admin, device_id='gate-1')
+            DeliveryJob.objects.create(booking=booking, kind='TICKET_EMAIL')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_run_in_constant_queries(self):
+        urls = self.CHANGELISTS
+        self.client.get(urls[0])  # warm the cached session
+        counts = [self.changelist_queries(url) for url in urls]
+        self.add_rows(10, 40)
+        self.assertEqual([self.changelist_queries(url) for url in urls], counts)
+        for count in counts:
+            self.assertLessEqual(count, self.CHANGELIST_QUERY_BUDGET)
+
+    def test_event_admin_never_writes_seat_counters(self):
+        response = self.client.post(f'/admin/core/event/{self.event.id}/change/', {
+            'name': 'Gig', 'date': '2030-01-01', 'location': 'Hall', 'description': '-', 'capacity': 1000,
+            'price': 10, 'organizer': self.admin.id, 'tickets_sold': 999, 'tickets_held': 999,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.tickets_sold, self.event.tickets_held), (0, 0))
+
+        # A seat sold while the admin form is open survives the save.
+        stale = Event.objects.get(pk=self.event.pk)
+        sell_seat(self.event)
+        stale.name = 'Renamed'
+        admin.site._registry[Event].save_model(None, stale, None, change=True)
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.name, self.event.tickets_sold), ('Renamed', 1))
+
+    def test_search_matches_normalised_ticket_ids_exactly(self):
+        ticket_id = Booking.objects.order_by('id').values_list('ticket_id', flat=True)[3]
+        for url in self.CHANGELISTS:
+            response = self.client.get(url, {'q': ticket_id.lower()})
+            self.assertEqual(response.context['cl'].result_count, 1)
+            self.assertContains(response, ticket_id)
+        response = self.client.get('/admin/core/booking/', {'q': ticket_id[:-1]})
+        self.assertEqual(response.context['cl'].result_count, 0)
@@ -0,0 +1,138 @@
+"""Compact, time-ordered ticket IDs with a check character.
+
+An ID is 15 Crockford base32 characters: 14 encoding a 70-bit integer of
+milliseconds since 2024-01-01 (44 bits), a node number (14 bits) and a
+per-millisecond sequence (12 bits), then one Luhn mod 32 check character.
+IDs from one process are strictly increasing, so inserts land at the right
+edge of the ``ticket_id`` index instead of scattering across it, and they
+never repeat. Processes are told apart by their node number: the process ID
+offset by ``TICKET_ID_NODE`` (give each host a base far from the others',
+e.g. 0, 4096, 8192), or a hash of host name and PID when that is unset.
+Either way two processes can still share a node, so ``create_booking``
+retries the insert with a fresh ID on the rare duplicate.
+
+The check character catches every single-character typo and most adjacent
+swaps, so ``is_valid_ticket_id`` rejects mistyped IDs without touching the
+database. Crockford decoding also accepts lowercase, O for 0 and I/L for 1.
+"""
+import os
+import socket
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_VALUES = {char: value for value, char in enumerate(ALPHABET)}
+_VALUES.update({'O': 0, 'I': 1, 'L': 1})
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+NODE_BITS = 14
+SEQUENCE_BITS = 12
+BODY_LENGTH = 14
+LENGTH = BODY_LENGTH + 1
+
+
+def check_char(body):
+    """Luhn mod 32 check character for ``body`` (canonical characters)."""
+    total, factor = 0, 2
+    for char in reversed(body):
+        addend = factor * _VALUES[char]
+        total += addend // 32 + addend % 32
+        factor = 3 - factor
+    return ALPHABET[-total % 32]
+
+
+def normalize_ticket_id(value):
+    """Canonical spelling of a new-style ID, or None if ``value`` isn't one (e.g. a legacy ID)."""
+    value = value.strip().upper().replace('-', '')
+    if len(value) != LENGTH or any(char not in _VALUES for char in value):
+        return None
+    return ''.join(ALPHABET[_VALUES[char]] for char in value)
+
+
+def is_valid_ticket_id(value):
+    canonical = normalize_ticket_id(value)
+    return canonical is not None and check_char(canonical[:-1]) == canonical[-1]
+
+
+def _process_node():
+    base = getattr(settings, 'TICKET_ID_NODE', None)
+    if base is not None:
+        # Forked workers share the setting but not their PIDs.
+        return (int(base) + os.getpid()) % (1 << NODE_BITS)
+    seed = f'{socket.gethostname()}:{os.getpid()}'.encode('utf-8')
+    return zlib.crc32(seed) % (1 << NODE_BITS)
+
+
+class TicketIdGenerator:
+    """Thread-safe generator of increasing IDs for one node."""
+
+    def __init__(self, node):
+        if not 0 <= node < 1 << NODE_BITS:
+            raise ValueError(f'node must be in [0, {1 << NODE_BITS})')
+        self.node = node
+        self._last_ms = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def _next_int(self):
+        with self._lock:
+            now = int(time.time() * 1000) - EPOCH_MS
+            if now > self._last_ms:
+                self._last_ms, self._sequence = now, 0
+            else:
+                # Same millisecond, or the clock stepped back: keep counting
+                # from the last timestamp, borrowing the next one when full.
+                self._sequence += 1
+                if self._sequence >> SEQUENCE_BITS:
+                    self._last_ms, self._sequence = self._last_ms + 1, 0
+            return (self._last_ms << NODE_BITS | self.node) << SEQUENCE_BITS | self._sequence
+
+    def new_id(self):
+        value = self._next_int()
+        body = ''.join(ALPHABET[value >> shift & 31] for shift in range(5 * (BODY_LENGTH - 1), -1, -5))
+        return body + check_char(body)
+
+
+_generator = None
+_generator_pid = None
+_setup_lock = threading.Lock()
+
+
+def _current_generator():
+    global _generator, _generator_pid
+    with _setup_lock:
+        # A forked worker must not continue its parent's node and sequence.
+        if _generator is None or _generator_pid != os.getpid():
+            _generator = TicketIdGenerator(_process_node())
+            _generator_pid = os.getpid()
+        return _generator
+
+
+def new_ticket_id():
+    return _current_generator().new_id()
+
+
+def new_ticket_ids(count):
+    generator = _current_generator()
+    return [generator.new_id() for _ in range(count)]
+
+
+def create_booking(attempts=3, **fields):
+    """``Booking.objects.create(**fields)`` with a new ticket ID, retried on a duplicate ID.
+
+    Each attempt runs in its own savepoint, so the caller's transaction (and
+    the seat it took) survives a collision.
+    """
+    from .models import Booking
+
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return Booking.objects.create(ticket_id=new_ticket_id(), **fields)
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
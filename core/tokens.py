@@ -0,0 +1,66 @@
+"""Signed ticket tokens for offline gate checks.
+
+A ticket QR encodes ``<ticket_id>.<event_id>.<expiry>.<signature>`` where the
+signature is a truncated HMAC-SHA256 under a per-event key derived from
+``SECRET_KEY``. A scanner holding that event's key (shipped in the gate
+manifest, see ``core.manifest``) can verify tickets without the database,
+and a leaked key only exposes one event.
+"""
+import base64
+import hmac
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+SIGNATURE_BYTES = 12
+
+
+class InvalidTicketToken(Exception):
+    """Raised when a token is malformed, forged or expired."""
+
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def event_key(event_id):
+    return salted_hmac('core.tokens.event-key', str(event_id), algorithm='sha256').digest()
+
+
+def _signature(event_id, message):
+    digest = hmac.new(event_key(event_id), message.encode('utf-8'), 'sha256').digest()
+    return _b64(digest[:SIGNATURE_BYTES])
+
+
+def token_expiry(event):
+    """End of the event day (UTC) plus ``TICKET_TOKEN_GRACE_HOURS``."""
+    end_of_day = datetime.combine(event.date, time.max, tzinfo=dt_timezone.utc)
+    return end_of_day + timedelta(hours=getattr(settings, 'TICKET_TOKEN_GRACE_HOURS', 12))
+
+
+def make_ticket_token(booking):
+    expires = int(token_expiry(booking.event).timestamp())
+    message = f'{booking.ticket_id}.{booking.event_id}.{expires:x}'
+    return f'{message}.{_signature(booking.event_id, message)}'
+
+
+def verify_ticket_token(token):
+    """Return ``(ticket_id, event_id)`` for a valid token or raise ``InvalidTicketToken``."""
+    try:
+        ticket_id, event_id, expires, signature = token.rsplit('.', 3)
+        event_id, expires = int(event_id), int(expires, 16)
+    except ValueError:
+        raise InvalidTicketToken('Malformed ticket token')
+
+    message = token.rsplit('.', 1)[0]
+    if not hmac.compare_digest(signature, _signature(event_id, message)):
+        raise InvalidTicketToken('Bad ticket signature')
+    if expires < timezone.now().timestamp():
+        raise InvalidTicketToken('Ticket token expired')
+    return ticket_id, event_id
+
+
+def is_ticket_token(payload):
+    return payload.count('.') >= 3
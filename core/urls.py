@@ -18,9 +18,14 @@ urlpatterns = [
     path('signup/', views.signup_view, name='signup'),
     path('events/create/', views.create_event, name='create_event'),
     path('organizer/bookings/', views.organizer_bookings, name='organizer_bookings'),
+    path('organizer/dashboard/', views.organizer_dashboard, name='organizer_dashboard'),
+    path('organizer/events/<int:event_id>/attendees.csv', views.export_attendees, name='export_attendees'),
+    path('organizer/events/<int:event_id>/live/', views.checkin_live, name='checkin_live'),
     path('pay/<int:event_id>/', views.payment_page, name='payment_page'),
 
     path('payment/success/<int:booking_id>/', views.payment_success, name='payment_success'),
+    path('bookings/<int:booking_id>/screenshot/<str:name>', views.payment_screenshot_thumb, name='payment_screenshot_thumb'),
+    path('media/<path:path>', views.serve_media, name='serve_media'),
     path('register/', views.register_participant, name='register_participant'),
    
 
@@ -31,12 +36,20 @@ urlpatterns = [
 
     # JSON APIs
     path('api/events/', views.api_event_list, name='api_event_list'),
+    path('api/events/search/', views.api_event_search, name='api_event_search'),
     path('api/events/<int:event_id>/', views.api_event_detail, name='api_event_detail'),
     path('api/book/<int:event_id>/', views.book_ticket, name='book_ticket'), 
-    path('api/qr/<int:booking_id>/', views.download_qr_code),           # Download QR
+    path('api/qr/<int:booking_id>/', views.download_qr_code, name='download_qr_code'),           # Download QR
+    path('api/qr/upi/<int:event_id>/', views.event_upi_qr, name='event_upi_qr'),
+    path('api/qr/stats/', views.qr_cache_stats_view, name='qr_cache_stats'),
+    path('metrics/', views.metrics_view, name='metrics'),
     path('api/attend/<str:ticket_id>/', views.mark_attendance),   
     path('api/payment-webhook/', views.payment_webhook, name='payment_webhook'),
-    path('api/attend/submit/', views.attendance_form),
+    path('api/checkin/batch/', views.checkin_batch, name='checkin_batch'),
+    path('api/events/<int:event_id>/gate-manifest/', views.gate_manifest, name='gate_manifest'),
+    path('api/events/<int:event_id>/device-tokens/', views.issue_device_token_view, name='issue_device_token'),
+    path('api/device-tokens/revoke/', views.revoke_device_token_view, name='revoke_device_token'),
+    path('api/events/<int:event_id>/checkins/live/', views.checkin_feed, name='checkin_feed'),
 
 
 
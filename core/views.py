@@ -1,20 +1,56 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.core.paginator import Paginator
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, FileResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404
 from django.utils.timezone import now
+from django.utils.dateparse import parse_datetime
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from asgiref.sync import sync_to_async
 
-import uuid
 import json
+import logging
 import os
+import hashlib
+import hmac
+from datetime import date
 
-from .models import Event, Booking, Payment, CheckinLog, Profile
+from .models import Event, Booking, Payment, Participant
 from .forms import SignUpForm, EventForm
-from core.utils import generate_qr_code
+from .qr import arender_qr_png, qr_cache_stats, qr_version
+from .media import PRIVATE_IMMUTABLE, is_content_addressed, serve_bytes, serve_file
+from .delivery import enqueue_ticket_delivery
+from .reservations import SoldOut, sell_seat, hold_seat, confirm_hold
+from .checkin import ADMITTED, Scanner, apply_scans, checkin_counters
+from .live import event_snapshot, event_stream
+from .manifest import build_manifest
+from .tokens import make_ticket_token, token_expiry
+from .roles import organiser_required
+from .devices import (
+    InvalidDeviceToken, averify_device_token, device_token_from_request, issue_device_token,
+    revoke_device_token, verify_device_token,
+)
+from .ticket_ids import create_booking
+from .screenshots import ScreenshotRejected, ScreenshotUploadHandler, store_screenshot
+from .pagination import akeyset_page
+from .dashboard import organizer_event_summaries
+from .exports import stream_attendees_csv
+from .payments import InvalidPaymentEvent, ingest_payment_events
+from .instrumentation import histograms
+from .search import search_events, search_terms
+from . import response_cache
+
+logger = logging.getLogger(__name__)
 
 # Home
 def home(request):
@@ -23,94 +59,183 @@ def home(request):
 
 # Event list and detail views
 def event_list(request):
+    query = request.GET.get('q', '').strip()
+    if search_terms(query):
+        # Search results skip the fragment cache; the first page is enough here.
+        results = search_events(query, fields=('id', 'name', 'description'), limit=50)['results']
+        return render(request, 'event_list.html', {'events': results, 'query': query})
+
+    # The queryset is lazy: on a fragment cache hit it is never evaluated.
     events = Event.objects.all()
-    return render(request, 'event_list.html', {'events': events})
+    return render(request, 'event_list.html', {
+        'events': events,
+        'events_version': response_cache.events_version(),
+        'cache_timeout': response_cache.cache_timeout(),
+        'cache_alias': getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default'),
+    })
 
 def event_detail(request, event_id):
-    event = get_object_or_404(Event, pk=event_id)
-    return render(request, 'event_detail.html', {'event': event})
+    def build_card():
+        event = get_object_or_404(Event, pk=event_id)
+        return {
+            'name': event.name,
+            'html': render_to_string('event_detail_card.html', {'event': event}),
+        }
+
+    card = response_cache.get_or_build(response_cache.event_key(event_id, 'card'), build_card)
+    # Seat counters change on every booking without bumping the event version,
+    # so they get their own short-lived entry.
+    seats_left = response_cache.get_or_build(
+        f'event:{event_id}:seats',
+        lambda: get_object_or_404(Event, pk=event_id).seats_left,
+        timeout=getattr(settings, 'EVENT_SEATS_CACHE_SECONDS', 5),
+    )
+    return render(request, 'event_detail.html', {
+        'event_id': event_id,
+        'event_name': card['name'],
+        'event_card': card['html'],
+        'seats_left': seats_left,
+    })
 
 
 from django.contrib.auth.decorators import login_required
 
 @login_required
 def booking_list(request):
-    bookings = Booking.objects.filter(user=request.user)
+    bookings = Booking.objects.filter(user=request.user).select_related('event').order_by('-booking_time')
     return render(request, 'bookings.html', {'bookings': bookings})
 
 
-# API: All Events
-def api_event_list(request):
-    events = Event.objects.all().values('id', 'name', 'description', 'location', 'date', 'capacity')
-    return JsonResponse(list(events), safe=False)
+# Fields the events API can return; ``?fields=`` picks a subset.
+EVENT_API_FIELDS = ('id', 'name', 'description', 'location', 'date', 'capacity', 'price')
 
-# API: Single Event
-def api_event_detail(request, event_id):
-    event = get_object_or_404(Event, id=event_id)
-    data = {
-        'id': event.id,
-        'name': event.name,
-        'description': event.description,
-        'location': event.location,
-        'date': event.date,
-        'capacity': event.capacity,
-    }
-    return JsonResponse(data)
 
+def _event_api_fields(request):
+    requested = request.GET.get('fields')
+    if not requested:
+        return EVENT_API_FIELDS
+    fields = tuple(f for f in EVENT_API_FIELDS if f in requested.split(','))
+    if not fields:
+        raise ValueError('No valid fields requested')
+    return fields
 
-from django.core.mail import send_mail
-from django.conf import settings
 
-def book_ticket(request, event_id):
-    if request.method == 'POST':
-        try:
-            user = request.user
-            event = Event.objects.get(pk=event_id)
-            ticket_id = str(uuid.uuid4())[:8]
+def _conditional_json(request, data, last_modified):
+    """JsonResponse with a strong ETag (and Last-Modified when given), or a 304 when they match."""
+    response = JsonResponse(data, safe=False)
+    response['ETag'] = '"%s"' % hashlib.sha256(response.content).hexdigest()[:32]
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return get_conditional_response(
+        request,
+        etag=response['ETag'],
+        last_modified=last_modified and int(last_modified.timestamp()),
+        response=response,
+    )
+
 
-            booking = Booking.objects.create(
-                user=user,
-                event=event,
-                status='PENDING',
-                ticket_id=ticket_id
+# API: All Events (keyset-paginated on (date, id))
+async def api_event_list(request):
+    try:
+        fields = _event_api_fields(request)
+        limit = min(int(request.GET.get('limit', 50)), 200)
+        if limit < 1:
+            raise ValueError('limit must be positive')
+
+        events = Event.objects.all()
+        cache_key = await response_cache.alist_key('api', response_cache.query_digest(request.GET))
+        if request.GET.get('date_from'):
+            events = events.filter(date__gte=date.fromisoformat(request.GET['date_from']))
+        if request.GET.get('date_to'):
+            events = events.filter(date__lte=date.fromisoformat(request.GET['date_to']))
+        if request.GET.get('location'):
+            events = events.filter(location=request.GET['location'])
+
+        async def build_page():
+            rows, next_cursor = await akeyset_page(
+                events.values(*{*fields, 'date', 'id'}),
+                request.GET.get('cursor'),
+                limit,
             )
+            results = [{f: row[f] for f in fields} for row in rows]
+            return {'results': results, 'next_cursor': next_cursor}
 
-            # ✅ Generate QR code
-            qr_filename = f'{booking.ticket_id}.png'
-            booking.qr_code_path = generate_qr_code(data=booking.ticket_id, filename=qr_filename)
-            booking.save()
+        data = await response_cache.aget_or_build(cache_key, build_page)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
-            # ✅ Email sending
-            if user.email:
-                print("User email:", user.email)
-                print("Preparing to send confirmation email...")
+    # No Last-Modified: a page's newest updated_at moves backwards when an
+    # event is deleted, so only the content ETag can tell the list changed.
+    return _conditional_json(request, data, None)
 
-                qr_url = request.build_absolute_uri('/media/' + booking.qr_code_path)
+# API: Full-text search with date/price/location facets
+def api_event_search(request):
+    try:
+        fields = _event_api_fields(request)
+        limit = min(int(request.GET.get('limit', 20)), 100)
+        offset = int(request.GET.get('offset', 0))
+        if limit < 1 or offset < 0:
+            raise ValueError('limit must be positive and offset non-negative')
+        filters = {
+            'date_from': date.fromisoformat(request.GET['date_from']) if request.GET.get('date_from') else None,
+            'date_to': date.fromisoformat(request.GET['date_to']) if request.GET.get('date_to') else None,
+            'price_min': int(request.GET['price_min']) if request.GET.get('price_min') else None,
+            'price_max': int(request.GET['price_max']) if request.GET.get('price_max') else None,
+            'location': request.GET.get('location'),
+        }
+        data = response_cache.get_or_build(
+            response_cache.list_key('search', response_cache.query_digest(request.GET)),
+            lambda: search_events(
+                request.GET.get('q'), fields=fields, limit=limit, offset=offset, **filters,
+            ),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
-                send_mail(
-                    subject=f"🎫 Your Ticket for {event.title}",
-                    message=f"""Hi {user.username},
+    return _conditional_json(request, data, None)
 
-Your ticket booking was successful!
+# API: Single Event
+async def api_event_detail(request, event_id):
+    try:
+        fields = _event_api_fields(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
-Event: {event.title}
-Ticket ID: {ticket_id}
-Status: {booking.status}
+    async def build():
+        return await Event.objects.filter(id=event_id).values(*fields, 'updated_at').afirst()
 
-QR Code: {qr_url}
+    data = await response_cache.aget_or_build(
+        await response_cache.aevent_key(event_id, 'api', ','.join(fields)), build,
+    )
+    if data is None:
+        return JsonResponse({'success': False, 'error': 'Event not found'}, status=404)
+    data = dict(data)
+    last_modified = data.pop('updated_at')
+    return _conditional_json(request, data, last_modified)
 
-Thank you for using QrEntry!""",
-                    from_email=settings.EMAIL_HOST_USER,
-                    recipient_list=[user.email],
-                    fail_silently=False,
-                )
 
-                print("✅ Email sent successfully to", user.email)
+from django.core.mail import send_mail
+from django.conf import settings
+
+def book_ticket(request, event_id):
+    if request.method == 'POST':
+        try:
+            user = request.user
+            event = Event.objects.get(pk=event_id)
+
+            with transaction.atomic():
+                sell_seat(event)
+                booking = create_booking(user=user, event=event, status='PENDING')
+
+                # ✅ QR code and email are rendered by run_ticket_worker
+                enqueue_ticket_delivery(booking, 'TICKET_EMAIL', site_url=request.build_absolute_uri('/'))
 
             return redirect('booking_success', booking_id=booking.id)
 
         except Event.DoesNotExist:
             return JsonResponse({'success': False, 'error': 'Event not found'})
+        except SoldOut:
+            return JsonResponse({'success': False, 'error': 'Event is sold out'})
 
     return JsonResponse({'success': False, 'error': 'Invalid request'})
 
@@ -118,7 +243,7 @@ Thank you for using QrEntry!""",
 
 # ✅ Success page
 def booking_success(request, booking_id):
-    booking = get_object_or_404(Booking, pk=booking_id)
+    booking = get_object_or_404(Booking.objects.select_related('event'), pk=booking_id)
     return render(request, 'booking_success.html', {'booking': booking})
 
 
@@ -138,9 +263,10 @@ def signup_view(request):
             user = form.save(commit=False)
             user.email = form.cleaned_data['email']
             user.set_password(password)
+            # core.signals creates the Profile with this role in the same save
+            user._signup_role = role
             user.save()
 
-            Profile.objects.create(user=user, role=role)
             messages.success(request, "Signup successful!")
             return redirect('login')
         else:
@@ -174,10 +300,8 @@ def logout_view(request):
 
 
 # ✅ Create Event (organiser only)
-@login_required
+@organiser_required
 def create_event(request):
-    if request.user.profile.role != 'organiser':
-        return redirect('event_list')
 
     if request.method == 'POST':
         form = EventForm(request.POST)
@@ -192,46 +316,217 @@ def create_event(request):
     return render(request, 'create_event.html', {'form': form})
 
 
-# ✅ Download QR Code
-def download_qr_code(request, booking_id):
-    booking = get_object_or_404(Booking, pk=booking_id)
-    if booking.qr_code_path:
-        file_path = os.path.join(settings.MEDIA_ROOT, booking.qr_code_path)
-        if os.path.exists(file_path):
-            return FileResponse(open(file_path, 'rb'), content_type='image/png')
-        else:
-            return JsonResponse({'success': False, 'error': 'QR file not found'})
-    return JsonResponse({'success': False, 'error': 'QR not assigned'})
+async def _qr_response(request, data):
+    key, png = await arender_qr_png(data)
+    # ``?v=`` pins the URL to this exact image (see Booking.qr_url).
+    cache_control = PRIVATE_IMMUTABLE if request.GET.get('v') == qr_version(key) else 'private, max-age=86400'
+    return serve_bytes(request, png, etag=f'"{key}"', content_type='image/png', cache_control=cache_control)
 
 
-# ✅ Mark Attendance (API)
-@csrf_exempt
-def mark_attendance(request, ticket_id):
+# ✅ Download QR Code (rendered on first request, then served from the QR cache)
+async def download_qr_code(request, booking_id):
+    booking = await (
+        Booking.objects.select_related('event')
+        .only('ticket_id', 'event__date')
+        .filter(pk=booking_id)
+        .afirst()
+    )
+    if booking is None:
+        return JsonResponse({'success': False, 'error': 'Booking not found'}, status=404)
+    return await _qr_response(request, make_ticket_token(booking))
+
+
+# ✅ UPI payment QR for an event
+async def event_upi_qr(request, event_id):
     try:
-        booking = Booking.objects.get(ticket_id=ticket_id)
-        booking.status = 'ATTENDED'
-        booking.save()
-        return JsonResponse({'success': True, 'message': 'Attendance marked'})
-    except Booking.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Ticket not found'})
+        event = await Event.objects.aget(pk=event_id)
+    except Event.DoesNotExist:
+        raise Http404('Event not found')
+    return await _qr_response(request, upi_payment_link(event))
+
+
+# ✅ QR cache counters for sizing QR_CACHE_MAX_BYTES
+@staff_member_required
+def qr_cache_stats_view(request):
+    return JsonResponse(qr_cache_stats())
+
+
+def _session_scanner(user):
+    """A signed-in user may scan for the events they organise; staff for any event."""
+    if not user.is_authenticated:
+        return None
+    if user.is_staff:
+        return Scanner(user.pk, '', None)
+    event_ids = frozenset(Event.objects.filter(organizer_id=user.pk).values_list('pk', flat=True))
+    return Scanner(user.pk, '', event_ids) if event_ids else None
 
 
-# ✅ Scan Attendance (HTML page)
+async def _scanner(request):
+    """The ``Scanner`` behind a request: a gate device token or a signed-in organiser, else None.
+
+    Device tokens are checked without touching the session or the database.
+    """
+    token = device_token_from_request(request)
+    if token is not None:
+        try:
+            device = await averify_device_token(token)
+        except InvalidDeviceToken:
+            return None
+        return Scanner(device.user_id, device.device_id, frozenset([device.event_id]))
+    return await sync_to_async(_session_scanner)(await request.auser())
+
+
+# ✅ Mark Attendance (API): one scan through the same path as checkin_batch
 @csrf_exempt
+async def mark_attendance(request, ticket_id):
+    scanner = await _scanner(request)
+    if scanner is None:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+
+    [result] = await sync_to_async(apply_scans)(
+        [{'ticket_id': ticket_id, 'device_id': scanner.device_id}], scanner.user_id, scanner.event_ids,
+    )
+    return JsonResponse({'success': result['result'] == ADMITTED, **result})
+
+
+# ✅ Bulk check-in API for gate scanners
+async def checkin_batch(request):
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request'}, status=405)
+    scanner = await _scanner(request)
+    if scanner is None:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+
+    try:
+        scans = json.loads(request.body).get('scans')
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+
+    max_batch = getattr(settings, 'CHECKIN_BATCH_MAX', 500)
+    if not isinstance(scans, list) or not scans or len(scans) > max_batch:
+        return JsonResponse({'success': False, 'error': f'Send 1-{max_batch} scans'}, status=400)
+    for scan in scans:
+        if not isinstance(scan, dict) or not isinstance(scan.get('ticket_id'), str):
+            return JsonResponse({'success': False, 'error': 'Each scan needs a ticket_id'}, status=400)
+        try:
+            parse_datetime(scan.get('scanned_at') or '')
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'error': 'Invalid scanned_at'}, status=400)
+        scan.setdefault('device_id', scanner.device_id)
+        if not isinstance(scan['device_id'], str):
+            return JsonResponse({'success': False, 'error': 'Invalid device_id'}, status=400)
+
+    # The locked check-in transaction needs a sync connection; run it in a thread.
+    results = await sync_to_async(apply_scans)(scans, scanner.user_id, scanner.event_ids)
+    return JsonResponse({'success': True, 'results': results})
+
+
+# ✅ Live check-in feed (Server-Sent Events) for door dashboards; under WSGI, counters only
+async def checkin_feed(request, event_id):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    event = await Event.objects.only('organizer').filter(pk=event_id).afirst()
+    if event is None:
+        return JsonResponse({'success': False, 'error': 'Event not found'}, status=404)
+    if event.organizer_id != user.id and not user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Not allowed'}, status=403)
+
+    counters = await sync_to_async(checkin_counters)([event_id])
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would drain the endless stream and never return.
+        response = HttpResponse(event_snapshot(counters[event_id]), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+    response = StreamingHttpResponse(event_stream(event_id, counters[event_id]), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ✅ Door dashboard page (subscribes to checkin_feed)
+@login_required
+def checkin_live(request, event_id):
+    event = get_object_or_404(Event, pk=event_id)
+    if event.organizer_id != request.user.id and not request.user.is_staff:
+        return HttpResponse(status=403)
+    return render(request, 'checkin_live.html', {'event': event})
+
+
+# ✅ Prometheus scrape endpoint (staff session or METRICS_TOKEN bearer token)
+def metrics_view(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    bearer = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    allowed = request.user.is_staff or (token and hmac.compare_digest(bearer, token))
+    if not allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(histograms.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ✅ Offline gate manifest (token key + Bloom filter of valid tickets), for organisers or the event's devices
+def gate_manifest(request, event_id):
+    event = get_object_or_404(Event, pk=event_id)
+    token = device_token_from_request(request)
+    if token is not None:
+        try:
+            allowed = verify_device_token(token).event_id == event.pk
+        except InvalidDeviceToken:
+            allowed = False
+    else:
+        allowed = event.organizer_id == request.user.id or request.user.is_staff
+    if not allowed:
+        return JsonResponse({'success': False, 'error': 'Not allowed'}, status=403)
+    response = JsonResponse(build_manifest(event))
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+# ✅ Issue a gate scanner token for one of the organiser's events
+@login_required
+def issue_device_token_view(request, event_id):
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request'}, status=405)
+    event = get_object_or_404(Event, pk=event_id)
+    if event.organizer_id != request.user.id and not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Not allowed'}, status=403)
+    try:
+        token = issue_device_token(event, request.user, request.POST.get('device_id', ''))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    response = JsonResponse({'success': True, 'token': token, 'expires': token_expiry(event).isoformat()})
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+# ✅ Revoke a gate scanner token (staff, or the organiser of its event), e.g. for a lost device
+@login_required
+def revoke_device_token_view(request):
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request'}, status=405)
+    token = request.POST.get('token', '')
+    try:
+        device = verify_device_token(token)
+    except InvalidDeviceToken as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    allowed = request.user.is_staff or Event.objects.filter(pk=device.event_id, organizer=request.user).exists()
+    if not allowed:
+        return JsonResponse({'success': False, 'error': 'Not allowed'}, status=403)
+    revoke_device_token(token)
+    return JsonResponse({'success': True, 'event_id': device.event_id, 'device_id': device.device_id})
+
+
+# ✅ Scan Attendance (HTML page) for organisers at the door
+@login_required
 def scan_attendance(request):
+    scanner = _session_scanner(request.user)
+    if scanner is None:
+        return redirect('event_list')
     if request.method == 'POST':
-        ticket_id = request.POST.get('ticket_id')
-        try:
-            booking = Booking.objects.get(ticket_id=ticket_id)
-            if booking.status != 'ATTENDED':
-                booking.status = 'ATTENDED'
-                booking.save()
-                return render(request, 'scan_attendance.html', {'status': 'success', 'ticket_id': ticket_id})
-            else:
-                return render(request, 'scan_attendance.html', {'status': 'fail', 'ticket_id': ticket_id})
-        except Booking.DoesNotExist:
-            return render(request, 'scan_attendance.html', {'status': 'fail', 'ticket_id': ticket_id})
-    
+        ticket_id = request.POST.get('ticket_id', '')
+        [result] = apply_scans([{'ticket_id': ticket_id}], scanner.user_id, scanner.event_ids)
+        status = 'success' if result['result'] == ADMITTED else 'fail'
+        return render(request, 'scan_attendance.html', {'status': status, 'ticket_id': ticket_id})
+
     return render(request, 'scan_attendance.html')
 
 
@@ -246,13 +541,7 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.core.mail import EmailMessage
 from django.conf import settings
 from .models import Event, Booking
-from .utils import generate_qr_code  # Update this import if needed
-import uuid
 import os
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.utils import ImageReader
 
 @csrf_exempt
 @login_required
@@ -261,73 +550,16 @@ def fake_payment(request, event_id):
 
     if request.method == 'POST':
         user = request.user
-        ticket_id = str(uuid.uuid4())[:8]
-
-        # ✅ Create booking
-        booking = Booking.objects.create(
-            user=user,
-            event=event,
-            ticket_id=ticket_id,
-            status='PENDING'
-        )
-
-        # ✅ Generate QR code image
-        qr_filename = f'{ticket_id}.png'
-        booking.qr_code_path = generate_qr_code(data=ticket_id, filename=qr_filename)
-        booking.save()
-
-        # ✅ Send email with PDF ticket
-        if user.email:
-            print("Preparing to send email with PDF...")
-
-            # Step 1: Generate the PDF
-            buffer = BytesIO()
-            p = canvas.Canvas(buffer, pagesize=letter)
-
-            # Ticket text
-            p.setFont("Helvetica-Bold", 14)
-            p.drawString(100, 750, "🎟️ QrEntry Ticket Confirmation")
-            p.setFont("Helvetica", 12)
-            p.drawString(100, 720, f"Name: {user.username}")
-            p.drawString(100, 700, f"Event: {event.name}")
-            p.drawString(100, 680, f"Ticket ID: {ticket_id}")
-            p.drawString(100, 660, f"Status: {booking.status}")
-            p.drawString(100, 640, "Please show this ticket at entry.")
-
-            # Step 2: Add QR code image to PDF
-            qr_path = os.path.join(settings.MEDIA_ROOT, booking.qr_code_path)
-            if os.path.exists(qr_path):
-                p.drawImage(ImageReader(qr_path), 100, 500, width=150, height=150)
-
-            p.showPage()
-            p.save()
-            buffer.seek(0)
-
-            # Step 3: Create email
-            email = EmailMessage(
-                subject=f"🎫 Your Ticket for {event.name}",
-                body=f"""Hi {user.username},
-
-Your ticket booking was successful!
 
-Please find your ticket attached as a PDF.
-
-Event: {event.name}
-Ticket ID: {ticket_id}
-Status: {booking.status}
-
-Show the QR code at the event entry.
-
-Thank you for using QrEntry!""",
-                from_email=settings.EMAIL_HOST_USER,
-                to=[user.email],
-            )
-
-            # Step 4: Attach the PDF
-            email.attach(f"{ticket_id}_ticket.pdf", buffer.read(), "application/pdf")
-            email.send()
-
-            print("✅ Email with PDF sent to:", user.email)
+        # ✅ Create booking and queue the PDF ticket email in one transaction
+        try:
+            with transaction.atomic():
+                sell_seat(event)
+                booking = create_booking(user=user, event=event, status='PENDING')
+                enqueue_ticket_delivery(booking, 'TICKET_PDF', site_url=request.build_absolute_uri('/'))
+        except SoldOut:
+            messages.error(request, "Sorry, this event is sold out.")
+            return redirect('event_detail', event_id=event.id)
 
         # ✅ Redirect to booking success page
         return redirect('booking_success', booking_id=booking.id)
@@ -336,39 +568,20 @@ Thank you for using QrEntry!""",
 
 
 
-# ✅ Payment Webhook Handler (Simulated)
+# ✅ Payment Webhook: accepts one event or a batch and only appends to the inbox
 @csrf_exempt
 def payment_webhook(request):
-    if request.method == 'POST':
-        try:
-            data = json.loads(request.body)
-            ticket_id = data.get('ticket_id')
-            payment_status = data.get('status')
-
-            booking = Booking.objects.get(ticket_id=ticket_id)
-            if payment_status == 'SUCCESS':
-                booking.status = 'CONFIRMED'
-                booking.save()
-
-            return JsonResponse({'success': True})
-        except Exception as e:
-            return JsonResponse({'success': False, 'error': str(e)})
-    return JsonResponse({'success': False, 'error': 'Invalid request'})
-
-
-# ✅ Attendance HTML form view
-@csrf_exempt
-def attendance_form(request):
-    if request.method == 'POST':
-        ticket_id = request.POST.get('ticket_id')
-        try:
-            booking = Booking.objects.get(ticket_id=ticket_id)
-            booking.status = 'ATTENDED'
-            booking.save()
-            return render(request, 'attendance.html', {'success': True, 'message': f"Attendance marked for {ticket_id}"})
-        except Booking.DoesNotExist:
-            return render(request, 'attendance.html', {'error': True, 'message': "Ticket not found"})
-    return render(request, 'attendance.html')
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request'}, status=405)
+    try:
+        data = json.loads(request.body)
+        items = data.get('events', [data]) if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            raise InvalidPaymentEvent('Expected an event or a list of events')
+        received = ingest_payment_events(items)
+    except (ValueError, InvalidPaymentEvent) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'received': received}, status=202)
 
 
 from django.contrib.auth.models import User
@@ -376,16 +589,54 @@ from django.contrib.auth.models import User
 def create_admin_user():
     if not User.objects.filter(username="admin").exists():
         User.objects.create_superuser("admin", "admin@example.com", "admin123")
-        print("Superuser created")
+        logger.info("Superuser created")
 
 create_admin_user()
 
 
+@organiser_required
+def organizer_dashboard(request):
+    events = organizer_event_summaries(request.user)
+    return render(request, 'organizer_dashboard.html', {'events': events})
+
+
 @login_required
+def export_attendees(request, event_id):
+    event = get_object_or_404(Event.objects.only('name', 'organizer_id'), pk=event_id)
+    if event.organizer_id != request.user.id and not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Not allowed'}, status=403)
+
+    response = StreamingHttpResponse(stream_attendees_csv(event.id), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="event-{event.id}-attendees.csv"'
+    return response
+
+
+@organiser_required
 def organizer_bookings(request):
-    bookings = Booking.objects.filter(event__organizer=request.user)
-    return render(request, 'organizer_bookings.html', {'bookings': bookings})
+    bookings = (
+        Booking.objects.filter(event__organizer=request.user)
+        .select_related('event', 'user')
+        .only(
+            'ticket_id', 'status', 'booking_time', 'payment_screenshot', 'payment_screenshot_thumb',
+            'event__name', 'user__username',
+        )
+        .order_by('-booking_time', '-id')
+    )
+    event_id = request.GET.get('event')
+    if event_id and event_id.isdigit():
+        bookings = bookings.filter(event_id=event_id)
+
+    page = Paginator(bookings, getattr(settings, 'ORGANIZER_BOOKINGS_PER_PAGE', 50)).get_page(request.GET.get('page'))
+    return render(request, 'organizer_bookings.html', {
+        'bookings': page,
+        'page': page,
+        'event_id': event_id,
+    })
+
+
 
+def upi_payment_link(event):
+    return f"upi://pay?pa={event.upi_id}&pn={event.name}&am={event.price}&cu=INR"
 
 
 @login_required
@@ -393,62 +644,117 @@ def payment_page(request, event_id):
     event = get_object_or_404(Event, id=event_id)
     user = request.user
 
-    # Create a ticket booking
-    ticket_id = str(uuid.uuid4())[:8]
-    booking = Booking.objects.create(
-        user=user,
-        event=event,
-        ticket_id=ticket_id,
-        status='PENDING'
-    )
+    upi_link = upi_payment_link(event)
 
-    # Generate QR Code with UPI link
-    upi_id = event.upi_id
-    amount = event.price
-    upi_link = f"upi://pay?pa={upi_id}&pn={event.name}&am={amount}&cu=INR"
+    # Reuse a live hold on reload instead of taking another seat
+    booking = Booking.objects.filter(
+        user=user, event=event, status='PENDING', hold_expires_at__gt=now(),
+    ).first()
 
-    qr_filename = f"{ticket_id}.png"
-    qr_path = generate_qr_code(upi_link, qr_filename)
-    booking.qr_code_path = qr_path
-    booking.save()
+    if booking is None:
+        # Create a ticket booking holding a seat until payment
+        try:
+            with transaction.atomic():
+                expires = hold_seat(event)
+                booking = create_booking(user=user, event=event, status='PENDING', hold_expires_at=expires)
+        except SoldOut:
+            messages.error(request, "Sorry, this event is sold out.")
+            return redirect('event_detail', event_id=event.id)
 
     return render(request, 'payment_page.html', {
         'event': event,
         'booking': booking,
         'upi_link': upi_link
     })
-from django.conf import settings
-from django.core.files.storage import FileSystemStorage
-import os
 
+# ✅ Payment screenshot upload: streamed, size-capped and stored by content hash
+@csrf_exempt
 @login_required
 def payment_success(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
+    # Upload handlers must be in place before CSRF checks read request.POST.
+    limiter = ScreenshotUploadHandler(request)
+    request.upload_handlers.insert(0, limiter)
+    return _payment_success(request, booking_id, limiter)
+
 
-    if request.method == "POST" and request.FILES.get('payment_screenshot'):
-        uploaded_file = request.FILES['payment_screenshot']
+@csrf_protect
+def _payment_success(request, booking_id, limiter):
+    booking = get_object_or_404(Booking, id=booking_id)
 
-        # Store in 'payment_ss/' directory inside media
-        fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'payment_ss'), base_url='/media/payment_ss/')
-        filename = fs.save(uploaded_file.name, uploaded_file)
-        file_url = fs.url(filename)
+    if request.method == "POST" and (request.FILES.get('payment_screenshot') or limiter.too_large):
+        try:
+            if limiter.too_large:
+                raise ScreenshotRejected(
+                    f"Screenshots must be under {limiter.max_bytes // (1024 * 1024)} MB."
+                )
+            screenshot = store_screenshot(
+                request.FILES['payment_screenshot'], limiter.digests['payment_screenshot'],
+            )
+        except ScreenshotRejected as e:
+            messages.error(request, str(e))
+            return redirect('payment_page', event_id=booking.event_id)
 
-        # Save relative path to model field
-        booking.payment_screenshot.name = 'payment_ss/' + filename
-        booking.status = 'Success'  # Or 'Pending' if you want manual verification
-        booking.save()
+        try:
+            confirm_hold(booking)
+        except SoldOut:
+            messages.error(request, "Your seat hold expired and the event is now sold out.")
+            return redirect('booking_list')
+
+        with transaction.atomic():
+            booking.payment_screenshot.name = screenshot
+            booking.payment_screenshot_thumb = None
+            booking.status = 'Success'  # Or 'Pending' if you want manual verification
+            booking.save()
+            # ✅ Thumbnail is rendered by run_ticket_worker, off the request path
+            enqueue_ticket_delivery(booking, 'SCREENSHOT_THUMB')
 
         return redirect('booking_list')
     
     return render(request, 'payment_success.html', {'booking': booking})
 
 
-from django.contrib import messages
+# ✅ Payment screenshot thumbnail (content-hashed name, cacheable forever)
+@login_required
+def payment_screenshot_thumb(request, booking_id, name):
+    booking = get_object_or_404(
+        Booking.objects.select_related('event').only('user_id', 'payment_screenshot_thumb', 'event__organizer_id'),
+        pk=booking_id,
+    )
+    user = request.user
+    if user.id not in (booking.user_id, booking.event.organizer_id) and not user.is_staff:
+        return HttpResponse(status=403)
+    thumb = booking.payment_screenshot_thumb.name
+    if not thumb or os.path.basename(thumb) != name:
+        raise Http404('Thumbnail not found')
+    return serve_file(request, thumb, cache_control=PRIVATE_IMMUTABLE)
+
 
+# ✅ Uploaded media; every file is access-checked, content-hashed ones cache forever
 @login_required
+def serve_media(request, path):
+    user = request.user
+    if path.startswith('payment_screenshots/'):
+        owned = Q(user=user) | Q(event__organizer=user)
+        allowed = user.is_staff or (
+            Booking.objects.filter(Q(payment_screenshot=path) | Q(payment_screenshot_thumb=path)).filter(owned).exists()
+            or Payment.objects.filter(payment_screenshot=path)
+            .filter(Q(booking__user=user) | Q(booking__event__organizer=user)).exists()
+        )
+    elif path.startswith('screenshots/'):
+        allowed = user.is_staff or Participant.objects.filter(payment_screenshot=path, event__organizer=user).exists()
+    else:
+        allowed = user.is_staff
+    if not allowed:
+        raise Http404('File not found')
+
+    cache_control = PRIVATE_IMMUTABLE if is_content_addressed(path) else 'private, no-cache'
+    return serve_file(request, path, cache_control=cache_control)
+
+
+from django.contrib import messages
+
+@organiser_required
 def create_event(request):
-    if request.user.profile.role != 'organiser':
-        return redirect('event_list')
 
     if request.method == 'POST':
         form = EventForm(request.POST)
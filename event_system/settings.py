@@ -47,11 +47,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.devices.DeviceTokenMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.roles.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -134,7 +137,9 @@ if os.getenv("RENDER"):
     DATABASES = {
         "default": dj_database_url.config(
             default=os.getenv("DATABASE_URL"),
-            conn_max_age=600,
+            # Persistent connections are per thread; set DB_CONN_MAX_AGE=0 when
+            # serving through ASGI (event_system.asgi) so async requests don't leak them.
+            conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", 600)),
             conn_health_checks=True,
         )
     }
@@ -166,3 +171,122 @@ LOGIN_URL = '/login/'
 
 RAZORPAY_KEY_ID = 'rzp_test_IjmSdHGyOEYY2L'
 RAZORPAY_KEY_SECRET = 'SD14KMbz3muyhM6NaGzGdrvF'
+
+
+# Ticket delivery outbox (see core/delivery.py and `manage.py run_ticket_worker`)
+TICKET_WORKER_CONCURRENCY = int(os.getenv("TICKET_WORKER_CONCURRENCY", 4))
+TICKET_WORKER_POOL = os.getenv("TICKET_WORKER_POOL", "thread")
+TICKET_WORKER_POLL_SECONDS = 2.0
+TICKET_DELIVERY_MAX_ATTEMPTS = 5
+TICKET_DELIVERY_BACKOFF_SECONDS = 30
+TICKET_DELIVERY_BACKOFF_MAX_SECONDS = 3600
+TICKET_DELIVERY_LEASE_SECONDS = 300
+
+# Seat holds for PENDING bookings (see core/reservations.py and `manage.py release_expired_holds`)
+BOOKING_HOLD_SECONDS = 900
+BOOKING_HOLD_SWEEP_SECONDS = 60
+
+# QR code cache (see core/qr.py); counters at /api/qr/stats/
+QR_CACHE_MAX_BYTES = 16 * 1024 * 1024
+QR_DISK_CACHE = True
+
+# Largest batch accepted by /api/checkin/batch/
+CHECKIN_BATCH_MAX = 500
+
+# Signed ticket tokens stay valid this long after the event day ends (see core/tokens.py)
+TICKET_TOKEN_GRACE_HOURS = 12
+
+# Response cache for event pages and API payloads (see core/response_cache.py).
+# locmem is per-process; point DJANGO_CACHE_DIR at a shared directory to use
+# one file-based cache across gunicorn workers.
+if os.getenv("DJANGO_CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("DJANGO_CACHE_DIR"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_SECONDS = 600
+EVENT_SEATS_CACHE_SECONDS = 5
+
+# Rows per page on the organiser bookings table
+ORGANIZER_BOOKINGS_PER_PAGE = 50
+
+# Pooled outgoing mail (see core/mail.py). Rates are messages/second per EMAIL_HOST.
+MAIL_POOL_SIZE = 4
+MAIL_CONNECTION_MAX_IDLE = 60
+MAIL_BATCH_SIZE = 50
+MAIL_RATE_LIMITS = {
+    'smtp.gmail.com': 5,
+}
+
+# Poll interval for `manage.py apply_payment_events --loop`
+PAYMENT_EVENTS_POLL_SECONDS = 1.0
+
+# Live check-in feed (see core/live.py); messages buffered per dashboard
+# and the quiet interval after which a keepalive comment is sent. Under WSGI
+# the feed sends one counters snapshot and browsers reconnect after RETRY_MS.
+CHECKIN_FEED_QUEUE_SIZE = 100
+CHECKIN_FEED_KEEPALIVE_SECONDS = 15
+CHECKIN_FEED_RETRY_MS = 5000
+
+# Request instrumentation (see core/instrumentation.py). /metrics/ is open to
+# staff sessions, or to scrapers sending "Authorization: Bearer $METRICS_TOKEN".
+SERVER_TIMING_HEADER = True
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core": {"handlers": ["console"], "level": os.getenv("CORE_LOG_LEVEL", "INFO")},
+        # One JSON line per request; set REQUEST_LOG_LEVEL=INFO to turn them on.
+        "core.instrumentation": {"level": os.getenv("REQUEST_LOG_LEVEL", "WARNING")},
+    },
+}
+
+# Base for the node number (0-16383) in ticket IDs (see core/ticket_ids.py);
+# each worker adds its PID. Give every host a base far from the others';
+# unset, nodes are derived from the host name and PID.
+TICKET_ID_NODE = os.getenv("TICKET_ID_NODE")
+
+# Payment screenshot uploads (see core/screenshots.py). Uploads above
+# FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to a temp file instead of memory.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+PAYMENT_SCREENSHOT_MAX_BYTES = 5 * 1024 * 1024
+PAYMENT_SCREENSHOT_MAX_PIXELS = 40_000_000
+PAYMENT_SCREENSHOT_THUMB_SIZE = 320
+
+# Media serving (see core/media.py). Set MEDIA_OFFLOAD_HEADER to
+# "X-Accel-Redirect" (nginx, with an internal location at MEDIA_OFFLOAD_PREFIX
+# aliased to MEDIA_ROOT) or "X-Sendfile" to let the proxy send file bodies.
+MEDIA_OFFLOAD_HEADER = os.getenv("MEDIA_OFFLOAD_HEADER")
+MEDIA_OFFLOAD_PREFIX = "/protected-media/"
+
+# Gate scanner device tokens (see core/devices.py). Each worker rereads the
+# revocation list from the database at most this often.
+DEVICE_REVOCATION_REFRESH_SECONDS = 5
+
+# Browser sessions. "cached_db" reads the session row once per cache
+# timeout instead of on every request; "signed_cookies" needs no storage at
+# all but can't be revoked server-side.
+SESSION_ENGINE = os.getenv("SESSION_ENGINE", "django.contrib.sessions.backends.cached_db")
+
+# Profile roles cached per user by core.roles; core.signals drops an entry
+# when its Profile is saved or deleted. Other workers only see that through a
+# shared cache, so a per-process locmem cache keeps roles for seconds only.
+ROLE_CACHE_ALIAS = "default"
+ROLE_CACHE_SECONDS = 3600
+ROLE_LOCAL_CACHE_SECONDS = 5
+
+# Admin changelists estimate unfiltered PostgreSQL tables past this many rows
+# instead of counting them (see core.pagination.EstimatedCountPaginator).
+ADMIN_EXACT_COUNT_LIMIT = 10000